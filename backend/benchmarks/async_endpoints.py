@@ -0,0 +1,221 @@
+"""
+Load-test the async read endpoints against their sync DRF versions under daphne.
+
+Builds a throwaway database (a chat with ``--messages`` messages, a forum
+thread, ``--groups`` groups and a discovery feed's worth of users), starts
+one daphne process serving the project's ASGI application, and drives each
+endpoint with ``--concurrency`` keep-alive connections authenticated by
+JWT. The sync versions are the same DRF views mounted under ``/sync/``, so
+both sides run in the same process, with the same middleware and
+serializers. Reports requests per second and latency percentiles. The
+database is created with Django's test database machinery on the
+configured server and dropped afterwards; ``--sqlite`` uses a temporary
+SQLite file instead, so no services are needed.
+
+Usage:
+    python benchmarks/async_endpoints.py [--requests 2000] [--concurrency 32] [--sqlite]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dawgpound.settings')
+
+
+def populate(n_messages, n_groups):
+    from django.core.management import call_command
+    from forums.models import Thread
+    from groups.models import Group, GroupMembership
+    from messaging.models import Message, PrivateChat
+    from users.models import Friendship, User
+
+    users = User.objects.bulk_create([
+        User(username=f'u{i}', email=f'u{i}@example.com', university_email=f'u{i}@university.edu',
+             password='!', onboarding_completed=True, majors=['Computer Science'],
+             interests_hobbies=['Chess', 'Music'][:1 + i % 2], year_of_study='Junior')
+        for i in range(50)
+    ])
+    viewer = users[0]
+    groups = Group.objects.bulk_create([
+        Group(name=f'group {i}', category='other', tags=['Chess'] if i % 3 else ['Music'])
+        for i in range(n_groups)
+    ])
+    GroupMembership.objects.bulk_create([GroupMembership(user=user, group=groups[0]) for user in users])
+    for other in users[1:6]:
+        Friendship.objects.create(user1=viewer, user2=other)
+    thread = Thread.objects.create(group=groups[0], author=users[1], title='Openings', content='e4 ' * 200)
+    chat = PrivateChat.objects.create(name='bench')
+    chat.participants.add(viewer, users[1])
+    Message.objects.bulk_create([
+        Message(chat=chat, author=users[i % 2], content=f'message {i}') for i in range(n_messages)
+    ])
+    # Bulk inserts skip the signals that keep counters and discovery indexes current.
+    call_command('reconcile_counters', verbosity=0)
+    call_command('rebuild_discovery_index', verbosity=0)
+    return viewer, chat.pk, thread.pk
+
+
+def endpoints(chat_id, thread_id):
+    return [
+        ('chat history', f'/api/messages/chats/{chat_id}/messages/', f'/sync/chats/{chat_id}/messages/'),
+        ('thread detail', f'/api/forums/threads/{thread_id}/', f'/sync/threads/{thread_id}/'),
+        ('group list', '/api/groups/', '/sync/groups/'),
+        ('discovery feed', '/api/discovery/feed/', '/sync/feed/'),
+    ]
+
+
+def serve(port):
+    """Child process: daphne with the project URLs plus the sync DRF views under ``/sync/``."""
+    from daphne.endpoints import build_endpoint_description_strings
+    from daphne.server import Server
+    from django.conf import settings
+    from django.db import connections
+    from django.urls import clear_url_caches, include, path
+
+    connections.close_all()
+    from forums.views import ThreadViewSet
+    from groups.views import DiscoveryFeedView, GroupViewSet
+    from messaging.views import PrivateChatViewSet
+
+    urls = types.ModuleType('benchmark_urls')
+    urls.urlpatterns = [
+        path('sync/chats/<int:pk>/messages/',
+             PrivateChatViewSet.as_view({'get': 'messages'}, **PrivateChatViewSet.messages.kwargs)),
+        path('sync/threads/<int:pk>/', ThreadViewSet.as_view({'get': 'retrieve'})),
+        path('sync/groups/', GroupViewSet.as_view({'get': 'list'})),
+        path('sync/feed/', DiscoveryFeedView.as_view()),
+        path('', include('dawgpound.urls')),
+    ]
+    sys.modules['benchmark_urls'] = urls
+    settings.ROOT_URLCONF = 'benchmark_urls'
+    settings.ALLOWED_HOSTS = ['*']
+    clear_url_caches()
+
+    from django.core.asgi import get_asgi_application
+    Server(
+        application=get_asgi_application(),
+        endpoints=build_endpoint_description_strings(host='127.0.0.1', port=port),
+        verbosity=0,
+    ).run()
+
+
+async def fetch(reader, writer, request):
+    writer.write(request)
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def load(port, url, token, n_requests, concurrency):
+    """``(requests/sec, latencies in ms)`` for ``n_requests`` GETs of ``url``."""
+    request = (
+        f'GET {url} HTTP/1.1\r\nHost: localhost\r\nAuthorization: Bearer {token}\r\n'
+        'Connection: keep-alive\r\n\r\n'
+    ).encode()
+    latencies = []
+    remaining = n_requests
+
+    async def worker():
+        nonlocal remaining
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        try:
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                status = await fetch(reader, writer, request)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert status == 200, f'{url} returned {status}'
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return n_requests / (time.perf_counter() - started), latencies
+
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'daphne did not start on port {port}')
+
+
+def bench(args):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    viewer, chat_id, thread_id = populate(args.messages, args.groups)
+    token = str(AccessToken.for_user(viewer))
+    server = multiprocessing.get_context('fork').Process(target=serve, args=(args.port,), daemon=True)
+    server.start()
+    try:
+        wait_for(args.port)
+        print(f'daphne, 1 process | {args.requests} requests per endpoint | {args.concurrency} connections')
+        for name, async_url, sync_url in endpoints(chat_id, thread_id):
+            results = {}
+            for kind, url in (('sync', sync_url), ('async', async_url)):
+                asyncio.run(load(args.port, url, token, args.concurrency * 4, args.concurrency))
+                rps, latencies = asyncio.run(load(args.port, url, token, args.requests, args.concurrency))
+                quantiles = statistics.quantiles(latencies, n=100)
+                results[kind] = rps
+                print(f'{name:>15} {kind:>5} | {rps:8.1f} req/s | p50 {quantiles[49]:7.1f}ms '
+                      f'| p99 {quantiles[98]:7.1f}ms')
+            print(f'{name:>15}       | async/sync {results["async"] / results["sync"]:5.2f}x')
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--groups', type=int, default=300)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--sqlite', action='store_true')
+    args = parser.parse_args()
+
+    from django.conf import settings
+    if args.sqlite:
+        # A file, not :memory:, so the daphne process sees the same data.
+        path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        settings.DATABASES = {'default': {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': path, 'TEST': {'NAME': path},
+        }}
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+    import django
+    django.setup()
+    # Signal handlers enqueue Celery tasks; run them inline instead of needing a broker.
+    from dawgpound.celery import app as celery_app
+    celery_app.conf.task_always_eager = True
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        bench(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Benchmark the chat inbox endpoint for users with hundreds of chats.
+
+Builds a throwaway database where one user takes part in ``--chats`` chats
+(each with ``--participants`` members and ``--messages`` messages, about a
+third of them unread), then times ``GET /api/messages/chats/inbox/``
+against the per-chat loop it replaces: participants, last message and
+unread count fetched separately for every chat. The database is created
+with Django's test database machinery on the configured server and
+dropped afterwards; ``--sqlite`` uses an in-memory SQLite database
+instead, so no services are needed.
+
+Usage:
+    python benchmarks/chat_inbox.py [--chats 500 1000] [--participants 3] [--messages 30] [--sqlite]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dawgpound.settings')
+
+
+def populate(n_chats, n_participants, n_messages):
+    from django.utils import timezone
+    from messaging.models import ChatParticipant, Message, PrivateChat
+    from users.models import User
+
+    users = User.objects.bulk_create([
+        User(username=f'u{i}', email=f'u{i}@example.com', university_email=f'u{i}@university.edu', password='!')
+        for i in range(n_chats + n_participants)
+    ])
+    viewer = users[0]
+    now = timezone.now()
+    chats = PrivateChat.objects.bulk_create([
+        PrivateChat(name=f'chat {i}', participant_count=n_participants, message_count=n_messages)
+        for i in range(n_chats)
+    ])
+    ChatParticipant.objects.bulk_create([
+        ChatParticipant(
+            chat=chat, user=user,
+            last_read_at=now - timedelta(minutes=n_messages // 3) if user == viewer else None,
+        )
+        for i, chat in enumerate(chats)
+        for user in [viewer] + users[1 + i:i + n_participants]
+    ], batch_size=5000)
+    messages = Message.objects.bulk_create([
+        Message(chat=chat, author=users[1 + i], content=f'message {j}')
+        for i, chat in enumerate(chats)
+        for j in range(n_messages)
+    ], batch_size=5000)
+    Message.objects.update(created_at=now)
+    for j in range(n_messages):
+        Message.objects.filter(content=f'message {j}').update(created_at=now - timedelta(minutes=n_messages - j))
+    for chat, last in zip(chats, messages[n_messages - 1::n_messages]):
+        PrivateChat.objects.filter(pk=chat.pk).update(last_message=last)
+    return viewer
+
+
+def naive_inbox(user):
+    from messaging.models import ChatParticipant, Message, PrivateChat
+
+    rows = []
+    for chat in PrivateChat.objects.filter(participants=user).order_by('-updated_at'):
+        read = ChatParticipant.objects.get(chat=chat, user=user)
+        rows.append({
+            'chat': chat.pk,
+            'participants': list(chat.participants.all()),
+            'last_message': Message.objects.filter(chat=chat).order_by('-created_at').select_related('author').first(),
+            'unread': Message.objects.filter(
+                chat=chat, created_at__gt=read.last_read_at or read.joined_at
+            ).exclude(author=user).count(),
+        })
+    return rows
+
+
+def measure(fn, repeat):
+    """Mean milliseconds and queries per call of ``fn``."""
+    from django.db import connection
+
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    with connection.execute_wrapper(count):
+        for _ in range(repeat):
+            fn()
+    return (time.perf_counter() - started) / repeat * 1000, queries // repeat
+
+
+def bench(n_chats, n_participants, n_messages, repeat):
+    from rest_framework.test import APIClient
+    from messaging.models import ChatParticipant, Message, PrivateChat
+    from users.models import User
+
+    viewer = populate(n_chats, n_participants, n_messages)
+    client = APIClient()
+    client.force_authenticate(viewer)
+
+    def endpoint():
+        response = client.get('/api/messages/chats/inbox/')
+        assert len(response.data['results']) == n_chats
+
+    endpoint_ms, endpoint_queries = measure(endpoint, repeat)
+    naive_ms, naive_queries = measure(lambda: naive_inbox(viewer), repeat)
+    print(
+        f'{n_chats:>6} chats | inbox endpoint {endpoint_ms:8.1f}ms ({endpoint_queries} queries) '
+        f'| per-chat loop {naive_ms:8.1f}ms ({naive_queries} queries, no serialization)'
+    )
+
+    for model in (Message, ChatParticipant, PrivateChat, User):
+        model.objects.all().delete()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--chats', type=int, nargs='+', default=[500, 1000])
+    parser.add_argument('--participants', type=int, default=3)
+    parser.add_argument('--messages', type=int, default=30)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sqlite', action='store_true')
+    args = parser.parse_args()
+
+    from django.conf import settings
+    if args.sqlite:
+        settings.DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+    import django
+    django.setup()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    # The per-chat loop is an N+1 on purpose.
+    logging.getLogger('core.querycount').setLevel(logging.ERROR)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        for n_chats in args.chats:
+            bench(n_chats, args.participants, args.messages, args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Benchmark friend graph queries on the FriendEdge table against Friendship.
+
+Builds a throwaway database with a synthetic friendship graph (skewed
+degrees, ten friendships per user on average), then times ``friends``,
+``mutual`` and ``friends_of_friends`` from ``users.friends`` against the
+equivalent queries over the unordered ``Friendship`` pairs for a sample of
+users. The database is created with Django's test database machinery on the
+configured server and dropped afterwards; ``--sqlite`` uses an in-memory
+SQLite database instead, so no services are needed.
+
+Usage:
+    python benchmarks/friend_graph.py [--edges 1000000] [--sample 200] [--sqlite]
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dawgpound.settings')
+
+
+def synthetic_graph(n_edges, seed=0):
+    """Return ``(n_users, [(user1, user2), ...])`` with ``user1 < user2``."""
+    rng = np.random.default_rng(seed)
+    n_users = max(100, n_edges // 10)
+    pairs = set()
+    while len(pairs) < n_edges:
+        size = n_edges - len(pairs)
+        # Low ids are popular: endpoint density falls off as x ** -0.4.
+        a = (rng.power(0.6, size) * n_users).astype(int)
+        b = rng.integers(n_users, size=size)
+        pairs.update((int(x), int(y)) if x < y else (int(y), int(x)) for x, y in zip(a, b) if x != y)
+    return n_users, list(pairs)[:n_edges]
+
+
+def populate(n_users, pairs):
+    from users.models import FriendEdge, Friendship, User
+
+    User.objects.bulk_create(
+        [User(username=f'u{i}', email=f'u{i}@example.com', university_email=f'u{i}@university.edu',
+              password='!') for i in range(n_users)],
+        batch_size=5000,
+    )
+    first = User.objects.order_by('pk').values_list('pk', flat=True).first()
+    pairs = [(a + first, b + first) for a, b in pairs]
+    for start in range(0, len(pairs), 50000):
+        chunk = pairs[start:start + 50000]
+        Friendship.objects.bulk_create([Friendship(user1_id=a, user2_id=b) for a, b in chunk], batch_size=5000)
+        FriendEdge.objects.bulk_create(
+            [FriendEdge(user_id=a, friend_id=b) for a, b in chunk]
+            + [FriendEdge(user_id=b, friend_id=a) for a, b in chunk],
+            batch_size=5000,
+        )
+    return first
+
+
+def legacy_friends(user_id):
+    from django.db.models import Q
+    from users.models import Friendship
+
+    pairs = Friendship.objects.filter(Q(user1_id=user_id) | Q(user2_id=user_id)).values_list('user1_id', 'user2_id')
+    return {uid for pair in pairs for uid in pair} - {user_id}
+
+
+def legacy_mutual(user_id, other_id):
+    return legacy_friends(user_id) & legacy_friends(other_id)
+
+
+def legacy_friends_of_friends(user_id, limit=20):
+    from django.db.models import Q
+    from users.models import Friendship
+
+    friends = legacy_friends(user_id)
+    counts = Counter()
+    pairs = Friendship.objects.filter(Q(user1_id__in=friends) | Q(user2_id__in=friends)).values_list('user1_id', 'user2_id')
+    for a, b in pairs:
+        if a in friends:
+            counts[b] += 1
+        if b in friends:
+            counts[a] += 1
+    for uid in friends | {user_id}:
+        counts.pop(uid, None)
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def timed(fn, calls):
+    started = time.perf_counter()
+    for args in calls:
+        fn(*args)
+    return (time.perf_counter() - started) / len(calls) * 1000
+
+
+def bench(n_edges, sample):
+    from users.friends import friends, friends_of_friends, mutual
+
+    n_users, pairs = synthetic_graph(n_edges)
+    started = time.perf_counter()
+    first = populate(n_users, pairs)
+    print(f'{n_users} users, {len(pairs)} friendships ({2 * len(pairs)} edges) loaded in '
+          f'{time.perf_counter() - started:.1f}s')
+
+    rng = np.random.default_rng(1)
+    users = [int(u) + first for u in rng.integers(n_users, size=sample)]
+    others = [int(u) + first for u in rng.integers(n_users, size=sample)]
+    cases = [
+        ('friends(u)', friends, legacy_friends, [(u,) for u in users]),
+        ('mutual(u, v)', mutual, legacy_mutual, list(zip(users, others))),
+        ('friends_of_friends(u)', friends_of_friends, legacy_friends_of_friends, [(u,) for u in users]),
+    ]
+    for name, fn, legacy, calls in cases:
+        edge_ms = timed(fn, calls)
+        legacy_ms = timed(legacy, calls)
+        print(f'{name:>22} | edges {edge_ms:8.2f}ms | friendship pairs {legacy_ms:8.2f}ms '
+              f'| {legacy_ms / edge_ms:5.1f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--edges', type=int, default=1000000)
+    parser.add_argument('--sample', type=int, default=200)
+    parser.add_argument('--sqlite', action='store_true')
+    args = parser.parse_args()
+
+    from django.conf import settings
+    if args.sqlite:
+        settings.DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+    import django
+    django.setup()
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        bench(args.edges, args.sample)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark the vectorized user similarity scorer against the per-pair loop.
+
+Generates synthetic campuses (Zipf-distributed majors, interests and group
+sizes, four class years with a class-year group each), then times
+``users.similarity.top_k_neighbors`` over every user and the reference
+``naive_top_k_neighbors`` loop. The naive loop is quadratic, so it is timed
+on a sample of rows and extrapolated to the full campus.
+
+Usage:
+    python benchmarks/user_similarity.py [--users 10000 50000 200000] [--k 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'dawgpound.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from users.similarity import build_incidence, naive_top_k_neighbors, top_k_neighbors  # noqa: E402
+
+
+YEARS = ['Freshman', 'Sophomore', 'Junior', 'Senior']
+
+
+def synthetic_campus(n_users, seed=0):
+    rng = np.random.default_rng(seed)
+    n_groups = max(50, n_users // 40)
+    users = []
+    for _ in range(n_users):
+        year = rng.integers(len(YEARS))
+        features = {('year', YEARS[year]), ('group', f'class-{year}')}
+        features.update(('major', int(m)) for m in rng.zipf(1.6, rng.integers(1, 3)) % 80)
+        features.update(('interest', int(i)) for i in rng.zipf(1.4, rng.integers(3, 8)) % 300)
+        features.update(('group', int(g)) for g in rng.zipf(1.3, rng.integers(0, 6)) % n_groups)
+        users.append(features)
+    return users
+
+
+def bench(n_users, k, naive_sample):
+    features = synthetic_campus(n_users)
+
+    started = time.perf_counter()
+    incidence, weights = build_incidence(features)
+    neighbors = sum(len(cols) for _, cols, _ in top_k_neighbors(incidence, weights, k=k))
+    vectorized = time.perf_counter() - started
+
+    sample = min(naive_sample, n_users)
+    started = time.perf_counter()
+    # Score the sample rows against the whole campus, as the full loop would.
+    naive_top_k_neighbors(features, k=k, rows=range(sample))
+    naive = (time.perf_counter() - started) / sample * n_users
+
+    print(
+        f'{n_users:>8} users | vectorized {vectorized:8.1f}s ({neighbors} neighbours) '
+        f'| naive ~{naive:10.1f}s (from {sample} rows) | {naive / vectorized:6.1f}x'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, nargs='+', default=[10000, 50000, 200000])
+    parser.add_argument('--k', type=int, default=50)
+    parser.add_argument('--naive-sample', type=int, default=20)
+    args = parser.parse_args()
+    for n_users in args.users:
+        bench(n_users, args.k, args.naive_sample)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,14 +5,46 @@ Pytest configuration for DawgPound backend tests.
 import pytest
 from django.conf import settings
 
+pytest_plugins = ['core.pytest_plugin']
 
-@pytest.fixture(scope='session')
-def django_db_setup():
-    """Override database settings for tests."""
+
+def pytest_configure(config):
+    """Override database settings for tests.
+
+    pytest-django has already set Django up by now, so the default
+    connection is rebuilt from the new settings and the test database is
+    then created from it as usual.
+    """
+    from django.db import connections
     settings.DATABASES['default'] = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': ':memory:',
     }
+    connections.configure_settings(settings.DATABASES)
+    del connections['default']
+
+    # No Redis in tests; the in-memory channel layer and cache have the same API.
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+    # Run Celery tasks inline so on-commit hooks can be exercised without a broker.
+    from dawgpound.celery import app as celery_app
+    celery_app.conf.task_always_eager = True
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    """Rolled-back test data must not survive in the user caches."""
+    from django.core.cache import cache
+    from groups.feed import feed_cache
+    from moderation.bans import ban_cache
+    from users.blocks import block_cache
+    from users.cache import user_cache
+    cache.clear()
+    user_cache.local.clear()
+    block_cache.local.clear()
+    feed_cache.local.clear()
+    ban_cache.local.clear()
 
 
 @pytest.fixture
@@ -1,3 +1,17 @@
+"""
+Admin configuration for core app.
+"""
+
 from django.contrib import admin
+from .models import Notification
+
 
-# Register your models here.
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    """Admin for Notification model."""
+    list_display = ['recipient', 'kind', 'target', 'actor', 'count', 'updated_at', 'read_at', 'emailed_at']
+    list_filter = ['kind', 'updated_at']
+    search_fields = ['recipient__username', 'target']
+    ordering = ['-updated_at']
+    readonly_fields = ['created_at', 'updated_at']
+    raw_id_fields = ['recipient', 'actor']
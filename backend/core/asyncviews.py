@@ -0,0 +1,135 @@
+"""
+Async read endpoints.
+
+DRF views are synchronous, so under daphne each DRF request is handed to a
+worker thread for its whole duration: authentication, queries,
+serialization and rendering. The hottest read endpoints (chat history,
+thread detail, the group list and the discovery feed) are instead plain
+async Django views wrapped in ``api_view``. It gives them what they need
+from DRF: JWT (or session) authentication through the user cache, DRF's
+error responses and JSON rendering. The view bodies use the async ORM and
+cache.
+
+``split_methods`` mounts such a view for GET and HEAD in front of the DRF
+view, which keeps serving writes, OPTIONS and the browsable API.
+
+In Django 5.2 the async ORM and cache APIs still run each backend call in
+a thread. What goes away is the per-request handoff: everything between
+those calls stays on the event loop, including local-tier cache hits.
+"""
+
+import functools
+from math import ceil
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import exception_handler
+
+from users.authentication import CachedJWTAuthentication
+
+_renderer = JSONRenderer()
+_jwt = CachedJWTAuthentication()
+
+
+def render(data, status=200):
+    """
+    A JSON response rendered like DRF's. ``.data`` is set as on a DRF
+    ``Response`` so tests can read it, but the response is already rendered,
+    so Django does not hand it to a thread to render.
+    """
+    response = HttpResponse(_renderer.render(data), content_type='application/json', status=status)
+    response.data = data
+    return response
+
+
+async def authenticate(request):
+    """The requesting user, or ``None``. JWT first, then the session."""
+    # APIClient.force_authenticate in tests, as DRF's Request honours it.
+    forced = getattr(request, '_force_auth_user', None)
+    if forced is not None:
+        return forced
+    authenticated = await _jwt.aauthenticate(request)
+    if authenticated is not None:
+        return authenticated[0]
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+def api_view(view):
+    """
+    Run async ``view(request, user, **kwargs)`` for authenticated users and
+    render its return value (data, or ``(data, status)``) as JSON.
+    """
+    @functools.wraps(view)
+    async def wrapped(request, *args, **kwargs):
+        try:
+            user = await authenticate(request)
+            if user is None:
+                raise NotAuthenticated()
+            result = await view(request, user, *args, **kwargs)
+        except Exception as exc:
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                exc.auth_header = _jwt.authenticate_header(request)
+            response = exception_handler(exc, {'request': request})
+            if response is None:
+                raise
+            rendered = render(response.data, response.status_code)
+            for header, value in response.items():
+                if header.lower() != 'content-type':
+                    rendered[header] = value
+            return rendered
+        data, status = result if isinstance(result, tuple) else (result, 200)
+        return render(data, status)
+
+    return wrapped
+
+
+def split_methods(async_get, view):
+    """Serve GET and HEAD with ``async_get`` and every other method with ``view``."""
+    fallback = sync_to_async(view)
+
+    @csrf_exempt
+    async def dispatch(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await async_get(request, *args, **kwargs)
+        return await fallback(request, *args, **kwargs)
+
+    return dispatch
+
+
+async def paginate_page_number(request, queryset, serializer_class):
+    """
+    One page of ``queryset`` in the shape of DRF's ``PageNumberPagination``
+    (``count``, ``next``, ``previous``, ``results``), read with the async ORM.
+    """
+    paginator = PageNumberPagination()
+    page_size = paginator.page_size
+    try:
+        number = int(request.GET.get(paginator.page_query_param, 1))
+    except ValueError:
+        raise NotFound(paginator.invalid_page_message)
+    count = await queryset.acount()
+    pages = max(1, ceil(count / page_size))
+    if not 1 <= number <= pages:
+        raise NotFound(paginator.invalid_page_message)
+
+    offset = (number - 1) * page_size
+    rows = [row async for row in queryset[offset:offset + page_size]]
+    url = request.build_absolute_uri()
+    if number == 1:
+        previous = None
+    elif number == 2:
+        previous = remove_query_param(url, paginator.page_query_param)
+    else:
+        previous = replace_query_param(url, paginator.page_query_param, number - 1)
+    return {
+        'count': count,
+        'next': replace_query_param(url, paginator.page_query_param, number + 1) if number < pages else None,
+        'previous': previous,
+        'results': serializer_class(rows, many=True).data,
+    }
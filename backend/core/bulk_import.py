@@ -0,0 +1,330 @@
+"""
+Bulk import of users, groups and group memberships.
+
+Input is CSV with a header row or JSON Lines. Rows are read one at a time
+and written in batches, so memory use stays flat however large the file is.
+Every row is validated first. Rejected rows go to a callback (the
+``bulk_import`` command writes them to a sidecar file), and the rest of the
+batch is inserted with conflicts ignored, so existing usernames, university
+emails and memberships are skipped. On PostgreSQL a batch is loaded with
+``COPY`` into a temporary table and moved over with ``INSERT ... ON CONFLICT
+DO NOTHING``. Other databases use ``bulk_create(ignore_conflicts=True)``.
+
+``COPY`` and ``bulk_create`` bypass model signals, so after each batch the
+importers refresh what those signals maintain: group tag postings, member
+counters and friend-in-group counts.
+"""
+
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection, models, transaction
+
+from core.counters import reconcile_counter
+from groups.discovery import index_group, refresh_friend_overlap
+from groups.models import Group, GroupMembership
+from users.models import FriendEdge, User
+
+
+COPY_NULL = '\\N'
+
+
+def read_rows(stream, fmt):
+    """
+    Yield ``(line_number, row)`` from a CSV or JSONL text stream.
+
+    CSV rows are dicts keyed by the header. A JSONL line that does not parse
+    is yielded as the raw string so it can be rejected with its line number.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, line
+
+
+def _text(row, name, errors, required=False, max_length=None):
+    value = row.get(name)
+    value = '' if value is None else str(value).strip()
+    if required and not value:
+        errors[name] = 'This field is required.'
+    elif max_length and len(value) > max_length:
+        errors[name] = f'Ensure this value has at most {max_length} characters.'
+    return value
+
+
+def _list(row, name, errors):
+    """A list field: a JSON array, or ``;``-separated values in CSV."""
+    value = row.get(name)
+    if value in (None, ''):
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(';') if item.strip()]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        errors[name] = 'Expected a list of strings.'
+        return []
+    return [item.strip() for item in value if item.strip()]
+
+
+def _max_length(model, name):
+    return model._meta.get_field(name).max_length
+
+
+class Importer:
+    """
+    Validates rows into unsaved model instances for one table.
+
+    ``prepare`` runs once per batch before ``clean`` so lookups can be
+    batched; ``clean`` returns an instance, ``None`` to skip the row, or
+    raises ``ValidationError``; ``finish`` runs after the batch is written.
+    """
+    model = None
+
+    def prepare(self, rows):
+        pass
+
+    def clean(self, row):
+        raise NotImplementedError
+
+    def finish(self, instances):
+        pass
+
+
+class UserImporter(Importer):
+    """
+    Students with ``username``, ``email`` and ``university_email``, plus
+    optional names, ``year_of_study``, ``graduation_year``, ``majors`` and
+    ``interests_hobbies``. Imported users get an unusable password and
+    verify and set one through the usual email flow.
+    """
+    model = User
+
+    def clean(self, row):
+        errors = {}
+        username = _text(row, 'username', errors, required=True, max_length=_max_length(User, 'username'))
+        if 'username' not in errors:
+            try:
+                User.username_validator(username)
+            except ValidationError as e:
+                errors['username'] = e.messages[0]
+        emails = {}
+        for name in ('email', 'university_email'):
+            emails[name] = _text(row, name, errors, required=True, max_length=_max_length(User, name))
+            if name not in errors:
+                try:
+                    validate_email(emails[name])
+                except ValidationError as e:
+                    errors[name] = e.messages[0]
+
+        graduation_year = _text(row, 'graduation_year', errors)
+        if graduation_year:
+            try:
+                graduation_year = int(graduation_year)
+            except ValueError:
+                errors['graduation_year'] = 'Enter a whole number.'
+        user = User(
+            username=username,
+            email=emails['email'],
+            university_email=emails['university_email'],
+            first_name=_text(row, 'first_name', errors, max_length=_max_length(User, 'first_name')),
+            last_name=_text(row, 'last_name', errors, max_length=_max_length(User, 'last_name')),
+            year_of_study=_text(row, 'year_of_study', errors, max_length=_max_length(User, 'year_of_study')),
+            graduation_year=graduation_year or None,
+            majors=_list(row, 'majors', errors),
+            interests_hobbies=_list(row, 'interests_hobbies', errors),
+            password=make_password(None),
+        )
+        if errors:
+            raise ValidationError(errors)
+        return user
+
+
+class GroupImporter(Importer):
+    """
+    Groups with ``name`` and ``category`` (one of ``Group.CATEGORY_CHOICES``)
+    plus optional ``description`` and ``tags``. Group names are not unique
+    in the schema, so rows naming an existing group are skipped.
+    """
+    model = Group
+    categories = {value for value, _ in Group.CATEGORY_CHOICES}
+
+    def prepare(self, rows):
+        names = {str(row.get('name') or '').strip() for row in rows}
+        self.seen = set(Group.objects.filter(name__in=names).values_list('name', flat=True))
+
+    def clean(self, row):
+        errors = {}
+        name = _text(row, 'name', errors, required=True, max_length=_max_length(Group, 'name'))
+        category = _text(row, 'category', errors, required=True)
+        if category and category not in self.categories:
+            errors['category'] = f'"{category}" is not a valid choice.'
+        group = Group(
+            name=name,
+            category=category,
+            description=_text(row, 'description', errors),
+            tags=_list(row, 'tags', errors),
+        )
+        if errors:
+            raise ValidationError(errors)
+        if name in self.seen:
+            return None
+        self.seen.add(name)
+        return group
+
+    def finish(self, instances):
+        names = [group.name for group in instances]
+        for group in Group.objects.filter(name__in=names):
+            index_group(group)
+
+
+class MembershipImporter(Importer):
+    """Memberships naming a user by ``username`` and a group by ``group`` name."""
+    model = GroupMembership
+
+    def prepare(self, rows):
+        usernames = {str(row.get('username') or '').strip() for row in rows}
+        names = {str(row.get('group') or '').strip() for row in rows}
+        self.users = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+        self.groups = {}
+        for name, pk in Group.objects.filter(name__in=names).values_list('name', 'pk'):
+            self.groups.setdefault(name, []).append(pk)
+
+    def clean(self, row):
+        errors = {}
+        username = _text(row, 'username', errors, required=True)
+        name = _text(row, 'group', errors, required=True)
+        if username and username not in self.users:
+            errors['username'] = 'No such user.'
+        if name and len(self.groups.get(name, [])) != 1:
+            errors['group'] = 'No such group.' if name not in self.groups else 'Group name is ambiguous.'
+        if errors:
+            raise ValidationError(errors)
+        return GroupMembership(user_id=self.users[username], group_id=self.groups[name][0])
+
+    def finish(self, instances):
+        group_ids = {membership.group_id for membership in instances}
+        user_ids = {membership.user_id for membership in instances}
+        reconcile_counter(Group, 'member_count', GroupMembership, 'group', pks=group_ids)
+        friends = FriendEdge.objects.filter(user_id__in=user_ids).values_list('friend_id', flat=True)
+        refresh_friend_overlap(set(friends), group_ids)
+
+
+IMPORTERS = {
+    'users': UserImporter,
+    'groups': GroupImporter,
+    'memberships': MembershipImporter,
+}
+
+
+def _copy_value(field, value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(field, models.JSONField):
+        return json.dumps(value, cls=field.encoder)
+    return field.get_db_prep_save(value, connection)
+
+
+def copy_insert(model, instances):
+    """
+    Insert ``instances`` through ``COPY`` and a temporary table, skipping
+    rows that conflict with existing ones. PostgreSQL only. Returns the
+    number of rows inserted.
+    """
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    table = connection.ops.quote_name(model._meta.db_table)
+    temp = connection.ops.quote_name(f'import_{model._meta.db_table}')
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for instance in instances:
+        writer.writerow([_copy_value(field, field.pre_save(instance, True)) for field in fields])
+    buffer.seek(0)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TEMPORARY TABLE {temp} AS SELECT {columns} FROM {table} WITH NO DATA')
+        cursor.copy_expert(f"COPY {temp} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer)
+        cursor.execute(f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {temp} ON CONFLICT DO NOTHING')
+        inserted = cursor.rowcount
+        cursor.execute(f'DROP TABLE {temp}')
+    return inserted
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.accepted = 0
+        self.skipped = 0
+        self.rejected = 0
+        # Known only when loading through COPY.
+        self.inserted = None
+        self.started = time.perf_counter()
+
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+def import_rows(importer, rows, batch_size=1000, reject=None, use_copy=None, progress=None):
+    """
+    Validate and insert ``(line_number, row)`` pairs in batches of
+    ``batch_size``. Rejected rows are passed to ``reject(line_number, row,
+    errors)``; ``progress(stats)`` is called after every batch. ``use_copy``
+    defaults to whether the database is PostgreSQL.
+    """
+    if use_copy is None:
+        use_copy = connection.vendor == 'postgresql'
+    stats = ImportStats()
+    if use_copy:
+        stats.inserted = 0
+    rows = iter(rows)
+
+    while batch := list(islice(rows, batch_size)):
+        stats.read += len(batch)
+        importer.prepare([row for _, row in batch if isinstance(row, dict)])
+        instances = []
+        for line_number, row in batch:
+            try:
+                if not isinstance(row, dict):
+                    raise ValidationError('Row is not an object.')
+                instance = importer.clean(row)
+            except ValidationError as e:
+                stats.rejected += 1
+                if reject is not None:
+                    reject(line_number, row, e.message_dict if hasattr(e, 'error_dict') else e.messages)
+                continue
+            if instance is None:
+                stats.skipped += 1
+            else:
+                instances.append(instance)
+
+        if instances:
+            with transaction.atomic():
+                if use_copy:
+                    stats.inserted += copy_insert(importer.model, instances)
+                else:
+                    importer.model.objects.bulk_create(instances, ignore_conflicts=True)
+                importer.finish(instances)
+        stats.accepted += len(instances)
+        if progress is not None:
+            progress(stats)
+
+    return stats
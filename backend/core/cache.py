@@ -0,0 +1,138 @@
+"""
+Two-tier read-through cache.
+
+``TwoTierCache`` keeps recently used entries in a small in-process LRU with
+a short TTL, in front of the shared Django cache (Redis in production).
+Misses in both tiers are loaded in one batch by the cache's ``loader`` and
+written back to both. Writers call ``invalidate``, which drops the keys from
+the shared tier and this process's LRU; other processes see the change once
+their local entry expires (``local_ttl`` seconds), so keep it short.
+
+Entries are stored pickled in the local tier too, so every reader gets its
+own copy and mutating a returned object never leaks into the cache.
+
+``aget``/``aget_many`` are the same lookups for async views: local hits
+are served on the event loop, the shared tier is read with the async cache
+API and misses go to ``aloader`` (``loader`` in a thread if not given).
+"""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache as shared_cache
+
+
+class LocalLRU:
+    """Thread-safe LRU mapping with a per-entry time-to-live."""
+
+    def __init__(self, maxsize=10000, ttl=5):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = entry[1]
+        return found
+
+    def set_many(self, mapping):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = (expires, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class TwoTierCache:
+    """
+    Read-through cache for objects identified by an id.
+
+    ``loader(ids)`` must return ``{id: value}`` for the ids that exist;
+    missing ids are not cached. ``aloader`` is its coroutine counterpart.
+    """
+
+    def __init__(self, namespace, loader, local_ttl=5, shared_ttl=300, maxsize=10000, aloader=None):
+        self.namespace = namespace
+        self.loader = loader
+        self.aloader = aloader or sync_to_async(loader)
+        self.shared_ttl = shared_ttl
+        self.local = LocalLRU(maxsize=maxsize, ttl=local_ttl)
+
+    def key(self, id):
+        return f'{self.namespace}:{id}'
+
+    def get(self, id):
+        return self.get_many([id]).get(id)
+
+    def get_many(self, ids):
+        """Return ``{id: value}`` for every id that exists."""
+        keys = {self.key(id): id for id in ids}
+        blobs = self.local.get_many(keys)
+
+        missing = [key for key in keys if key not in blobs]
+        if missing:
+            shared = shared_cache.get_many(missing)
+            blobs.update(shared)
+            self.local.set_many(shared)
+
+        unloaded = [keys[key] for key in keys if key not in blobs]
+        if unloaded:
+            loaded = {self.key(id): pickle.dumps(value) for id, value in self.loader(unloaded).items()}
+            shared_cache.set_many(loaded, timeout=self.shared_ttl)
+            self.local.set_many(loaded)
+            blobs.update(loaded)
+
+        return {keys[key]: pickle.loads(blob) for key, blob in blobs.items()}
+
+    async def aget(self, id):
+        return (await self.aget_many([id])).get(id)
+
+    async def aget_many(self, ids):
+        """``get_many`` for async code."""
+        keys = {self.key(id): id for id in ids}
+        blobs = self.local.get_many(keys)
+
+        missing = [key for key in keys if key not in blobs]
+        if missing:
+            shared = await shared_cache.aget_many(missing)
+            blobs.update(shared)
+            self.local.set_many(shared)
+
+        unloaded = [keys[key] for key in keys if key not in blobs]
+        if unloaded:
+            loaded = {self.key(id): pickle.dumps(value) for id, value in (await self.aloader(unloaded)).items()}
+            await shared_cache.aset_many(loaded, timeout=self.shared_ttl)
+            self.local.set_many(loaded)
+            blobs.update(loaded)
+
+        return {keys[key]: pickle.loads(blob) for key, blob in blobs.items()}
+
+    def invalidate(self, *ids):
+        keys = [self.key(id) for id in ids]
+        self.local.delete_many(keys)
+        shared_cache.delete_many(keys)
@@ -0,0 +1,48 @@
+"""
+Denormalized counter columns.
+
+Counts shown on list pages (group members, thread replies, chat messages) are
+stored on the parent row and adjusted with ``F()`` updates from signal
+handlers, so they change in the same transaction as the child row and never
+need a ``COUNT(*)`` per parent. ``reconcile_counter`` recomputes a counter
+from the child table in bulk to repair any drift, e.g. after raw SQL or
+``bulk_create`` writes that bypass signals.
+"""
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def adjust_counter(model, pk, field, delta):
+    """Atomically add ``delta`` to ``model.field`` for row ``pk``, never below zero."""
+    if delta:
+        model.objects.filter(pk=pk).update(**{field: Greatest(F(field) + delta, Value(0))})
+
+
+def reconcile_counter(model, field, child_model, fk_name, dry_run=False, batch_size=1000, pks=None):
+    """
+    Recompute ``model.field`` as the number of ``child_model`` rows pointing
+    at each row through ``fk_name``, or only at the rows in ``pks``.
+
+    Only rows whose stored value is wrong are written. Returns the number of
+    rows that were (or, with ``dry_run``, would be) repaired.
+    """
+    actual = Coalesce(
+        Subquery(
+            child_model.objects
+            .filter(**{fk_name: OuterRef('pk')})
+            .order_by()
+            .values(fk_name)
+            .annotate(n=Count('pk'))
+            .values('n'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+    rows = model.objects.all() if pks is None else model.objects.filter(pk__in=pks)
+    drifted = rows.annotate(actual=actual).filter(~Q(**{field: F('actual')}))
+    pks = list(drifted.values_list('pk', flat=True))
+    if not dry_run:
+        for start in range(0, len(pks), batch_size):
+            model.objects.filter(pk__in=pks[start:start + batch_size]).update(**{field: actual})
+    return len(pks)
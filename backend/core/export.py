@@ -0,0 +1,186 @@
+"""
+Streaming NDJSON exports.
+
+An export is a generator of records, one JSON object per line, read from
+each table with ``.values(...).iterator(chunk_size=...)``. That uses a
+server-side cursor on PostgreSQL, so at most one chunk of rows is held in
+memory at a time. ``ndjson`` and ``gzip_stream`` encode the records
+incrementally. The result is either returned as a ``StreamingHttpResponse``
+(``streaming_export``) or uploaded to the S3-compatible store by the
+``core.tasks.upload_export`` task (``upload_to_s3``), which sends it as a
+multipart upload without buffering the whole file.
+
+Exports are named in ``EXPORTS``:
+
+- ``user``: a user's profile, threads, replies, messages, friendships and
+  the moderation log entries they made or were the target of (data
+  requests).
+- ``moderation``: moderation log entries, optionally for one group and a
+  date range (audits).
+"""
+
+import io
+import json
+import zlib
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+from forums.models import Reply, Thread
+from messaging.models import Message
+from moderation.models import ModerationLog
+from users.models import Friendship, User
+
+EXPORT_CHUNK_SIZE = 2000
+# Encoded lines are sent in pieces of about this many bytes.
+WRITE_BUFFER_SIZE = 64 * 1024
+
+_MODERATION_FIELDS = [
+    'id', 'moderator_id', 'action', 'group_id', 'thread_id', 'reply_id', 'target_user_id',
+    'reason', 'metadata', 'created_at',
+]
+
+
+def _rows(record_type, queryset, fields, chunk_size):
+    for row in queryset.order_by('pk').values(*fields).iterator(chunk_size=chunk_size):
+        row['type'] = record_type
+        yield row
+
+
+def user_records(user_id, chunk_size=EXPORT_CHUNK_SIZE):
+    """Everything stored about ``user_id``, one section after another."""
+    yield from _rows('profile', User.objects.filter(pk=user_id), [
+        'id', 'username', 'email', 'university_email', 'first_name', 'last_name', 'verified_at',
+        'onboarding_completed', 'majors', 'interests_hobbies', 'year_of_study', 'graduation_year',
+        'privacy_settings', 'date_joined', 'last_login',
+    ], chunk_size)
+    yield from _rows('thread', Thread.objects.filter(author_id=user_id), [
+        'id', 'group_id', 'title', 'content', 'content_type', 'attachments', 'pinned', 'locked',
+        'created_at', 'updated_at',
+    ], chunk_size)
+    yield from _rows('reply', Reply.objects.filter(author_id=user_id), [
+        'id', 'thread_id', 'content', 'content_type', 'attachments', 'created_at', 'updated_at',
+    ], chunk_size)
+    yield from _rows('message', Message.objects.filter(author_id=user_id), [
+        'id', 'chat_id', 'content', 'created_at',
+    ], chunk_size)
+    yield from _rows('friendship', Friendship.objects.filter(Q(user1_id=user_id) | Q(user2_id=user_id)), [
+        'id', 'user1_id', 'user2_id', 'created_at',
+    ], chunk_size)
+    yield from _rows(
+        'moderation_log',
+        ModerationLog.objects.filter(Q(moderator_id=user_id) | Q(target_user_id=user_id)),
+        _MODERATION_FIELDS, chunk_size,
+    )
+
+
+def moderation_records(group_id=None, since=None, until=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Moderation log entries, optionally for one group and a date range."""
+    logs = ModerationLog.objects.all()
+    if group_id is not None:
+        logs = logs.filter(group_id=group_id)
+    if since is not None:
+        logs = logs.filter(created_at__gte=since)
+    if until is not None:
+        logs = logs.filter(created_at__lt=until)
+    yield from _rows('moderation_log', logs, _MODERATION_FIELDS, chunk_size)
+
+
+EXPORTS = {
+    'user': user_records,
+    'moderation': moderation_records,
+}
+
+
+def ndjson(records):
+    """Encode ``records`` as UTF-8 JSON lines, in pieces of ``WRITE_BUFFER_SIZE``."""
+    buffer = []
+    size = 0
+    for record in records:
+        line = (json.dumps(record, cls=DjangoJSONEncoder) + '\n').encode()
+        buffer.append(line)
+        size += len(line)
+        if size >= WRITE_BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzip_stream(chunks, level=6):
+    """Gzip a stream of byte strings incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def encode(records, compress=False):
+    chunks = ndjson(records)
+    return gzip_stream(chunks) if compress else chunks
+
+
+def streaming_export(records, filename, compress=False):
+    """A download response that encodes ``records`` as they are read."""
+    if compress:
+        filename += '.gz'
+    response = StreamingHttpResponse(
+        encode(records, compress),
+        content_type='application/gzip' if compress else 'application/x-ndjson',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class IteratorReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte strings."""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            try:
+                self.pending = next(self.chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def s3_client():
+    return boto3.client(
+        's3',
+        endpoint_url=settings.EXPORT_S3_ENDPOINT_URL or None,
+        aws_access_key_id=settings.EXPORT_S3_ACCESS_KEY_ID or None,
+        aws_secret_access_key=settings.EXPORT_S3_SECRET_ACCESS_KEY or None,
+    )
+
+
+def upload_to_s3(records, key, compress=True, client=None):
+    """
+    Stream ``records`` into ``EXPORT_S3_BUCKET`` under ``key``. boto3 sends
+    it as a multipart upload; without transfer threads it reads and sends
+    one part at a time from the encoder.
+    """
+    client = client or s3_client()
+    body = io.BufferedReader(IteratorReader(encode(records, compress)), buffer_size=1024 * 1024)
+    client.upload_fileobj(
+        body, settings.EXPORT_S3_BUCKET, key,
+        ExtraArgs={'ContentType': 'application/gzip' if compress else 'application/x-ndjson'},
+        Config=TransferConfig(use_threads=False),
+    )
+    return key
@@ -0,0 +1,82 @@
+"""
+Import users, groups or group memberships from a CSV or JSONL file.
+"""
+
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk_import import IMPORTERS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream users, groups or memberships from CSV/JSONL into the database in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS), help='What the file contains.')
+        parser.add_argument('path', help='Input file, or - for stdin.')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='Input format (default: from the file extension, jsonl for stdin).'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows validated and inserted per batch (default: 1000).'
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Where to write rejected rows as JSONL (default: <path>.rejected.jsonl).'
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Use bulk_create even on PostgreSQL instead of COPY.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        rejects_path = options['rejects'] or ('rejected.jsonl' if path == '-' else f'{path}.rejected.jsonl')
+        rejects = None
+
+        def reject(line_number, row, errors):
+            nonlocal rejects
+            if rejects is None:
+                rejects = open(rejects_path, 'w', encoding='utf-8')
+            rejects.write(json.dumps({'line': line_number, 'row': row, 'errors': errors}) + '\n')
+
+        def progress(stats):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{stats.read} rows, {stats.rows_per_second:.0f} rows/s')
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+        try:
+            stats = import_rows(
+                IMPORTERS[options['kind']](),
+                read_rows(stream, fmt),
+                batch_size=options['batch_size'],
+                reject=reject,
+                use_copy=False if options['no_copy'] else None,
+                progress=progress,
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if rejects is not None:
+                rejects.close()
+
+        inserted = '' if stats.inserted is None else f', {stats.inserted} inserted'
+        self.stdout.write(self.style.SUCCESS(
+            f'Read {stats.read} {options["kind"]} rows in {stats.seconds:.1f}s '
+            f'({stats.rows_per_second:.0f} rows/s): {stats.accepted} accepted{inserted}, '
+            f'{stats.skipped} skipped, {stats.rejected} rejected.'
+        ))
+        if rejects is not None:
+            self.stdout.write(self.style.WARNING(f'Rejected rows written to {rejects_path}.'))
@@ -0,0 +1,41 @@
+"""
+Repair drift in the denormalized counter columns.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile_counter
+from forums.models import Reply, Thread
+from groups.models import Group, GroupMembership
+from messaging.models import ChatParticipant, Message, PrivateChat
+
+
+# (model, counter field, child model, child foreign key)
+COUNTERS = [
+    (Group, 'member_count', GroupMembership, 'group'),
+    (Thread, 'reply_count', Reply, 'thread'),
+    (PrivateChat, 'participant_count', ChatParticipant, 'chat'),
+    (PrivateChat, 'message_count', Message, 'chat'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Recompute member, reply, participant and message counters from the source tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted rows without writing.'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        total = 0
+        for model, field, child_model, fk_name in COUNTERS:
+            drifted = reconcile_counter(model, field, child_model, fk_name, dry_run=dry_run)
+            total += drifted
+            self.stdout.write(f'{model.__name__}.{field}: {drifted} drifted')
+
+        verb = 'Found' if dry_run else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {total} drifted counters.'))
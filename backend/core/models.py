@@ -1,3 +1,57 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class Notification(models.Model):
+    """
+    A notification for one recipient, written by ``core.notifications``.
+
+    Events of the same ``kind`` on the same ``target`` are coalesced into
+    one row while it is unread, not yet emailed and younger than
+    ``NOTIFICATION_COALESCE_WINDOW``: ``count`` grows and ``actor`` and
+    ``data`` describe the latest event.
+    """
+    KIND_CHOICES = [
+        ('reply', 'Reply'),
+        ('mention', 'Mention'),
+        ('friend_request', 'Friend Request'),
+        ('moderation', 'Moderation'),
+    ]
+
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notifications'
+    )
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    # What the notification is about, as ``<type>:<id>`` (e.g. ``thread:12``).
+    target = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=1)
+    data = models.JSONField(default=dict, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    emailed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'notifications'
+        ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['recipient', '-updated_at']),
+            models.Index(
+                fields=['recipient', 'kind', 'target'],
+                condition=models.Q(read_at__isnull=True, emailed_at__isnull=True),
+                name='notifications_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} on {self.target} for {self.recipient_id} (x{self.count})"
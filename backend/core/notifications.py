@@ -0,0 +1,163 @@
+"""
+Notification fan-out.
+
+Producers (model signals for replies, mentions, friend requests and
+moderation actions) call ``notify`` or ``notify_mentions``, which only
+enqueue a Celery task once the surrounding transaction commits, so a
+request never writes notification rows itself. The task, ``fan_out``:
+
+1. Coalesces into each recipient's pending notification of the same kind
+   on the same target within ``NOTIFICATION_COALESCE_WINDOW``. One UPDATE
+   bumps ``count`` for all of them, so five replies to a thread read as
+   "5 new replies" rather than five rows.
+2. ``bulk_create``s a row for every other recipient.
+3. Pushes the resulting notification to recipients who are online, over
+   their presence sockets (``users.consumers``).
+
+Recipients who are offline are caught by ``send_digests``, which Celery
+beat runs every ``NOTIFICATION_DIGEST_HOURS``: one email per user with
+everything unread that has not been emailed yet.
+"""
+
+import json
+import re
+from datetime import timedelta
+from itertools import groupby
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from moderation.models import ModerationLog
+from users.consumers import presence_group_name
+from users.presence import online
+from .models import Notification
+
+MENTION_PATTERN = re.compile(r'(?<![\w@])@([\w.+-]*\w)')
+
+
+def notify(kind, recipient_ids, target, actor_id=None, data=None):
+    """Queue a ``kind`` notification about ``target`` for ``recipient_ids``."""
+    from . import tasks
+
+    recipients = sorted(set(recipient_ids) - {actor_id, None})
+    if recipients:
+        transaction.on_commit(lambda: tasks.fan_out_notification.delay(kind, recipients, target, actor_id, data))
+
+
+def mentioned_usernames(content):
+    return sorted(set(MENTION_PATTERN.findall(content or '')))
+
+
+def notify_mentions(content, group_id, target, actor_id=None, data=None):
+    """Queue mention notifications for the group members ``@named`` in ``content``."""
+    from . import tasks
+
+    usernames = mentioned_usernames(content)
+    if usernames:
+        transaction.on_commit(
+            lambda: tasks.notify_group_mentions.delay(usernames, group_id, target, actor_id, data)
+        )
+
+
+def serialize(notification):
+    return {
+        'id': notification.pk,
+        'kind': notification.kind,
+        'target': notification.target,
+        'actor': notification.actor_id,
+        'count': notification.count,
+        'data': notification.data,
+        'created_at': notification.created_at,
+        'updated_at': notification.updated_at,
+        'read_at': notification.read_at,
+    }
+
+
+def fan_out(kind, recipient_ids, target, actor_id=None, data=None):
+    """Write and deliver one event for every recipient. Returns how many rows were created."""
+    data = data or {}
+    now = timezone.now()
+    window = timedelta(seconds=getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 3600))
+    pending = Notification.objects.filter(
+        kind=kind, target=target, read_at__isnull=True, emailed_at__isnull=True
+    )
+    with transaction.atomic():
+        coalesce = pending.filter(recipient_id__in=recipient_ids, updated_at__gte=now - window)
+        coalesced = set(coalesce.values_list('recipient_id', flat=True))
+        coalesce.update(count=F('count') + 1, actor_id=actor_id, data=data, updated_at=now)
+        created = Notification.objects.bulk_create([
+            Notification(recipient_id=recipient_id, kind=kind, target=target, actor_id=actor_id, data=data)
+            for recipient_id in recipient_ids if recipient_id not in coalesced
+        ], batch_size=1000)
+
+    deliver(pending, recipient_ids)
+    return len(created)
+
+
+def deliver(pending, recipient_ids):
+    """Push the newest of ``pending`` to each online recipient's sockets."""
+    connected = async_to_sync(online)(recipient_ids)
+    if not connected:
+        return
+    layer = get_channel_layer()
+    rows = pending.filter(recipient_id__in=connected).order_by('recipient_id', '-updated_at')
+    for recipient_id, notifications in groupby(rows, key=lambda n: n.recipient_id):
+        text = json.dumps({'type': 'notification', 'notification': serialize(next(notifications))},
+                          cls=DjangoJSONEncoder)
+        async_to_sync(layer.group_send)(presence_group_name(recipient_id), {
+            'type': 'notification.event',
+            'text': text,
+        })
+
+
+def describe(notification):
+    """One line of digest text for ``notification``."""
+    data = notification.data
+    count = notification.count
+    if notification.kind == 'reply':
+        return f'{count} new {"reply" if count == 1 else "replies"} to "{data.get("title", "your thread")}"'
+    if notification.kind == 'mention':
+        return f'Mentioned {count} {"time" if count == 1 else "times"} in "{data.get("title", "a thread")}"'
+    if notification.kind == 'friend_request':
+        return f'Friend request from {data.get("username", "someone")}'
+    actions = dict(ModerationLog.ACTION_CHOICES)
+    return f'A moderator acted on your account: {actions.get(data.get("action"), "moderation action")}'
+
+
+def send_digests(batch_size=500):
+    """
+    Email each offline user their unread, not yet emailed notifications.
+    Returns the number of emails sent.
+    """
+    pending = Notification.objects.filter(read_at__isnull=True, emailed_at__isnull=True)
+    recipients = set(pending.values_list('recipient_id', flat=True).distinct())
+    offline = sorted(recipients - async_to_sync(online)(recipients))
+    sent = 0
+    with get_connection() as connection:
+        for start in range(0, len(offline), batch_size):
+            rows = (
+                pending.filter(recipient_id__in=offline[start:start + batch_size])
+                .select_related('recipient').order_by('recipient_id', '-updated_at')
+            )
+            messages, emailed = [], []
+            for _, notifications in groupby(rows, key=lambda n: n.recipient_id):
+                notifications = list(notifications)
+                recipient = notifications[0].recipient
+                emailed.extend(n.pk for n in notifications)
+                if not recipient.email:
+                    continue
+                count = len(notifications)
+                messages.append(EmailMessage(
+                    subject=f'You have {count} new notification{"" if count == 1 else "s"} on DawgPound',
+                    body='\n'.join(f'- {describe(n)}' for n in notifications),
+                    to=[recipient.email],
+                ))
+            sent += connection.send_messages(messages) or 0
+            Notification.objects.filter(pk__in=emailed).update(emailed_at=timezone.now())
+    return sent
@@ -0,0 +1,239 @@
+"""
+Keyset (cursor) pagination for DawgPound.
+
+Long histories such as chat messages and forum replies are paged by seeking
+on a composite ``(created_at, id)`` key instead of using OFFSET, so fetching
+a page deep in the history costs the same as fetching the first one. Each
+page can be walked in both directions ("load older" / "load newer").
+"""
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from urllib import parse
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+BEFORE = 'b'
+AFTER = 'a'
+
+
+class KeysetPagination(BasePagination):
+    """
+    Bidirectional keyset paginator over a ``(created_at, id)`` ordering.
+
+    The queryset handed to ``paginate_queryset`` should already be scoped to
+    the parent object (a chat or a thread) so the range condition lands on the
+    ``(parent, created_at)`` index. Pages are returned in chronological order,
+    or newest first with ``newest_first``; either way ``previous`` points at
+    older rows and ``next`` at newer rows.
+    Query parameters are read from ``request.GET`` so async views can page
+    plain Django requests with ``apaginate_queryset``.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering_field = 'created_at'
+    # 'latest' starts on the newest page (chat history), 'earliest' on the
+    # oldest page (reading a thread top-down).
+    start_from = 'latest'
+    # Order rows within a page newest first (thread lists) instead of
+    # oldest first (histories).
+    newest_first = False
+    # When paging backwards, look only this far (a timedelta) behind the
+    # cursor first and read further back only if that does not fill the
+    # page, so recent pages stay within the newest index range or table
+    # partitions. ``None`` seeks without a lower bound.
+    seek_window = None
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, direction, key = self.seek(queryset, request)
+        return self.finish_page(self.fetch(queryset, direction, key), direction, key)
+
+    async def apaginate_queryset(self, queryset, request):
+        """``paginate_queryset`` for async views, reading with the async ORM."""
+        queryset, direction, key = self.seek(queryset, request)
+        return self.finish_page(await self.afetch(queryset, direction, key), direction, key)
+
+    def seek(self, queryset, request):
+        """Return ``queryset`` narrowed and ordered past the request's cursor."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        direction, key = self.decode_cursor(request)
+
+        if direction is None:
+            direction = BEFORE if self.start_from == 'latest' else AFTER
+        elif direction == BEFORE:
+            created_at, pk = key
+            # Keep the range condition on ``created_at`` alone so it can be
+            # served from the index; ties are trimmed by the cheap exclude.
+            queryset = queryset.filter(**{f'{self.ordering_field}__lte': created_at}).exclude(
+                **{self.ordering_field: created_at, 'pk__gte': pk}
+            )
+        else:
+            created_at, pk = key
+            queryset = queryset.filter(**{f'{self.ordering_field}__gte': created_at}).exclude(
+                **{self.ordering_field: created_at, 'pk__lte': pk}
+            )
+
+        if direction == BEFORE:
+            ordering = (f'-{self.ordering_field}', '-pk')
+        else:
+            ordering = (self.ordering_field, 'pk')
+        return queryset.order_by(*ordering), direction, key
+
+    def finish_page(self, rows, direction, key):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        # Rows come back ordered away from the cursor.
+        if (direction == BEFORE) != self.newest_first:
+            rows.reverse()
+
+        # Moving in one direction means there is at least the page we came
+        # from on the other side.
+        came_from_cursor = key is not None
+        if direction == BEFORE:
+            self.has_older, self.has_newer = has_more, came_from_cursor
+        else:
+            self.has_older, self.has_newer = came_from_cursor, has_more
+
+        self.page = rows
+        return rows
+
+    def fetch(self, queryset, direction, key):
+        """Up to ``page_size + 1`` rows of the ordered ``queryset``."""
+        limit = self.page_size + 1
+        if direction != BEFORE or self.seek_window is None:
+            return list(queryset[:limit])
+        since = (key[0] if key else timezone.now()) - self.seek_window
+        rows = list(queryset.filter(**{f'{self.ordering_field}__gte': since})[:limit])
+        if len(rows) < limit:
+            rows += queryset.filter(**{f'{self.ordering_field}__lt': since})[:limit - len(rows)]
+        return rows
+
+    async def afetch(self, queryset, direction, key):
+        limit = self.page_size + 1
+        if direction != BEFORE or self.seek_window is None:
+            return [row async for row in queryset[:limit]]
+        since = (key[0] if key else timezone.now()) - self.seek_window
+        rows = [row async for row in queryset.filter(**{f'{self.ordering_field}__gte': since})[:limit]]
+        if len(rows) < limit:
+            rows += [
+                row async for row in queryset.filter(**{f'{self.ordering_field}__lt': since})[:limit - len(rows)]
+            ]
+        return rows
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.GET[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def decode_cursor(self, request):
+        """
+        Return ``(direction, (created_at, pk))`` for the request's cursor, or
+        ``(None, None)`` when no cursor was supplied.
+        """
+        encoded = request.GET.get(self.cursor_query_param)
+        if encoded is None:
+            return None, None
+
+        try:
+            querystring = urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            direction = tokens['d'][0]
+            created_at = parse_datetime(tokens['t'][0])
+            pk = int(tokens['i'][0])
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if direction not in (BEFORE, AFTER) or created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return direction, (created_at, pk)
+
+    def encode_cursor(self, direction, instance):
+        """Return the current URL with a cursor pointing past ``instance``."""
+        tokens = {
+            'd': direction,
+            't': getattr(instance, self.ordering_field).isoformat(),
+            'i': str(instance.pk),
+        }
+        querystring = parse.urlencode(tokens)
+        encoded = urlsafe_b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        """Link to the next page of newer rows."""
+        if not self.has_newer:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(AFTER, self.page[0 if self.newest_first else -1])
+
+    def get_previous_link(self):
+        """Link to the previous page of older rows."""
+        if not self.has_older:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(BEFORE, self.page[-1 if self.newest_first else 0])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'previous': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
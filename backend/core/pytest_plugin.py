@@ -0,0 +1,48 @@
+"""
+Pytest plugin enforcing per-endpoint query budgets.
+
+Mark a test with ``@pytest.mark.query_budget(n)`` to fail it when any HTTP
+request or Channels consumer message it makes runs more than ``n`` queries.
+The failure lists the most repeated statements, which usually point at the
+N+1 (e.g. a ``.count()`` per row).
+"""
+
+import pytest
+
+from core.querycount import add_listener, remove_listener
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(max_queries): fail if any request or consumer message exceeds max_queries queries'
+    )
+
+
+@pytest.fixture(autouse=True)
+def _enforce_query_budget(request):
+    marker = request.node.get_closest_marker('query_budget')
+    if marker is None:
+        yield
+        return
+
+    budget = marker.args[0]
+    over = []
+
+    def check(recorder):
+        if recorder.count > budget:
+            over.append(recorder)
+
+    add_listener(check)
+    try:
+        yield
+    finally:
+        remove_listener(check)
+
+    if over:
+        lines = []
+        for recorder in over:
+            lines.append(f'{recorder.kind} {recorder.endpoint}: {recorder.count} queries (budget {budget})')
+            repeated = sorted(recorder.duplicates.items(), key=lambda item: -item[1])[:3]
+            lines.extend(f'    {n}x {sql}' for sql, n in repeated)
+        pytest.fail('Query budget exceeded:\n' + '\n'.join(lines), pytrace=False)
@@ -0,0 +1,181 @@
+"""
+ORM cost instrumentation.
+
+Every database connection gets an execute wrapper (installed from
+``CoreConfig.ready``) that reports to the ``QueryRecorder`` active in the
+current context, if any. The recorder lives in a ``ContextVar``, so queries
+run through ``sync_to_async``/``database_sync_to_async`` threads are
+attributed to the request or consumer message that started them.
+
+``QueryBudgetMiddleware`` and ``QueryBudgetConsumerMixin`` record one
+request or WebSocket message at a time, export the totals as Prometheus
+metrics and log likely N+1 patterns: the same SQL statement executed
+``QUERY_DUPLICATE_THRESHOLD`` or more times.
+"""
+
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('query_recorder', default=None)
+_listeners = []
+
+QUERY_COUNT = Histogram(
+    'dawgpound_db_queries',
+    'Database queries per request or consumer message.',
+    ['kind', 'endpoint'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+QUERY_TIME = Histogram(
+    'dawgpound_db_query_seconds',
+    'Total database time per request or consumer message.',
+    ['kind', 'endpoint'],
+)
+DUPLICATE_QUERIES = Histogram(
+    'dawgpound_db_duplicate_queries',
+    'Repeated executions of an identical statement per request or consumer message.',
+    ['kind', 'endpoint'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+def query_signature(sql):
+    """Normalize ``sql`` so repeats differing only in ``IN`` list length match."""
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """Query count, DB time and per-statement counts for one unit of work."""
+
+    def __init__(self, kind, endpoint=''):
+        self.kind = kind
+        self.endpoint = endpoint
+        self.count = 0
+        self.duration = 0.0
+        self.signatures = Counter()
+
+    def record(self, sql, duration):
+        self.count += 1
+        self.duration += duration
+        self.signatures[query_signature(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """``{signature: executions}`` for statements run more than once."""
+        return {sql: n for sql, n in self.signatures.items() if n > 1}
+
+    def duplicate_count(self):
+        return sum(n - 1 for n in self.signatures.values() if n > 1)
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    recorder = _current.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.record(sql, time.perf_counter() - started)
+
+
+def install_wrapper(sender=None, connection=None, **kwargs):
+    """``connection_created`` handler adding ``execute_wrapper`` once per connection."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+def add_listener(listener):
+    """Call ``listener(recorder)`` after every recorded request or message."""
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    _listeners.remove(listener)
+
+
+@contextmanager
+def record_queries(kind, endpoint=''):
+    """Record the queries run inside the block, then publish the totals."""
+    recorder = QueryRecorder(kind, endpoint)
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+        publish(recorder)
+
+
+def publish(recorder):
+    endpoint = recorder.endpoint or 'unresolved'
+    QUERY_COUNT.labels(recorder.kind, endpoint).observe(recorder.count)
+    QUERY_TIME.labels(recorder.kind, endpoint).observe(recorder.duration)
+    DUPLICATE_QUERIES.labels(recorder.kind, endpoint).observe(recorder.duplicate_count())
+
+    threshold = getattr(settings, 'QUERY_DUPLICATE_THRESHOLD', 5)
+    repeated = {sql: n for sql, n in recorder.duplicates.items() if n >= threshold}
+    if repeated:
+        sql, n = max(repeated.items(), key=lambda item: item[1])
+        logger.warning(
+            'Possible N+1 in %s %s: %d queries, statement repeated %d times: %s',
+            recorder.kind, endpoint, recorder.count, n, sql
+        )
+
+    for listener in list(_listeners):
+        listener(recorder)
+
+
+class QueryBudgetMiddleware:
+    """
+    Record ORM cost per HTTP request, labelled by the matched URL name.
+
+    Works in sync and async stacks alike, so async views are not pushed
+    into a thread on its account. The async ORM runs queries in a copy of
+    the request's context, which still points at the same recorder.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with record_queries('http') as recorder:
+            response = self.get_response(request)
+            self.label(recorder, request)
+        return response
+
+    async def __acall__(self, request):
+        with record_queries('http') as recorder:
+            response = await self.get_response(request)
+            self.label(recorder, request)
+        return response
+
+    def label(self, recorder, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            recorder.endpoint = f'{request.method} {match.view_name or match.route}'
+
+
+class QueryBudgetConsumerMixin:
+    """Record ORM cost per message handled by a Channels consumer."""
+
+    async def dispatch(self, message):
+        endpoint = f"{type(self).__name__} {message['type']}"
+        with record_queries('ws', endpoint):
+            await super().dispatch(message)
@@ -0,0 +1,244 @@
+"""
+Rendering user content to safe HTML.
+
+Threads and replies are written as plain text, markdown or HTML
+(``content_type``). ``render`` turns any of them into HTML that can be
+inserted into a page as is: plain text and markdown are escaped before any
+markup is added, and HTML is reduced to an allow-list of tags and
+attributes. Links keep only http(s), mailto and relative URLs and get
+``rel="nofollow noopener"``.
+
+Content is rendered once, when it is saved (see ``forums.models``), and
+stored with the ``RENDERER_VERSION`` that produced it. Bump the version
+whenever the output of this module changes; stored copies made by an older
+version are re-rendered the next time they are read.
+
+Markdown covers the subset people use in forum posts: paragraphs (single
+newlines are line breaks), ATX headings, emphasis, strikethrough, inline
+code and fenced code blocks, links, lists, block quotes and rules. HTML
+inside markdown is shown as text.
+"""
+
+import re
+from html import escape, unescape
+from html.parser import HTMLParser
+
+RENDERER_VERSION = 1
+
+SAFE_SCHEMES = {'http', 'https', 'mailto'}
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'del', 'em', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'hr', 'i', 'li', 'ol', 'p', 'pre', 's', 'strong', 'sub', 'sup', 'ul',
+}
+ALLOWED_ATTRIBUTES = {'a': {'href', 'title'}, 'abbr': {'title'}}
+VOID_TAGS = {'br', 'hr'}
+# Elements dropped together with everything inside them.
+DROPPED_TAGS = {'iframe', 'math', 'noscript', 'object', 'script', 'select', 'style', 'svg', 'template', 'textarea'}
+LINK_REL = 'nofollow noopener'
+
+_SCHEME = re.compile(r'([a-zA-Z][a-zA-Z0-9+.\-]*):')
+_CONTROL = re.compile(r'[\x00-\x20\x7f]+')
+
+
+def _safe_url(url):
+    """``url`` if it is relative or uses a safe scheme, else ``None``."""
+    # Browsers ignore whitespace and control characters inside a scheme.
+    compact = _CONTROL.sub('', url)
+    scheme = _SCHEME.match(compact)
+    if not compact or (scheme and scheme.group(1).lower() not in SAFE_SCHEMES):
+        return None
+    return url.strip()
+
+
+def _start_tag(tag, attrs):
+    allowed = ALLOWED_ATTRIBUTES.get(tag, ())
+    kept = {name: value for name, value in attrs if name in allowed and value is not None}
+    if tag == 'a':
+        href = _safe_url(kept.pop('href', ''))
+        kept = {'href': href, **kept} if href else kept
+        kept['rel'] = LINK_REL
+    return '<' + tag + ''.join(f' {name}="{escape(value)}"' for name, value in kept.items()) + '>'
+
+
+class _Sanitizer(HTMLParser):
+    """Re-emits allowed markup only, escaping all text and closing what was left open."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.skip += 1
+        elif not self.skip and tag in ALLOWED_TAGS:
+            self.out.append(_start_tag(tag, attrs))
+            if tag not in VOID_TAGS:
+                self.open.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.skip and tag in ALLOWED_TAGS:
+            self.out.append(_start_tag(tag, attrs))
+            if tag not in VOID_TAGS:
+                self.out.append(f'</{tag}>')
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.skip = max(self.skip - 1, 0)
+        elif not self.skip and tag in self.open:
+            while True:
+                open_tag = self.open.pop()
+                self.out.append(f'</{open_tag}>')
+                if open_tag == tag:
+                    break
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.out.append(escape(data, quote=False))
+
+    def result(self):
+        self.close()
+        self.out.extend(f'</{tag}>' for tag in reversed(self.open))
+        return ''.join(self.out)
+
+
+def sanitize_html(text):
+    """``text`` with everything outside the tag and attribute allow-lists removed."""
+    parser = _Sanitizer()
+    parser.feed(text)
+    return parser.result()
+
+
+def render_plain(text):
+    """Escaped ``text`` in paragraphs, with single newlines as line breaks."""
+    paragraphs = re.split(r'\n\s*\n', _normalize(text).strip())
+    return '\n'.join(
+        '<p>' + '<br>\n'.join(escape(line) for line in paragraph.split('\n')) + '</p>'
+        for paragraph in paragraphs if paragraph
+    )
+
+
+_CODE_SPAN = re.compile(r'(`+)(.+?)\1')
+_LINK = re.compile(r'\[([^\]]+)\]\(\s*([^)\s]+)(?:\s+&quot;(.*?)&quot;)?\s*\)')
+_STRONG = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*|(?<!\w)__(?=\S)(.+?)(?<=\S)__(?!\w)')
+_EMPHASIS = re.compile(r'\*(?=\S)(.+?)(?<=\S)\*|(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)')
+_STRIKE = re.compile(r'~~(?=\S)(.+?)(?<=\S)~~')
+_PLACEHOLDER = re.compile(r'\x00(\d+)\x00')
+
+
+def _inline(text):
+    # Finished markup is set aside behind placeholders so later rules
+    # cannot reach into code spans or URLs.
+    stash = []
+
+    def keep(html):
+        stash.append(html)
+        return f'\x00{len(stash) - 1}\x00'
+
+    def link(match):
+        label, url, title = match.groups()
+        href = _safe_url(unescape(url))
+        if href is None:
+            return label
+        attrs = f' href="{escape(href)}"' + (f' title="{title}"' if title else '')
+        return keep(f'<a{attrs} rel="{LINK_REL}">') + label + keep('</a>')
+
+    text = _CODE_SPAN.sub(lambda m: keep(f'<code>{escape(m.group(2).strip())}</code>'), text)
+    text = _LINK.sub(link, escape(text))
+    text = _STRONG.sub(lambda m: f'<strong>{m.group(1) or m.group(2)}</strong>', text)
+    text = _EMPHASIS.sub(lambda m: f'<em>{m.group(1) or m.group(2)}</em>', text)
+    text = _STRIKE.sub(r'<del>\1</del>', text)
+    return _PLACEHOLDER.sub(lambda m: stash[int(m.group(1))], text)
+
+
+_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_HEADING = re.compile(r'^ {0,3}(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+_RULE = re.compile(r'^ {0,3}([-*_])(?:\s*\1){2,}\s*$')
+_QUOTE = re.compile(r'^ {0,3}>\s?(.*)$')
+_LISTS = [
+    ('ul', re.compile(r'^ {0,3}[-*+]\s+(.*)$')),
+    ('ol', re.compile(r'^ {0,3}\d{1,9}[.)]\s+(.*)$')),
+]
+
+
+def _blocks(lines):
+    out, paragraph, i = [], [], 0
+
+    def end_paragraph():
+        if paragraph:
+            out.append('<p>' + '<br>\n'.join(_inline(line.strip()) for line in paragraph) + '</p>')
+            paragraph.clear()
+
+    while i < len(lines):
+        line = lines[i]
+        fence = _FENCE.match(line)
+        if fence:
+            end_paragraph()
+            body = []
+            i += 1
+            while i < len(lines) and not lines[i].lstrip().startswith(fence.group(1)):
+                body.append(lines[i])
+                i += 1
+            out.append(f'<pre><code>{escape(chr(10).join(body))}</code></pre>')
+            i += 1
+            continue
+        if not line.strip():
+            end_paragraph()
+            i += 1
+            continue
+        heading = _HEADING.match(line)
+        if heading:
+            end_paragraph()
+            level = len(heading.group(1))
+            out.append(f'<h{level}>{_inline(heading.group(2))}</h{level}>')
+            i += 1
+            continue
+        if _RULE.match(line):
+            end_paragraph()
+            out.append('<hr>')
+            i += 1
+            continue
+        if _QUOTE.match(line):
+            end_paragraph()
+            quoted = []
+            while i < len(lines) and _QUOTE.match(lines[i]):
+                quoted.append(_QUOTE.match(lines[i]).group(1))
+                i += 1
+            out.append('<blockquote>\n' + '\n'.join(_blocks(quoted)) + '\n</blockquote>')
+            continue
+        for tag, item in _LISTS:
+            if item.match(line):
+                end_paragraph()
+                items = []
+                while i < len(lines) and item.match(lines[i]):
+                    items.append(f'<li>{_inline(item.match(lines[i]).group(1))}</li>')
+                    i += 1
+                out.append(f'<{tag}>\n' + '\n'.join(items) + f'\n</{tag}>')
+                break
+        else:
+            paragraph.append(line)
+            i += 1
+    end_paragraph()
+    return out
+
+
+def render_markdown(text):
+    """Markdown ``text`` as HTML; see the module docstring for the supported subset."""
+    return '\n'.join(_blocks(_normalize(text).split('\n')))
+
+
+def _normalize(text):
+    return text.replace('\r\n', '\n').replace('\r', '\n').replace('\x00', '')
+
+
+RENDERERS = {
+    'plain': render_plain,
+    'markdown': render_markdown,
+    'html': sanitize_html,
+}
+
+
+def render(content, content_type):
+    """Safe HTML for ``content`` written as ``content_type`` (plain text if unknown)."""
+    return RENDERERS.get(content_type, render_plain)(content)
@@ -0,0 +1,185 @@
+"""
+Full-text search over forum threads, replies and chat messages.
+
+On PostgreSQL each searchable table has a ``search_vector`` tsvector column
+kept current by a ``BEFORE INSERT OR UPDATE`` trigger (so ``bulk_create``
+and raw SQL writes are covered too) and a GIN index; queries use
+``websearch_to_tsquery`` with ``ts_rank`` ordering and ``ts_headline``
+snippets. Other databases (SQLite in the test suite) fall back to
+``icontains`` matching on every term with a naive rank and snippet, which is
+fine for small data sets.
+
+Results are limited to groups the user belongs to and chats they take part
+in.
+"""
+
+import html
+import re
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, Q
+
+from forums.models import Reply, Thread
+from groups.models import GroupMembership
+from messaging.models import Message
+
+SEARCH_CONFIG = 'english'
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+# ts_headline returns raw content, so matches are delimited with control
+# characters and the snippet is HTML-escaped before adding the real tags.
+_START_SENTINEL = '\x02'
+_STOP_SENTINEL = '\x03'
+
+# table -> [(column, weight)] for the search_vector triggers.
+SEARCH_COLUMNS = {
+    'threads': [('title', 'A'), ('content', 'B')],
+    'replies': [('content', 'B')],
+    'messages': [('content', 'B')],
+}
+
+
+def _tsvector_sql(columns, row='NEW'):
+    return ' || '.join(
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({row}.{column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def install_search_trigger(table):
+    """
+    Return a migration ``RunPython`` callable that adds the ``search_vector``
+    trigger and GIN index to ``table`` and backfills it. No-op off PostgreSQL.
+    """
+    columns = SEARCH_COLUMNS[table]
+
+    def forwards(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        schema_editor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {_tsvector_sql(columns)};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        schema_editor.execute(f"""
+            CREATE TRIGGER {table}_search_vector_trigger
+            BEFORE INSERT OR UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+        """)
+        schema_editor.execute(f"UPDATE {table} SET search_vector = {_tsvector_sql(columns, row=table)}")
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_search_vector_gin ON {table} USING gin (search_vector)'
+        )
+
+    return forwards
+
+
+def remove_search_trigger(table):
+    """Reverse of ``install_search_trigger``."""
+    def backwards(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_vector_gin')
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table}')
+        schema_editor.execute(f'DROP FUNCTION IF EXISTS {table}_search_vector_update()')
+
+    return backwards
+
+
+def _terms(query):
+    return [term for term in re.findall(r'\w+', query.lower()) if term]
+
+
+def _highlight(marked):
+    """HTML-escape ``marked`` and turn the sentinel pairs into highlight tags."""
+    return (
+        html.escape(marked)
+        .replace(_START_SENTINEL, HIGHLIGHT_START)
+        .replace(_STOP_SENTINEL, HIGHLIGHT_STOP)
+    )
+
+
+def _snippet(text, terms, radius=60):
+    """Excerpt of ``text`` around the first term, with terms highlighted."""
+    lower = text.lower()
+    hits = [lower.find(term) for term in terms if term in lower]
+    start = max(min(hits) - radius, 0) if hits else 0
+    excerpt = text[start:start + 2 * radius + 40]
+    pattern = '|'.join(re.escape(term) for term in terms)
+    marked = re.sub(f'({pattern})', f'{_START_SENTINEL}\\1{_STOP_SENTINEL}', excerpt, flags=re.IGNORECASE)
+    return ('...' if start else '') + _highlight(marked) + ('...' if start + len(excerpt) < len(text) else '')
+
+
+def _search(queryset, query, fields, snippet_field, limit):
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        results = list(
+            queryset
+            .filter(search_vector=search_query)
+            .annotate(
+                rank=SearchRank(F('search_vector'), search_query),
+                snippet=SearchHeadline(
+                    snippet_field, search_query, config=SEARCH_CONFIG,
+                    start_sel=_START_SENTINEL, stop_sel=_STOP_SENTINEL, max_fragments=2,
+                ),
+            )
+            .order_by('-rank', '-created_at')[:limit]
+        )
+        for obj in results:
+            obj.snippet = _highlight(obj.snippet)
+        return results
+
+    terms = _terms(query)
+    if not terms:
+        return []
+    match = Q()
+    for term in terms:
+        term_q = Q()
+        for field in fields:
+            term_q |= Q(**{f'{field}__icontains': term})
+        match &= term_q
+    results = list(queryset.filter(match).order_by('-created_at')[:limit])
+    for obj in results:
+        text = ' '.join(getattr(obj, field) for field in fields).lower()
+        obj.rank = float(sum(text.count(term) for term in terms))
+        obj.snippet = _snippet(getattr(obj, snippet_field), terms)
+    results.sort(key=lambda obj: -obj.rank)
+    return results
+
+
+class FullTextSearchAdminMixin:
+    """
+    ModelAdmin mixin that answers the changelist search box from the
+    ``search_vector`` index on PostgreSQL instead of ``icontains`` scans.
+    Only the indexed text is searched there, not related ``search_fields``.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if connection.vendor != 'postgresql' or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        search_query = SearchQuery(search_term, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=search_query), False
+
+
+def search_threads(user, query, limit=20):
+    """Threads in ``user``'s groups matching ``query`` on title or content."""
+    group_ids = GroupMembership.objects.filter(user=user).values('group_id')
+    queryset = Thread.objects.filter(group_id__in=group_ids)
+    return _search(queryset, query, ['title', 'content'], 'content', limit)
+
+
+def search_replies(user, query, limit=20):
+    """Replies in threads of ``user``'s groups matching ``query``."""
+    group_ids = GroupMembership.objects.filter(user=user).values('group_id')
+    queryset = Reply.objects.filter(thread__group_id__in=group_ids).select_related('thread')
+    return _search(queryset, query, ['content'], 'content', limit)
+
+
+def search_messages(user, query, limit=20):
+    """Messages in chats ``user`` participates in matching ``query``."""
+    queryset = Message.objects.filter(chat__participants=user)
+    return _search(queryset, query, ['content'], 'content', limit)
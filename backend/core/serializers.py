@@ -0,0 +1,29 @@
+"""
+Serializers for the core app.
+"""
+
+from rest_framework import serializers
+
+from .models import Notification
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """One full-text search hit; ``snippet`` is HTML with ``<mark>`` highlights."""
+    type = serializers.ChoiceField(choices=['thread', 'reply', 'message'])
+    id = serializers.IntegerField()
+    title = serializers.CharField(allow_blank=True)
+    snippet = serializers.CharField(allow_blank=True)
+    rank = serializers.FloatField()
+    group_id = serializers.IntegerField(allow_null=True)
+    thread_id = serializers.IntegerField(allow_null=True)
+    chat_id = serializers.IntegerField(allow_null=True)
+    created_at = serializers.DateTimeField()
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """A (possibly coalesced) notification; ``count`` events of ``kind`` on ``target``."""
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'kind', 'target', 'actor', 'count', 'data', 'created_at', 'updated_at', 'read_at']
+        read_only_fields = fields
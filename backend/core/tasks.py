@@ -0,0 +1,39 @@
+"""
+Celery tasks for the core app.
+"""
+
+from celery import shared_task
+
+from groups.models import GroupMembership
+from users.models import User
+from .export import EXPORTS, upload_to_s3
+from .notifications import fan_out, send_digests
+
+
+@shared_task
+def upload_export(name, key, compress=True, **params):
+    """Stream the ``name`` export for ``params`` to the export bucket under ``key``."""
+    return upload_to_s3(EXPORTS[name](**params), key, compress=compress)
+
+
+@shared_task(ignore_result=True)
+def fan_out_notification(kind, recipient_ids, target, actor_id=None, data=None):
+    """Write and deliver one notification event to its recipients."""
+    fan_out(kind, recipient_ids, target, actor_id, data)
+
+
+@shared_task(ignore_result=True)
+def notify_group_mentions(usernames, group_id, target, actor_id=None, data=None):
+    """Notify the members of ``group_id`` among ``usernames``."""
+    members = GroupMembership.objects.filter(group_id=group_id).values('user_id')
+    recipients = set(
+        User.objects.filter(username__in=usernames, pk__in=members).values_list('pk', flat=True)
+    ) - {actor_id}
+    if recipients:
+        fan_out('mention', sorted(recipients), target, actor_id, data)
+
+
+@shared_task(ignore_result=True)
+def send_notification_digests():
+    """Email offline users what they missed."""
+    send_digests()
@@ -1,3 +1,504 @@
-from django.test import TestCase
+"""
+Tests for shared core utilities.
+"""
 
-# Create your tests here.
+import gzip
+import json
+import time
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core import mail
+from django.test import AsyncClient
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.cache import LocalLRU, TwoTierCache
+from core.export import ndjson, upload_to_s3, user_records
+from core.models import Notification
+from core.notifications import fan_out, mentioned_usernames, send_digests
+from core.pagination import KeysetPagination
+from core.querycount import add_listener, record_queries, remove_listener
+from forums.models import Reply, Thread
+from groups.models import Group, GroupMembership, GroupTag
+from messaging.models import PrivateChat, Message
+from moderation.models import ModerationLog
+from dawgpound.routing import websocket_urlpatterns
+from users.models import FriendRequest, User
+
+
+factory = APIRequestFactory()
+
+
+def paginate(queryset, url='/messages/', start_from='latest', page_size=3):
+    paginator = KeysetPagination()
+    paginator.start_from = start_from
+    paginator.page_size = page_size
+    request = Request(factory.get(url))
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator, [m.content for m in page]
+
+
+def cursor_url(link):
+    return link.replace('http://testserver', '')
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test keyset pagination over (created_at, id)."""
+
+    @pytest.fixture
+    def messages(self, authenticated_user):
+        chat = PrivateChat.objects.create(name='History')
+        Message.objects.bulk_create([
+            Message(chat=chat, author=authenticated_user, content=f'm{i}')
+            for i in range(8)
+        ])
+        # Identical timestamps force the id tie-breaker to do the work.
+        Message.objects.filter(chat=chat).update(created_at=timezone.now())
+        return Message.objects.filter(chat=chat)
+
+    def test_latest_page_is_newest_in_chronological_order(self, messages):
+        paginator, page = paginate(messages)
+        assert page == ['m5', 'm6', 'm7']
+        assert paginator.get_next_link() is None
+        assert paginator.get_previous_link() is not None
+
+    def test_walk_older_then_newer(self, messages):
+        paginator, page = paginate(messages)
+        seen = list(page)
+        while paginator.get_previous_link():
+            paginator, page = paginate(messages, cursor_url(paginator.get_previous_link()))
+            seen = page + seen
+        assert seen == [f'm{i}' for i in range(8)]
+        assert page == ['m0', 'm1']
+
+        paginator, page = paginate(messages, cursor_url(paginator.get_next_link()))
+        assert page == ['m2', 'm3', 'm4']
+        assert paginator.get_previous_link() is not None
+
+    def test_earliest_page_reads_top_down(self, messages):
+        paginator, page = paginate(messages, start_from='earliest')
+        assert page == ['m0', 'm1', 'm2']
+        assert paginator.get_previous_link() is None
+
+        paginator, page = paginate(messages, cursor_url(paginator.get_next_link()), start_from='earliest')
+        assert page == ['m3', 'm4', 'm5']
+
+    def test_invalid_cursor(self, messages):
+        with pytest.raises(NotFound):
+            paginate(messages, '/messages/?cursor=not-a-cursor')
+
+
+@pytest.mark.django_db
+class TestCounters:
+    """Test the denormalized counter columns and their reconciliation."""
+
+    def test_counters_follow_creates_and_deletes(self, authenticated_user):
+        group = Group.objects.create(name='CS', category='major')
+        membership = GroupMembership.objects.create(user=authenticated_user, group=group)
+        thread = Thread.objects.create(group=group, author=authenticated_user, title='Hi', content='Hi')
+        replies = [Reply.objects.create(thread=thread, author=authenticated_user, content='r') for _ in range(3)]
+        chat = PrivateChat.objects.create()
+        chat.participants.add(authenticated_user)
+        Message.objects.create(chat=chat, author=authenticated_user, content='m')
+
+        replies[0].delete()
+        group.refresh_from_db()
+        thread.refresh_from_db()
+        chat.refresh_from_db()
+        assert group.member_count == 1
+        assert thread.reply_count == 2
+        assert (chat.participant_count, chat.message_count) == (1, 1)
+
+        membership.delete()
+        chat.participants.remove(authenticated_user)
+        group.refresh_from_db()
+        chat.refresh_from_db()
+        assert group.member_count == 0
+        assert chat.participant_count == 0
+
+    def test_reconcile_repairs_drift(self, authenticated_user):
+        group = Group.objects.create(name='CS', category='major')
+        GroupMembership.objects.create(user=authenticated_user, group=group)
+        thread = Thread.objects.create(group=group, author=authenticated_user, title='Hi', content='Hi')
+        # bulk_create bypasses the signal handlers.
+        Reply.objects.bulk_create([Reply(thread=thread, author=authenticated_user, content='r')])
+        Group.objects.filter(pk=group.pk).update(member_count=7)
+
+        out = StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=out)
+        assert 'Found 2 drifted counters' in out.getvalue()
+        group.refresh_from_db()
+        assert group.member_count == 7
+
+        call_command('reconcile_counters', stdout=StringIO())
+        group.refresh_from_db()
+        thread.refresh_from_db()
+        assert (group.member_count, thread.reply_count) == (1, 1)
+
+
+@pytest.mark.django_db
+class TestQueryInstrumentation:
+    """Test per-request query recording and the metrics endpoint."""
+
+    def test_recorder_flags_repeated_statements(self):
+        groups = [Group.objects.create(name=f'G{i}', category='other') for i in range(4)]
+        with record_queries('test') as recorder:
+            for group in groups:
+                group.members.count()
+        assert recorder.count == 4
+        assert list(recorder.duplicates.values()) == [4]
+        assert recorder.duplicate_count() == 3
+
+    @pytest.mark.query_budget(6)
+    def test_middleware_records_each_request(self, authenticated_client):
+        for i in range(10):
+            Group.objects.create(name=f'G{i}', category='other')
+        seen = []
+        add_listener(seen.append)
+        try:
+            response = authenticated_client.get('/api/groups/')
+        finally:
+            remove_listener(seen.append)
+
+        assert response.status_code == 200
+        assert [r.endpoint for r in seen] == ['GET group-list']
+        assert seen[0].count > 0 and not seen[0].duplicates
+
+        response = authenticated_client.get('/metrics')
+        assert b'dawgpound_db_queries_count{endpoint="GET group-list",kind="http"}' in response.content
+
+    @pytest.mark.query_budget(6)
+    @pytest.mark.parametrize('url', [
+        '/admin/groups/group/', '/admin/forums/thread/', '/admin/messaging/privatechat/',
+    ])
+    def test_admin_changelists_do_not_count_per_row(self, admin_client, url):
+        for i in range(10):
+            group = Group.objects.create(name=f'G{i}', category='other')
+            Thread.objects.create(group=group, title='t', content='c')
+            PrivateChat.objects.create(name=f'C{i}')
+        assert admin_client.get(url).status_code == 200
+
+
+@pytest.mark.django_db
+class TestSearch:
+    """Test full-text search and its visibility rules."""
+
+    @pytest.fixture
+    def content(self, authenticated_user):
+        mine = Group.objects.create(name='CS', category='major')
+        other = Group.objects.create(name='Private', category='other')
+        GroupMembership.objects.create(user=authenticated_user, group=mine)
+        thread = Thread.objects.create(
+            group=mine, author=authenticated_user, title='Midterm schedule', content='When is the <b>midterm</b>?'
+        )
+        Reply.objects.create(thread=thread, author=authenticated_user, content='The midterm is on Friday')
+        Thread.objects.create(group=other, title='Midterm leak', content='midterm answers')
+        chat = PrivateChat.objects.create()
+        chat.participants.add(authenticated_user)
+        Message.objects.create(chat=chat, author=authenticated_user, content='study for the midterm?')
+        Message.objects.create(chat=PrivateChat.objects.create(), content='midterm secrets')
+        return thread
+
+    def test_search_respects_membership(self, authenticated_client, content):
+        response = authenticated_client.get('/api/search/?q=midterm')
+        assert response.status_code == 200
+        hits = {(hit['type'], hit['id']) for hit in response.data['results']}
+        assert len(hits) == 3
+        assert ('thread', content.id) in hits
+
+        thread_hit = next(hit for hit in response.data['results'] if hit['type'] == 'thread')
+        assert thread_hit['snippet'] == 'When is the &lt;b&gt;<mark>midterm</mark>&lt;/b&gt;?'
+
+    def test_search_by_type(self, authenticated_client, content):
+        response = authenticated_client.get('/api/search/?q=friday&type=replies')
+        assert [(hit['type'], hit['thread_id']) for hit in response.data['results']] == [('reply', content.id)]
+
+        response = authenticated_client.get('/api/search/?q=midterm&type=messages')
+        assert [hit['snippet'] for hit in response.data['results']] == ['study for the <mark>midterm</mark>?']
+
+    def test_search_requires_query(self, authenticated_client):
+        assert authenticated_client.get('/api/search/?q=%20').status_code == 400
+        assert authenticated_client.get('/api/search/?q=x&type=users').status_code == 400
+
+
+class TestTwoTierCache:
+    """Test the in-process LRU and the read-through two-tier cache."""
+
+    def test_lru_evicts_oldest_and_expires(self, monkeypatch):
+        lru = LocalLRU(maxsize=2, ttl=10)
+        lru.set_many({'a': 1, 'b': 2})
+        lru.get_many(['a'])
+        lru.set_many({'c': 3})
+        assert lru.get_many(['a', 'b', 'c']) == {'a': 1, 'c': 3}
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, 'monotonic', lambda: now + 11)
+        assert lru.get_many(['a', 'c']) == {}
+
+    def test_get_many_loads_misses_in_one_batch(self):
+        calls = []
+
+        def loader(ids):
+            calls.append(sorted(ids))
+            return {i: {'id': i} for i in ids if i != 404}
+
+        cache = TwoTierCache('test', loader)
+        assert cache.get_many([1, 2, 404]) == {1: {'id': 1}, 2: {'id': 2}}
+        assert cache.get_many([1, 2, 3]) == {1: {'id': 1}, 2: {'id': 2}, 3: {'id': 3}}
+        assert calls == [[1, 2, 404], [3]]
+
+        # The shared tier serves entries after this process's LRU is gone.
+        cache.local.clear()
+        cache.get(1)['id'] = 'mutated'
+        assert cache.get(1) == {'id': 1}
+        assert calls == [[1, 2, 404], [3]]
+
+        cache.invalidate(1)
+        cache.get(1)
+        assert calls[-1] == [1]
+
+
+@pytest.mark.django_db
+class TestBulkImport:
+    """Test the bulk_import management command."""
+
+    def test_imports_users_groups_and_memberships(self, tmp_path, authenticated_user):
+        users = tmp_path / 'users.csv'
+        users.write_text(
+            'username,email,university_email,majors,year_of_study\n'
+            'ada,ada@example.com,ada@university.edu,Computer Science;Math,Freshman\n'
+            'bad name!,x@example.com,not-an-email,,\n'
+            'grace,grace@example.com,grace@university.edu,,Freshman\n'
+            'testuser,dup@example.com,dup@university.edu,,\n'
+        )
+        out = StringIO()
+        call_command('bulk_import', 'users', str(users), '--batch-size', '2', stdout=out)
+        assert 'Read 4 users rows' in out.getvalue()
+        assert '3 accepted, 0 skipped, 1 rejected' in out.getvalue()
+        ada = User.objects.get(username='ada')
+        assert ada.majors == ['Computer Science', 'Math'] and not ada.has_usable_password()
+        # The existing username conflicts and is left untouched.
+        assert User.objects.get(username='testuser').email == authenticated_user.email
+
+        rejected = [json.loads(line) for line in (tmp_path / 'users.csv.rejected.jsonl').read_text().splitlines()]
+        assert [(r['line'], sorted(r['errors'])) for r in rejected] == [(3, ['university_email', 'username'])]
+
+        groups = tmp_path / 'groups.jsonl'
+        groups.write_text('\n'.join([
+            json.dumps({'name': 'Class of 2030', 'category': 'class_year', 'tags': ['2030']}),
+            json.dumps({'name': 'CS Majors', 'category': 'major', 'tags': ['Computer Science']}),
+            json.dumps({'name': 'CS Majors', 'category': 'major'}),
+            json.dumps({'name': 'Chess', 'category': 'games'}),
+            '{not json',
+        ]) + '\n')
+        out = StringIO()
+        call_command('bulk_import', 'groups', str(groups), stdout=out)
+        assert '2 accepted, 1 skipped, 2 rejected' in out.getvalue()
+        cs = Group.objects.get(name='CS Majors')
+        assert GroupTag.objects.filter(group=cs, value='Computer Science').exists()
+
+        memberships = tmp_path / 'memberships.csv'
+        memberships.write_text(
+            'username,group\n'
+            'ada,CS Majors\n'
+            'grace,CS Majors\n'
+            'ada,Class of 2030\n'
+            'ada,CS Majors\n'
+            'nobody,CS Majors\n'
+        )
+        call_command('bulk_import', 'memberships', str(memberships), '--rejects', str(tmp_path / 'm.jsonl'),
+                     stdout=StringIO())
+        cs.refresh_from_db()
+        assert cs.member_count == 2
+        assert GroupMembership.objects.filter(user=ada).count() == 2
+        assert json.loads((tmp_path / 'm.jsonl').read_text())['errors'] == {'username': ['No such user.']}
+
+
+@pytest.mark.django_db
+class TestExport:
+    """Test the streaming NDJSON exports."""
+
+    @pytest.fixture
+    def content(self, authenticated_user):
+        group = Group.objects.create(name='Chess Club', category='other')
+        thread = Thread.objects.create(group=group, author=authenticated_user, title='Openings', content='e4')
+        Reply.objects.create(thread=thread, author=authenticated_user, content='d4')
+        chat = PrivateChat.objects.create()
+        Message.objects.bulk_create([
+            Message(chat=chat, author=authenticated_user, content=f'm{i}') for i in range(5)
+        ])
+        ModerationLog.objects.create(moderator=None, action='lock_thread', group=group, thread=thread)
+        ModerationLog.objects.create(moderator=None, action='ban_user', target_user=authenticated_user)
+        return group
+
+    def test_user_export_streams_every_section(self, authenticated_client, content):
+        response = authenticated_client.get('/api/auth/export/')
+        assert response.streaming
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        assert [r['type'] for r in records] == (
+            ['profile', 'thread', 'reply'] + ['message'] * 5 + ['moderation_log']
+        )
+        assert records[0]['username'] == 'testuser' and 'password' not in records[0]
+
+        response = authenticated_client.get('/api/auth/export/?compress=gzip')
+        assert response['Content-Disposition'] == 'attachment; filename="dawgpound-testuser.ndjson.gz"'
+        assert len(gzip.decompress(b''.join(response.streaming_content)).splitlines()) == 9
+
+    def test_moderation_export_is_staff_only(self, authenticated_client, authenticated_user, content):
+        url = f'/api/moderation/logs/export/?group={content.pk}'
+        assert authenticated_client.get(url).status_code == 403
+
+        authenticated_user.is_staff = True
+        authenticated_user.save()
+        records = [json.loads(line) for line in b''.join(authenticated_client.get(url).streaming_content).splitlines()]
+        assert [r['action'] for r in records] == ['lock_thread']
+        assert authenticated_client.get('/api/moderation/logs/export/?since=yesterday').status_code == 400
+
+    def test_upload_streams_in_parts(self, authenticated_user, content, settings, monkeypatch):
+        monkeypatch.setattr('core.export.WRITE_BUFFER_SIZE', 64)
+        settings.EXPORT_S3_BUCKET = 'exports'
+        assert len(list(ndjson(user_records(authenticated_user.pk, chunk_size=2)))) > 1
+
+        class Client:
+            def upload_fileobj(self, body, bucket, key, **kwargs):
+                self.reads = []
+                while chunk := body.read(100):
+                    self.reads.append(chunk)
+                self.bucket, self.key = bucket, key
+
+        client = Client()
+        upload_to_s3(user_records(authenticated_user.pk), 'exports/1.ndjson.gz', client=client)
+        assert (client.bucket, client.key) == ('exports', 'exports/1.ndjson.gz')
+        assert len(gzip.decompress(b''.join(client.reads)).splitlines()) == 9
+
+
+@pytest.mark.django_db
+class TestNotifications:
+    """Test notification fan-out, coalescing, delivery and digests."""
+
+    def make_user(self, name):
+        return User.objects.create_user(
+            username=name, email=f'{name}@example.com', university_email=f'{name}@university.edu',
+            password='pass123',
+        )
+
+    def test_replies_and_mentions_are_coalesced(self, authenticated_user, django_capture_on_commit_callbacks):
+        alice, bob, carol, outsider = (self.make_user(name) for name in ('alice', 'bob', 'carol', 'outsider'))
+        group = Group.objects.create(name='Chess Club', category='other')
+        for user in (alice, bob, carol):
+            GroupMembership.objects.create(user=user, group=group)
+        thread = Thread.objects.create(group=group, author=alice, title='Openings', content='e4')
+
+        assert mentioned_usernames('cc @carol, @outsider. me@example.com') == ['carol', 'outsider']
+        with django_capture_on_commit_callbacks(execute=True):
+            for i in range(3):
+                Reply.objects.create(thread=thread, author=bob, content=f'reply {i}, cc @carol @outsider')
+            Reply.objects.create(thread=thread, author=alice, content='thanks')
+            FriendRequest.objects.create(from_user=carol, to_user=alice)
+
+        assert sorted(Notification.objects.values_list('recipient__username', 'kind', 'count')) == [
+            ('alice', 'friend_request', 1), ('alice', 'reply', 3), ('carol', 'mention', 3),
+        ]
+        reply = Notification.objects.get(kind='reply')
+        assert (reply.target, reply.actor, reply.data['title']) == (f'thread:{thread.pk}', bob, 'Openings')
+
+        # Once read, the next reply starts a new notification.
+        Notification.objects.update(read_at=timezone.now())
+        assert fan_out('reply', [alice.pk], f'thread:{thread.pk}', bob.pk) == 1
+
+    def test_online_recipients_get_a_push(self, authenticated_user):
+        @async_to_sync
+        async def run():
+            socket = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/presence/')
+            socket.scope['user'] = authenticated_user
+            assert (await socket.connect())[0]
+            await socket.receive_json_from()
+            await database_sync_to_async(fan_out)('moderation', [authenticated_user.pk], 'group:1', None,
+                                                  {'action': 'lock_thread'})
+            event = await socket.receive_json_from(timeout=2)
+            await socket.disconnect()
+            return event
+
+        event = run()
+        assert event['type'] == 'notification'
+        assert (event['notification']['kind'], event['notification']['count']) == ('moderation', 1)
+
+    def test_offline_users_get_one_digest(self, authenticated_client, authenticated_user):
+        other = self.make_user('other')
+        fan_out('reply', [authenticated_user.pk, other.pk], 'thread:1', None, {'title': 'Openings'})
+        fan_out('reply', [authenticated_user.pk], 'thread:1', None, {'title': 'Openings'})
+        fan_out('friend_request', [authenticated_user.pk], f'user:{other.pk}', other.pk, {'username': 'other'})
+
+        assert send_digests() == 2
+        assert send_digests() == 0
+        digest = next(m for m in mail.outbox if m.to == [authenticated_user.email])
+        assert digest.subject == 'You have 2 new notifications on DawgPound'
+        assert digest.body.splitlines() == ['- Friend request from other', '- 2 new replies to "Openings"']
+
+        response = authenticated_client.get('/api/notifications/?unread=1')
+        assert [n['kind'] for n in response.data['results']] == ['friend_request', 'reply']
+        first = response.data['results'][0]['id']
+        assert authenticated_client.post('/api/notifications/read/', {'ids': [first]}, format='json').data == {
+            'marked_read': 1
+        }
+        assert authenticated_client.post('/api/notifications/read/', {}, format='json').data == {'marked_read': 1}
+        assert authenticated_client.get('/api/notifications/?unread=1').data['results'] == []
+
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    """Test the async read endpoints through Django's async request path."""
+
+    def test_hot_reads_run_async_with_jwt(self, authenticated_user):
+        group = Group.objects.create(name='Chess Club', category='other')
+        thread = Thread.objects.create(group=group, author=authenticated_user, title='Openings', content='e4')
+        chat = PrivateChat.objects.create()
+        chat.participants.add(authenticated_user)
+        for i in range(3):
+            Message.objects.create(chat=chat, author=authenticated_user, content=f'm{i}')
+        for i in range(100):
+            Group.objects.create(name=f'G{i}', category='other')
+        auth = {'Authorization': f'Bearer {AccessToken.for_user(authenticated_user)}'}
+        seen = []
+
+        @async_to_sync
+        async def run():
+            client = AsyncClient()
+            return [
+                await client.get(f'/api/forums/threads/{thread.id}/', headers=auth),
+                await client.get(f'/api/messages/chats/{chat.id}/messages/?page_size=2', headers=auth),
+                await client.get('/api/groups/?page=2', headers=auth),
+                await client.get('/api/discovery/feed/', headers=auth),
+                await client.get(f'/api/forums/threads/{thread.id}/'),
+                await client.get('/api/messages/chats/999/messages/', headers=auth),
+            ]
+
+        add_listener(seen.append)
+        try:
+            detail, history, groups, feed, anonymous, missing = run()
+        finally:
+            remove_listener(seen.append)
+
+        assert (detail.status_code, detail.json()['author']['username']) == (200, 'testuser')
+        assert [m['content'] for m in history.json()['results']] == ['m1', 'm2']
+        assert 'cursor=' in history.json()['previous']
+        page = groups.json()
+        assert (page['count'], len(page['results'])) == (101, 1)
+        assert page['next'] is None and page['previous'] == 'http://testserver/api/groups/'
+        assert set(feed.json()) == {'groups', 'users'}
+        assert anonymous.status_code == 401 and anonymous['WWW-Authenticate'] == 'Bearer realm="api"'
+        assert missing.status_code == 404
+        # The middleware labels async requests like sync ones.
+        assert [r.endpoint for r in seen[:4]] == [
+            'GET thread-detail', 'GET chat-messages', 'GET group-list', 'GET discovery-feed',
+        ]
@@ -1,3 +1,115 @@
-from django.shortcuts import render
+"""
+Views for the core app.
+"""
+
+import os
+
+from django.http import HttpResponse
+from django.utils import timezone
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Notification
+from .search import search_messages, search_replies, search_threads
+from .serializers import NotificationSerializer, SearchResultSerializer
+
+
+def metrics(request):
+    """Prometheus scrape endpoint.
+
+    Under gunicorn each worker keeps its own metrics; set
+    ``PROMETHEUS_MULTIPROC_DIR`` so they are aggregated across workers.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def _thread_hit(thread):
+    return {
+        'type': 'thread', 'id': thread.id, 'title': thread.title, 'snippet': thread.snippet,
+        'rank': thread.rank, 'group_id': thread.group_id, 'thread_id': thread.id, 'chat_id': None,
+        'created_at': thread.created_at,
+    }
+
+
+def _reply_hit(reply):
+    return {
+        'type': 'reply', 'id': reply.id, 'title': reply.thread.title, 'snippet': reply.snippet,
+        'rank': reply.rank, 'group_id': reply.thread.group_id, 'thread_id': reply.thread_id, 'chat_id': None,
+        'created_at': reply.created_at,
+    }
+
+
+def _message_hit(message):
+    return {
+        'type': 'message', 'id': message.id, 'title': '', 'snippet': message.snippet,
+        'rank': message.rank, 'group_id': None, 'thread_id': None, 'chat_id': message.chat_id,
+        'created_at': message.created_at,
+    }
+
+
+class SearchView(APIView):
+    """
+    Ranked full-text search over the requester's groups and chats.
+
+    ``q`` is the query (web-search syntax on PostgreSQL), ``type`` narrows
+    it to ``threads``, ``replies`` or ``messages`` and ``limit`` caps the
+    number of hits (default 20, max 50).
+    """
+    SEARCHES = {
+        'threads': (search_threads, _thread_hit),
+        'replies': (search_replies, _reply_hit),
+        'messages': (search_messages, _message_hit),
+    }
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'query is required'})
+        kind = request.query_params.get('type')
+        if kind is not None and kind not in self.SEARCHES:
+            raise ValidationError({'type': f'must be one of {", ".join(self.SEARCHES)}'})
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+        except ValueError:
+            raise ValidationError({'limit': 'must be an integer'})
+
+        kinds = [kind] if kind else list(self.SEARCHES)
+        hits = []
+        for name in kinds:
+            search, to_hit = self.SEARCHES[name]
+            hits.extend(to_hit(obj) for obj in search(request.user, query, limit))
+        hits.sort(key=lambda hit: -hit['rank'])
+        return Response({'results': SearchResultSerializer(hits[:limit], many=True).data})
+
+
+class NotificationListView(generics.ListAPIView):
+    """The requester's notifications, newest activity first; ``?unread=1`` for unread only."""
+    serializer_class = NotificationSerializer
+
+    def get_queryset(self):
+        notifications = Notification.objects.filter(recipient=self.request.user)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            notifications = notifications.filter(read_at__isnull=True)
+        return notifications
+
+
+class NotificationReadView(APIView):
+    """Mark the requester's notifications in ``ids`` (or all of them) read."""
+
+    def post(self, request):
+        ids = request.data.get('ids')
+        notifications = Notification.objects.filter(recipient=request.user, read_at__isnull=True)
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+                raise ValidationError({'ids': 'must be a list of notification ids'})
+            notifications = notifications.filter(pk__in=ids)
+        return Response({'marked_read': notifications.update(read_at=timezone.now())})
 
-# Create your views here.
@@ -5,12 +5,12 @@ WebSocket URL routing for DawgPound.
 from django.urls import re_path
 
 # Import WebSocket consumers from apps
-# from messaging.consumers import ChatConsumer
-# from forums.consumers import ForumConsumer
+from messaging.consumers import ChatConsumer
+from forums.consumers import ForumConsumer
+from users.consumers import PresenceConsumer
 
 websocket_urlpatterns = [
-    # WebSocket routes will be added here as consumers are implemented
-    # Example:
-    # re_path(r'ws/chat/(?P<chat_id>\w+)/$', ChatConsumer.as_asgi()),
-    # re_path(r'ws/forum/(?P<group_id>\w+)/$', ForumConsumer.as_asgi()),
+    re_path(r'ws/chat/(?P<chat_id>\d+)/$', ChatConsumer.as_asgi()),
+    re_path(r'ws/forum/(?P<group_id>\d+)/$', ForumConsumer.as_asgi()),
+    re_path(r'ws/presence/$', PresenceConsumer.as_asgi()),
 ]
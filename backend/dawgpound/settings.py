@@ -54,6 +54,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.querycount.QueryBudgetMiddleware',
+    'moderation.audit.AuditLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -149,7 +151,7 @@ CORS_ALLOW_CREDENTIALS = True
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -182,6 +184,21 @@ SPECTACULAR_SETTINGS = {
     'SERVE_INCLUDE_SCHEMA': False,
 }
 
+# Cache Configuration
+# Shared tier of core.cache; database 1 keeps it apart from Celery on 0.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get(
+            'CACHE_URL',
+            f"redis://{os.environ.get('REDIS_HOST', 'redis')}:{os.environ.get('REDIS_PORT', 6379)}/1"
+        ),
+    },
+}
+# Seconds a user profile stays in the shared and in-process tiers.
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 300))
+USER_CACHE_LOCAL_TTL = int(os.environ.get('USER_CACHE_LOCAL_TTL', 5))
+
 # Channels Configuration
 CHANNEL_LAYERS = {
     'default': {
@@ -192,6 +209,62 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Chat messages are coalesced per chat for up to this many seconds, or until
+# this many are pending, then written and broadcast as one batch.
+CHAT_FLUSH_INTERVAL = float(os.environ.get('CHAT_FLUSH_INTERVAL', 0.05))
+CHAT_FLUSH_MAX_BATCH = int(os.environ.get('CHAT_FLUSH_MAX_BATCH', 100))
+# Typing indicators and read cursors live in the cache (see
+# messaging.ephemeral); cursors are written to the database every
+# CHAT_READ_CURSOR_FLUSH_SECONDS, so their TTL must be well above that.
+CHAT_TYPING_TTL = int(os.environ.get('CHAT_TYPING_TTL', 6))
+CHAT_READ_CURSOR_TTL = int(os.environ.get('CHAT_READ_CURSOR_TTL', 86400))
+CHAT_READ_CURSOR_FLUSH_SECONDS = int(os.environ.get('CHAT_READ_CURSOR_FLUSH_SECONDS', 30))
+
+# Presence (see users.presence): clients heartbeat every
+# PRESENCE_HEARTBEAT_INTERVAL seconds and a session expires PRESENCE_TTL
+# seconds after its last one.
+PRESENCE_HEARTBEAT_INTERVAL = int(os.environ.get('PRESENCE_HEARTBEAT_INTERVAL', 30))
+PRESENCE_TTL = int(os.environ.get('PRESENCE_TTL', 90))
+
+# Notifications (see core.notifications): repeats of an event on the same
+# target within this many seconds are counted on one notification, and
+# offline users are emailed a digest every NOTIFICATION_DIGEST_HOURS.
+NOTIFICATION_COALESCE_WINDOW = int(os.environ.get('NOTIFICATION_COALESCE_WINDOW', 3600))
+NOTIFICATION_DIGEST_HOURS = int(os.environ.get('NOTIFICATION_DIGEST_HOURS', 6))
+
+# Moderation audit log (see moderation.audit): buffered entries are inserted
+# this many at a time, and the metadata of rows older than
+# MODERATION_LOG_COMPACT_AFTER_DAYS is compacted daily.
+MODERATION_LOG_BATCH_SIZE = int(os.environ.get('MODERATION_LOG_BATCH_SIZE', 500))
+MODERATION_LOG_COMPACT_AFTER_DAYS = int(os.environ.get('MODERATION_LOG_COMPACT_AFTER_DAYS', 90))
+# Bulk moderation jobs (see moderation.bulk) handle this many targets per
+# Celery task, each batch in its own short transaction.
+MODERATION_BULK_BATCH_SIZE = int(os.environ.get('MODERATION_BULK_BATCH_SIZE', 500))
+
+# Email (notification digests)
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False') == 'True'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'DawgPound <no-reply@dawgpound.local>')
+
+# Message Partitioning (PostgreSQL; see messaging.partitions)
+# Future monthly partitions kept ahead of time, and the age in months after
+# which partitions move to the archive tablespace (archiving is off when the
+# tablespace is empty).
+MESSAGE_PARTITIONS_AHEAD = int(os.environ.get('MESSAGE_PARTITIONS_AHEAD', 3))
+MESSAGE_ARCHIVE_AFTER_MONTHS = int(os.environ.get('MESSAGE_ARCHIVE_AFTER_MONTHS', 12))
+MESSAGE_ARCHIVE_TABLESPACE = os.environ.get('MESSAGE_ARCHIVE_TABLESPACE', '')
+
+# Data Exports
+# S3-compatible store that core.tasks.upload_export writes to (MinIO locally).
+EXPORT_S3_BUCKET = os.environ.get('EXPORT_S3_BUCKET', 'dawgpound-exports')
+EXPORT_S3_ENDPOINT_URL = os.environ.get('EXPORT_S3_ENDPOINT_URL', '')
+EXPORT_S3_ACCESS_KEY_ID = os.environ.get('EXPORT_S3_ACCESS_KEY_ID', '')
+EXPORT_S3_SECRET_ACCESS_KEY = os.environ.get('EXPORT_S3_SECRET_ACCESS_KEY', '')
+
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
@@ -199,6 +272,41 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'rebuild-user-neighbors': {
+        'task': 'users.tasks.rebuild_user_neighbors',
+        'schedule': timedelta(hours=int(os.environ.get('USER_NEIGHBORS_REBUILD_HOURS', 6))),
+    },
+    'maintain-message-partitions': {
+        'task': 'messaging.tasks.maintain_message_partitions',
+        'schedule': timedelta(days=1),
+    },
+    'flush-chat-read-cursors': {
+        'task': 'messaging.tasks.flush_chat_read_cursors',
+        'schedule': timedelta(seconds=CHAT_READ_CURSOR_FLUSH_SECONDS),
+    },
+    'send-notification-digests': {
+        'task': 'core.tasks.send_notification_digests',
+        'schedule': timedelta(hours=NOTIFICATION_DIGEST_HOURS),
+    },
+    'compact-moderation-logs': {
+        'task': 'moderation.tasks.compact_moderation_logs',
+        'schedule': timedelta(days=1),
+    },
+}
+
+# Discovery Configuration
+# Number of candidates pulled from each discovery index before exact scoring.
+DISCOVERY_CANDIDATE_POOL = int(os.environ.get('DISCOVERY_CANDIDATE_POOL', 200))
+# Seconds a user's serialized discovery feed stays in the shared and
+# in-process tiers (see groups.feed).
+DISCOVERY_FEED_CACHE_TTL = int(os.environ.get('DISCOVERY_FEED_CACHE_TTL', 60))
+DISCOVERY_FEED_CACHE_LOCAL_TTL = int(os.environ.get('DISCOVERY_FEED_CACHE_LOCAL_TTL', 5))
+
+# Query Instrumentation
+# A statement executed this many times in one request or consumer message is
+# logged as a likely N+1 (see core.querycount).
+QUERY_DUPLICATE_THRESHOLD = int(os.environ.get('QUERY_DUPLICATE_THRESHOLD', 5))
 
 # Logging Configuration
 LOGGING = {
@@ -9,6 +9,10 @@ from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
+from core.views import NotificationListView, NotificationReadView, SearchView, metrics
+from core.asyncviews import split_methods
+from groups.views import DiscoveryFeedView, discovery_feed
+
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
@@ -28,4 +32,11 @@ urlpatterns = [
     path('api/forums/', include('forums.urls')),
     path('api/messages/', include('messaging.urls')),
     path('api/moderation/', include('moderation.urls')),
+    path('api/discovery/feed/', split_methods(discovery_feed, DiscoveryFeedView.as_view()), name='discovery-feed'),
+    path('api/search/', SearchView.as_view(), name='search'),
+    path('api/notifications/', NotificationListView.as_view(), name='notification-list'),
+    path('api/notifications/read/', NotificationReadView.as_view(), name='notification-read'),
+
+    # Prometheus scrape endpoint
+    path('metrics', metrics, name='metrics'),
 ]
@@ -3,25 +3,23 @@ Admin configuration for forums app.
 """
 
 from django.contrib import admin
+
+from core.search import FullTextSearchAdminMixin
 from .models import Thread, Reply
 
 
 @admin.register(Thread)
-class ThreadAdmin(admin.ModelAdmin):
+class ThreadAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     """Admin for Thread model."""
     list_display = ['title', 'group', 'author', 'pinned', 'locked', 'reply_count', 'created_at']
     list_filter = ['pinned', 'locked', 'created_at']
     search_fields = ['title', 'content', 'group__name', 'author__username']
+    readonly_fields = ['reply_count']
     ordering = ['-pinned', '-created_at']
-    
-    def reply_count(self, obj):
-        """Display reply count."""
-        return obj.replies.count()
-    reply_count.short_description = 'Replies'
 
 
 @admin.register(Reply)
-class ReplyAdmin(admin.ModelAdmin):
+class ReplyAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     """Admin for Reply model."""
     list_display = ['thread', 'author', 'content_preview', 'created_at']
     list_filter = ['created_at']
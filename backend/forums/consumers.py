@@ -0,0 +1,86 @@
+"""
+WebSocket consumers for the forums app.
+
+Clients connect to ``ws/forum/<group_id>/`` to receive ``thread_created``,
+``reply_created``, ``thread_updated``, ``thread_deleted`` and
+``reply_deleted`` events for one group, mirroring the Node server's
+``websocket.js``. Bulk moderation sends one ``replies_deleted``,
+``threads_deleted``, ``threads_updated`` or ``content_removed`` event per
+group listing every affected id (see ``moderation.actions`` and
+``moderation.bulk``). Membership is checked once at connect; a socket is
+closed when its user leaves the group instead of re-checking on every event.
+"""
+
+import json
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.layers import get_channel_layer
+from django.core.serializers.json import DjangoJSONEncoder
+
+from core.querycount import QueryBudgetConsumerMixin
+from groups.models import GroupMembership
+
+
+def forum_group_name(group_id):
+    return f'forum_{group_id}'
+
+
+def broadcast_to_group(group_id, payload):
+    """Send ``payload`` to every socket subscribed to ``group_id``.
+
+    The payload is JSON-encoded once here and forwarded verbatim by each
+    consumer, so the cost does not grow with the number of subscribers.
+    """
+    async_to_sync(get_channel_layer().group_send)(forum_group_name(group_id), {
+        'type': 'forum.event',
+        'text': json.dumps(payload, cls=DjangoJSONEncoder),
+    })
+
+
+def notify_member_left(group_id, user_id):
+    """Close ``user_id``'s sockets on ``group_id`` after they leave it."""
+    async_to_sync(get_channel_layer().group_send)(forum_group_name(group_id), {
+        'type': 'forum.member_left',
+        'user_id': user_id,
+    })
+
+
+class ForumConsumer(QueryBudgetConsumerMixin, AsyncJsonWebsocketConsumer):
+    """
+    Live event stream for one group's forum. Only members may connect.
+    """
+
+    async def connect(self):
+        self.group_id = int(self.scope['url_route']['kwargs']['group_id'])
+        self.group_name = forum_group_name(self.group_id)
+        user = self.scope.get('user')
+
+        if user is None or not user.is_authenticated or not await self.is_member(user):
+            await self.close(code=4403)
+            return
+
+        self.user_id = user.pk
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send_json({
+            'type': 'connected',
+            'group_id': self.group_id,
+            'message': 'Connected to group forum updates',
+        })
+
+    async def disconnect(self, code):
+        if hasattr(self, 'user_id'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def forum_event(self, event):
+        await self.send(text_data=event['text'])
+
+    async def forum_member_left(self, event):
+        if event['user_id'] == self.user_id:
+            await self.close(code=4403)
+
+    @database_sync_to_async
+    def is_member(self, user):
+        return GroupMembership.objects.filter(group_id=self.group_id, user=user).exists()
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:04
+
+from django.db import migrations, models
+
+from core.counters import reconcile_counter
+
+
+def backfill_counters(apps, schema_editor):
+    Thread = apps.get_model('forums', 'Thread')
+    Reply = apps.get_model('forums', 'Reply')
+    reconcile_counter(Thread, 'reply_count', Reply, 'thread')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forums', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:13
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from core.search import install_search_trigger, remove_search_trigger
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forums', '0003_thread_reply_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reply',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search_trigger('threads'), remove_search_trigger('threads')),
+        migrations.RunPython(install_search_trigger('replies'), remove_search_trigger('replies')),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+from forums.activity import refresh_last_activity
+
+
+def backfill_last_activity(apps, schema_editor):
+    Thread = apps.get_model('forums', 'Thread')
+    refresh_last_activity(Thread.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forums', '0004_reply_search_vector_thread_search_vector'),
+        ('groups', '0004_group_member_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='last_reply',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='forums.reply'),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='last_reply_author',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['group', '-last_activity_at', '-id'], name='threads_group_i_b97c51_idx'),
+        ),
+        migrations.RunPython(backfill_last_activity, migrations.RunPython.noop),
+    ]
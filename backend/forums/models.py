@@ -2,11 +2,44 @@
 Forum models for DawgPound.
 """
 
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
+from core import rendering
 
-class Thread(models.Model):
+
+class RenderedContent(models.Model):
+    """
+    ``content`` rendered to safe HTML when it is saved (see core.rendering),
+    so reads serve ``content_html`` as stored. Rows rendered by an older
+    renderer, or written without ``save()`` (``bulk_create``, bulk imports),
+    are re-rendered when next read (see forums.rendering).
+    """
+    content_html = models.TextField(blank=True, editable=False)
+    render_version = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def render_is_stale(self):
+        return self.render_version != rendering.RENDERER_VERSION
+
+    def render(self):
+        self.content_html = rendering.render(self.content, self.content_type)
+        self.render_version = rendering.RENDERER_VERSION
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None or {'content', 'content_type'} & set(update_fields):
+            self.render()
+            if update_fields is not None:
+                update_fields = {*update_fields, 'content_html', 'render_version'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class Thread(RenderedContent):
     """
     Forum thread model within a group.
     """
@@ -43,6 +76,32 @@ class Thread(models.Model):
     pinned = models.BooleanField(default=False)
     locked = models.BooleanField(default=False)
     
+    # Denormalized counters, maintained by signals (see core.counters)
+    reply_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    # Latest reply, maintained by signals (see forums.activity) so threads
+    # can be listed by activity without a MAX() over replies per thread.
+    # Without replies, a thread is active as of its creation.
+    last_activity_at = models.DateTimeField(default=timezone.now, editable=False)
+    last_reply = models.ForeignKey(
+        'Reply',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        editable=False,
+        related_name='+'
+    )
+    last_reply_author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        editable=False,
+        related_name='+'
+    )
+    
+    # Full-text index, maintained by a database trigger (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -52,6 +111,8 @@ class Thread(models.Model):
         ordering = ['-pinned', '-created_at']
         indexes = [
             models.Index(fields=['group', '-pinned', '-created_at']),
+            # "Most recently active" listing, in keyset order (see forums.views)
+            models.Index(fields=['group', '-last_activity_at', '-id']),
             models.Index(fields=['author']),
         ]
     
@@ -59,7 +120,7 @@ class Thread(models.Model):
         return f"{self.title} in {self.group.name}"
 
 
-class Reply(models.Model):
+class Reply(RenderedContent):
     """
     Reply model for forum threads.
     """
@@ -91,6 +152,9 @@ class Reply(models.Model):
     # Attachments stored as JSON array
     attachments = models.JSONField(default=list, blank=True)
     
+    # Full-text index, maintained by a database trigger (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,35 @@
+"""
+Keeping stored ``content_html`` current on the read path.
+
+Threads and replies are rendered when saved (``forums.models``), so a read
+normally only copies ``content_html`` into the response. Views pass each
+page through ``refresh_rendered`` first: rows rendered by an older
+``core.rendering.RENDERER_VERSION``, or inserted without ``save()``, are
+rendered once and written back in one UPDATE, so the next read of the page
+does no rendering at all.
+"""
+
+FIELDS = ['content_html', 'render_version']
+
+
+def _render_stale(objects):
+    stale = [obj for obj in objects if obj.render_is_stale]
+    for obj in stale:
+        obj.render()
+    return stale
+
+
+def refresh_rendered(objects):
+    """Re-render and store the stale objects among ``objects`` (all of one model)."""
+    stale = _render_stale(objects)
+    if stale:
+        type(stale[0]).objects.bulk_update(stale, FIELDS)
+    return objects
+
+
+async def arefresh_rendered(objects):
+    """``refresh_rendered`` for async views."""
+    stale = _render_stale(objects)
+    if stale:
+        await type(stale[0]).objects.abulk_update(stale, FIELDS)
+    return objects
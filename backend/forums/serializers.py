@@ -0,0 +1,80 @@
+"""
+Serializers for the forums app.
+"""
+
+from rest_framework import serializers
+
+from users.serializers import UserSummarySerializer
+from .models import Thread, Reply
+
+
+class RenderedHTMLField(serializers.Field):
+    """
+    The object's ``content_html``. Views store fresh renders with
+    ``forums.rendering.refresh_rendered``; a stale object that reaches the
+    serializer anyway is rendered in memory.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(source='*', read_only=True, **kwargs)
+
+    def to_representation(self, instance):
+        if instance.render_is_stale:
+            instance.render()
+        return instance.content_html
+
+
+def _validate_content(value):
+    value = value.strip()
+    if not value:
+        raise serializers.ValidationError('content is required')
+    if len(value) > 10000:
+        raise serializers.ValidationError('content must be 10000 characters or less')
+    return value
+
+
+class ThreadSerializer(serializers.ModelSerializer):
+    """Serializer for forum threads."""
+    author = UserSummarySerializer(read_only=True)
+    last_reply_author = UserSummarySerializer(read_only=True)
+    content_html = RenderedHTMLField()
+
+    class Meta:
+        model = Thread
+        fields = [
+            'id', 'group', 'author', 'title', 'content', 'content_type', 'content_html',
+            'attachments', 'pinned', 'locked', 'reply_count', 'last_activity_at', 'last_reply',
+            'last_reply_author', 'created_at', 'updated_at',
+        ]
+        read_only_fields = [
+            'id', 'group', 'author', 'pinned', 'locked', 'reply_count', 'last_activity_at', 'last_reply',
+            'last_reply_author', 'created_at', 'updated_at',
+        ]
+
+    def validate_title(self, value):
+        value = value.strip()
+        if not value:
+            raise serializers.ValidationError('title is required')
+        if len(value) > 200:
+            raise serializers.ValidationError('title must be 200 characters or less')
+        return value
+
+    def validate_content(self, value):
+        return _validate_content(value)
+
+
+class ReplySerializer(serializers.ModelSerializer):
+    """Serializer for thread replies."""
+    author = UserSummarySerializer(read_only=True)
+    content_html = RenderedHTMLField()
+
+    class Meta:
+        model = Reply
+        fields = [
+            'id', 'thread', 'author', 'content', 'content_type', 'content_html',
+            'attachments', 'created_at', 'updated_at',
+        ]
+        read_only_fields = ['id', 'thread', 'author', 'created_at', 'updated_at']
+
+    def validate_content(self, value):
+        return _validate_content(value)
@@ -0,0 +1,140 @@
+"""
+Signal handlers for the forums app.
+
+Bulk moderation (``moderation.actions``) deletes rows inside
+``bulk_changes()``, which turns off the per-row delete handlers below; it
+repairs the counters and last-activity columns and broadcasts once per
+group itself.
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.counters import adjust_counter
+from core.notifications import notify, notify_mentions
+from groups.models import GroupMembership
+from .activity import record_reply, refresh_last_activity
+from .consumers import broadcast_to_group, notify_member_left
+from .models import Reply, Thread
+from .serializers import ReplySerializer, ThreadSerializer
+
+
+# Thread fields whose changes are pushed to live subscribers.
+BROADCAST_FIELDS = ['title', 'content', 'pinned', 'locked']
+
+_bulk = contextvars.ContextVar('forum_bulk_changes', default=False)
+
+
+@contextmanager
+def bulk_changes():
+    """Skip the per-row delete handlers (counters and broadcasts) inside the block."""
+    token = _bulk.set(True)
+    try:
+        yield
+    finally:
+        _bulk.reset(token)
+
+
+def _broadcast(group_id, payload):
+    transaction.on_commit(lambda: broadcast_to_group(group_id, payload))
+
+
+@receiver(post_save, sender=Reply)
+def count_reply_on_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(Thread, instance.thread_id, 'reply_count', 1)
+
+
+@receiver(post_delete, sender=Reply)
+def count_reply_on_delete(sender, instance, **kwargs):
+    if _bulk.get():
+        return
+    adjust_counter(Thread, instance.thread_id, 'reply_count', -1)
+
+
+@receiver(post_save, sender=Reply)
+def track_activity_on_save(sender, instance, created, **kwargs):
+    if created:
+        record_reply(instance)
+
+
+@receiver(post_delete, sender=Reply)
+def track_activity_on_delete(sender, instance, origin=None, **kwargs):
+    # Replies removed along with their thread take the thread with them.
+    if _bulk.get() or getattr(origin, 'model', type(origin)) is not Reply:
+        return
+    refresh_last_activity(Thread.objects.filter(pk=instance.thread_id, last_reply=instance.pk))
+
+
+@receiver(post_save, sender=Thread)
+def broadcast_thread_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        _broadcast(instance.group_id, {'type': 'thread_created', 'thread': ThreadSerializer(instance).data})
+        return
+    fields = [f for f in BROADCAST_FIELDS if update_fields is None or f in update_fields]
+    if fields:
+        _broadcast(instance.group_id, {
+            'type': 'thread_updated',
+            'thread_id': instance.pk,
+            'updates': {f: getattr(instance, f) for f in fields},
+        })
+
+
+@receiver(post_delete, sender=Thread)
+def broadcast_thread_on_delete(sender, instance, **kwargs):
+    if _bulk.get():
+        return
+    _broadcast(instance.group_id, {'type': 'thread_deleted', 'thread_id': instance.pk})
+
+
+@receiver(post_save, sender=Reply)
+def broadcast_reply_on_save(sender, instance, created, **kwargs):
+    if created:
+        _broadcast(instance.thread.group_id, {
+            'type': 'reply_created',
+            'thread_id': instance.thread_id,
+            'reply': ReplySerializer(instance).data,
+        })
+
+
+@receiver(post_delete, sender=Reply)
+def broadcast_reply_on_delete(sender, instance, origin=None, **kwargs):
+    # Replies removed along with their thread are covered by thread_deleted.
+    # ``origin`` is the instance or queryset whose delete() started this.
+    if _bulk.get() or getattr(origin, 'model', type(origin)) is not Reply:
+        return
+    _broadcast(instance.thread.group_id, {
+        'type': 'reply_deleted',
+        'thread_id': instance.thread_id,
+        'reply_id': instance.pk,
+    })
+
+
+@receiver(post_save, sender=Thread)
+def notify_on_thread(sender, instance, created, **kwargs):
+    if created:
+        notify_mentions(
+            instance.content, instance.group_id, f'thread:{instance.pk}', instance.author_id,
+            {'thread_id': instance.pk, 'group_id': instance.group_id, 'title': instance.title},
+        )
+
+
+@receiver(post_save, sender=Reply)
+def notify_on_reply(sender, instance, created, **kwargs):
+    if not created:
+        return
+    thread = instance.thread
+    data = {'thread_id': thread.pk, 'group_id': thread.group_id, 'reply_id': instance.pk, 'title': thread.title}
+    notify('reply', [thread.author_id], f'thread:{thread.pk}', instance.author_id, data)
+    notify_mentions(instance.content, thread.group_id, f'thread:{thread.pk}', instance.author_id, data)
+
+
+@receiver(post_delete, sender=GroupMembership)
+def close_sockets_on_leave(sender, instance, **kwargs):
+    group_id, user_id = instance.group_id, instance.user_id
+    transaction.on_commit(lambda: notify_member_left(group_id, user_id))
+
@@ -1,3 +1,288 @@
-from django.test import TestCase
+"""
+Tests for forum models and endpoints.
+"""
+
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core import rendering
+from core.rendering import render
+from dawgpound.routing import websocket_urlpatterns
+from forums.models import Thread, Reply
+from groups.models import Group, GroupMembership
+from moderation.actions import delete_replies
+from users.models import User
+
+
+@pytest.fixture
+def group(authenticated_user):
+    group = Group.objects.create(name='CS 101', category='major', creator=authenticated_user)
+    GroupMembership.objects.create(user=authenticated_user, group=group)
+    return group
+
+
+@pytest.fixture
+def thread(group, authenticated_user):
+    return Thread.objects.create(group=group, author=authenticated_user, title='Welcome', content='Hi all')
+
+
+@pytest.mark.django_db
+class TestThreadEndpoints:
+    """Test thread creation and reply pagination."""
+
+    def test_member_can_create_thread(self, authenticated_client, group):
+        response = authenticated_client.post(
+            f'/api/forums/groups/{group.id}/threads/', {'title': 'Exam', 'content': 'When?'}, format='json'
+        )
+        assert response.status_code == 201
+        assert Thread.objects.filter(group=group, title='Exam').exists()
+
+    def test_non_member_cannot_create_thread(self, authenticated_client, authenticated_user):
+        other = Group.objects.create(name='Chess', category='interests_activities')
+        response = authenticated_client.post(
+            f'/api/forums/groups/{other.id}/threads/', {'title': 'Hi', 'content': 'Hello'}, format='json'
+        )
+        assert response.status_code == 403
+
+    def test_replies_page_from_oldest(self, authenticated_client, thread, authenticated_user):
+        for i in range(5):
+            Reply.objects.create(thread=thread, author=authenticated_user, content=f'reply {i}')
+
+        response = authenticated_client.get(f'/api/forums/threads/{thread.id}/replies/?page_size=2')
+        assert response.status_code == 200
+        assert [r['content'] for r in response.data['results']] == ['reply 0', 'reply 1']
+        assert response.data['previous'] is None
+
+        response = authenticated_client.get(response.data['next'])
+        assert [r['content'] for r in response.data['results']] == ['reply 2', 'reply 3']
+
+        response = authenticated_client.get(f'/api/forums/threads/{thread.id}/')
+        assert response.data['reply_count'] == 5
+
+    def test_locked_thread_rejects_replies(self, authenticated_client, thread):
+        thread.locked = True
+        thread.save()
+        response = authenticated_client.post(
+            f'/api/forums/threads/{thread.id}/replies/', {'content': 'late'}, format='json'
+        )
+        assert response.status_code == 403
+        assert not Reply.objects.filter(thread=thread).exists()
+
+
+@pytest.mark.django_db
+class TestLastActivity:
+    """Test the maintained last-activity columns and the activity ordering."""
+
+    def test_follows_replies(self, thread, authenticated_user):
+        other = User.objects.create_user(
+            username='other', email='other@example.com', university_email='other@university.edu', password='x'
+        )
+        assert (thread.last_reply_id, thread.last_reply_author_id) == (None, None)
+
+        first = Reply.objects.create(thread=thread, author=other, content='first')
+        second = Reply.objects.create(thread=thread, author=authenticated_user, content='second')
+        thread.refresh_from_db()
+        assert (thread.last_activity_at, thread.last_reply_id, thread.last_reply_author_id) == (
+            second.created_at, second.pk, authenticated_user.pk
+        )
+
+        # Deleting an older reply leaves the columns alone; the latest falls back.
+        Reply.objects.create(thread=thread, author=other, content='third').delete()
+        thread.refresh_from_db()
+        assert thread.last_reply_id == second.pk
+        second.delete()
+        thread.refresh_from_db()
+        assert (thread.last_activity_at, thread.last_reply_id, thread.last_reply_author_id) == (
+            first.created_at, first.pk, other.pk
+        )
+
+        delete_replies(authenticated_user, Reply.objects.filter(thread=thread))
+        thread.refresh_from_db()
+        assert (thread.last_activity_at, thread.last_reply_id, thread.last_reply_author_id) == (
+            thread.created_at, None, None
+        )
+
+    def test_active_ordering(self, authenticated_client, authenticated_user, group):
+        threads = [
+            Thread.objects.create(group=group, author=authenticated_user, title=f'thread {i}', content='hi')
+            for i in range(5)
+        ]
+        Thread.objects.filter(pk=threads[0].pk).update(pinned=True)
+        for thread in (threads[3], threads[1]):
+            Reply.objects.create(thread=thread, author=authenticated_user, content='bump')
+        # Replies bulk-created elsewhere must not reach the listing query.
+        Thread.objects.filter(pk=threads[2].pk).update(last_activity_at=threads[2].created_at - timedelta(days=1))
+
+        url = f'/api/forums/groups/{group.pk}/threads/'
+        response = authenticated_client.get(url)
+        assert [t['title'] for t in response.data['results']] == [
+            'thread 0', 'thread 4', 'thread 3', 'thread 2', 'thread 1'
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(f'{url}?ordering=active&page_size=2')
+        assert response.status_code == 200
+        titles = [t['title'] for t in response.data['results']]
+        assert titles == ['thread 1', 'thread 3']
+        assert response.data['results'][0]['last_reply_author']['id'] == authenticated_user.pk
+        listing = [q['sql'] for q in queries if 'FROM "threads"' in q['sql']]
+        assert len(listing) == 1
+        assert '"replies"' not in listing[0] and 'ORDER BY "threads"."last_activity_at" DESC' in listing[0]
+
+        while response.data['previous']:
+            response = authenticated_client.get(response.data['previous'])
+            titles += [t['title'] for t in response.data['results']]
+        assert titles == ['thread 1', 'thread 3', 'thread 4', 'thread 0', 'thread 2']
+
+        assert authenticated_client.get(f'{url}?ordering=replies').status_code == 400
+
+
+class TestRender:
+    """Test the content renderers."""
+
+    def test_markdown(self):
+        html = render(
+            '# Notes\nSee **this** and `a<b>`, [docs](https://example.com/?a=1&b=2)\n\n- one\n- two', 'markdown'
+        )
+        assert html == (
+            '<h1>Notes</h1>\n'
+            '<p>See <strong>this</strong> and <code>a&lt;b&gt;</code>, '
+            '<a href="https://example.com/?a=1&amp;b=2" rel="nofollow noopener">docs</a></p>\n'
+            '<ul>\n<li>one</li>\n<li>two</li>\n</ul>'
+        )
+        assert render('<script>alert(1)</script> [x](javascript:void)', 'markdown') == (
+            '<p>&lt;script&gt;alert(1)&lt;/script&gt; x</p>'
+        )
+
+    def test_html_is_sanitized(self):
+        html = render(
+            '<p onclick="steal()">Hi <a href="java&#x09;script:alert(1)">x</a><script>alert(1)</script>'
+            '<img src=x onerror=alert(1)><b>open',
+            'html',
+        )
+        assert html == '<p>Hi <a rel="nofollow noopener">x</a><b>open</b></p>'
+
+    def test_plain(self):
+        assert render('a < b\nc\n\nd', 'plain') == '<p>a &lt; b<br>\nc</p>\n<p>d</p>'
+
+
+@pytest.mark.django_db
+class TestRenderedContent:
+    """Test that content is rendered on write and served pre-rendered."""
+
+    @pytest.fixture
+    def renders(self, monkeypatch):
+        calls = []
+
+        def counting(content, content_type):
+            calls.append(content_type)
+            return real(content, content_type)
+
+        real = rendering.render
+        monkeypatch.setattr(rendering, 'render', counting)
+        return calls
+
+    def test_rendered_on_write(self, authenticated_client, group, renders):
+        response = authenticated_client.post(f'/api/forums/groups/{group.pk}/threads/', {
+            'title': 'Exam', 'content': 'When is **it**?', 'content_type': 'markdown',
+        }, format='json')
+        assert response.data['content_html'] == '<p>When is <strong>it</strong>?</p>'
+        thread = Thread.objects.get(pk=response.data['id'])
+        assert (thread.content_html, thread.render_version) == (response.data['content_html'], 1)
+
+        thread.locked = True
+        thread.save(update_fields=['locked'])
+        assert renders == ['markdown']
+        authenticated_client.get(f'/api/forums/threads/{thread.pk}/')
+        assert renders == ['markdown']
+
+    def test_thread_page_does_no_rendering(
+            self, authenticated_client, authenticated_user, thread, renders, monkeypatch):
+        Reply.objects.bulk_create([
+            Reply(thread=thread, author=authenticated_user, content=f'reply *{i}*', content_type='markdown')
+            for i in range(200)
+        ])
+        url = f'/api/forums/threads/{thread.pk}/replies/?page_size=200'
+
+        # Rows inserted without save() are rendered once, on first read.
+        response = authenticated_client.get(url)
+        assert response.data['results'][7]['content_html'] == '<p>reply <em>7</em></p>'
+        assert len(renders) == 200
+
+        renders.clear()
+        response = authenticated_client.get(url)
+        assert len(response.data['results']) == 200
+        assert response.data['results'][7]['content_html'] == '<p>reply <em>7</em></p>'
+        assert renders == []
+
+        # A new renderer version re-renders lazily, once.
+        monkeypatch.setattr(rendering, 'RENDERER_VERSION', 2)
+        authenticated_client.get(url)
+        assert len(renders) == 200
+        assert set(Reply.objects.values_list('render_version', flat=True)) == {2}
+        renders.clear()
+        authenticated_client.get(url)
+        assert renders == []
+
+
+def forum_socket(group, user):
+    communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/forum/{group.id}/')
+    communicator.scope['user'] = user
+    return communicator
+
+
+@pytest.mark.django_db
+class TestForumConsumer:
+    """Test the live forum event stream."""
+
+    def test_member_receives_group_events(self, group, authenticated_user, django_capture_on_commit_callbacks):
+        @database_sync_to_async
+        def write(action):
+            with django_capture_on_commit_callbacks(execute=True):
+                return action()
+
+        @async_to_sync
+        async def run():
+            socket = forum_socket(group, authenticated_user)
+            assert (await socket.connect())[0]
+            assert (await socket.receive_json_from())['type'] == 'connected'
+
+            thread = await write(lambda: Thread.objects.create(
+                group=group, author=authenticated_user, title='Exam', content='When?'
+            ))
+            await write(lambda: Reply.objects.create(thread=thread, author=authenticated_user, content='Friday'))
+            thread.pinned = True
+            await write(lambda: thread.save(update_fields=['pinned']))
+            await write(thread.delete)
+
+            events = [await socket.receive_json_from() for _ in range(4)]
+            assert await socket.receive_nothing()
+
+            await write(GroupMembership.objects.filter(user=authenticated_user, group=group).delete)
+            closed = await socket.receive_output()
+            await socket.disconnect()
+            return events, closed
+
+        events, closed = run()
+        assert [e['type'] for e in events] == ['thread_created', 'reply_created', 'thread_updated', 'thread_deleted']
+        assert events[0]['thread']['title'] == 'Exam'
+        assert events[1]['reply']['content'] == 'Friday'
+        assert events[2]['updates'] == {'pinned': True}
+        assert closed['type'] == 'websocket.close'
+
+    def test_non_member_is_rejected(self, authenticated_user):
+        other = Group.objects.create(name='Chess', category='interests_activities')
+
+        @async_to_sync
+        async def connect():
+            connected, _ = await forum_socket(other, authenticated_user).connect()
+            return connected
+
+        assert not connect()
 
-# Create your tests here.
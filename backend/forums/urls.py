@@ -5,9 +5,18 @@ URLs for the forums app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-# Router will be configured when views are created
+from core.asyncviews import split_methods
+from .views import GroupThreadListView, ThreadViewSet, thread_detail
+
 router = DefaultRouter()
+router.register('threads', ThreadViewSet, basename='thread')
 
 urlpatterns = [
+    path('groups/<int:group_id>/threads/', GroupThreadListView.as_view(), name='group-threads'),
+    path(
+        'threads/<int:pk>/',
+        split_methods(thread_detail, ThreadViewSet.as_view({'get': 'retrieve'})),
+        name='thread-detail',
+    ),
     path('', include(router.urls)),
 ]
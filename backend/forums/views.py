@@ -1,3 +1,122 @@
-from django.shortcuts import render
+"""
+Views for the forums app.
+"""
+
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.response import Response
+
+from core.asyncviews import api_view
+from core.pagination import KeysetPagination
+from groups.models import Group, GroupMembership
+from moderation.bans import NotBanned
+from users.cache import aattach_users, attach_users
+from .models import Thread, Reply
+from .rendering import arefresh_rendered, refresh_rendered
+from .serializers import ThreadSerializer, ReplySerializer
+
+
+class ReplyPagination(KeysetPagination):
+    """Threads are read top-down, so replies open on the oldest page."""
+    start_from = 'earliest'
+
+
+class ActivityPagination(KeysetPagination):
+    """Most recently active threads first, seeking on ``last_activity_at``."""
+    ordering_field = 'last_activity_at'
+    newest_first = True
+
+
+def _require_membership(user, group_id, message):
+    if not GroupMembership.objects.filter(user=user, group_id=group_id).exists():
+        raise PermissionDenied(message)
+
+
+class GroupThreadListView(generics.ListCreateAPIView):
+    """
+    List threads in a group, or start a new one (members only).
+
+    Threads are listed pinned first, then newest first. ``?ordering=active``
+    lists them by last reply instead, paged by keyset over the maintained
+    ``last_activity_at`` (see ``forums.activity``) so each page is one range
+    scan of the ``(group, -last_activity_at, -id)`` index. Pinned threads
+    are not lifted to the top in that order.
+    """
+    serializer_class = ThreadSerializer
+    permission_classes = [permissions.IsAuthenticated, NotBanned]
+    orderings = ('created', 'active')
+
+    def get_group(self):
+        return get_object_or_404(Group, pk=self.kwargs['group_id'])
+
+    def get_ordering(self):
+        ordering = self.request.query_params.get('ordering', 'created')
+        if ordering not in self.orderings:
+            raise ValidationError({'ordering': f'must be one of: {", ".join(self.orderings)}'})
+        return ordering
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            active = self.request.method == 'GET' and self.get_ordering() == 'active'
+            self._paginator = ActivityPagination() if active else self.pagination_class()
+        return self._paginator
+
+    def get_queryset(self):
+        return Thread.objects.filter(group_id=self.kwargs['group_id']).select_related(
+            'author', 'last_reply_author'
+        )
+
+    def paginate_queryset(self, queryset):
+        return refresh_rendered(super().paginate_queryset(queryset))
+
+    def perform_create(self, serializer):
+        group = self.get_group()
+        _require_membership(self.request.user, group.pk, 'must be a member to create threads')
+        serializer.save(group=group, author=self.request.user)
+
+
+class ThreadViewSet(mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Thread detail (GETs are normally served by the async ``thread_detail``).
+
+    ``replies`` lists the thread's replies with keyset pagination and accepts
+    new replies from group members while the thread is unlocked.
+    """
+    serializer_class = ThreadSerializer
+    queryset = Thread.objects.select_related('author', 'last_reply_author')
+
+    @action(detail=True, methods=['get', 'post'], pagination_class=ReplyPagination,
+            permission_classes=[permissions.IsAuthenticated, NotBanned])
+    def replies(self, request, pk=None):
+        thread = self.get_object()
+
+        if request.method == 'POST':
+            _require_membership(request.user, thread.group_id, 'must be a member to reply')
+            if thread.locked:
+                raise PermissionDenied('thread is locked')
+            serializer = ReplySerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(thread=thread, author=request.user)
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        queryset = Reply.objects.filter(thread=thread)
+        page = refresh_rendered(attach_users(self.paginate_queryset(queryset)))
+        serializer = ReplySerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+@api_view
+async def thread_detail(request, user, pk):
+    """Async ``GET /api/forums/threads/<pk>/``; the author comes from the user cache."""
+    try:
+        thread = await Thread.objects.aget(pk=pk)
+    except Thread.DoesNotExist:
+        raise NotFound()
+    await aattach_users([thread])
+    await aattach_users([thread], 'last_reply_author')
+    await arefresh_rendered([thread])
+    return ThreadSerializer(thread).data
 
-# Create your views here.
@@ -13,12 +13,8 @@ class GroupAdmin(admin.ModelAdmin):
     list_filter = ['category', 'created_at']
     search_fields = ['name', 'description', 'tags']
     filter_horizontal = ['moderators']
+    readonly_fields = ['member_count']
     ordering = ['-created_at']
-    
-    def member_count(self, obj):
-        """Display member count."""
-        return obj.members.count()
-    member_count.short_description = 'Members'
 
 
 @admin.register(GroupMembership)
@@ -0,0 +1,134 @@
+"""
+Group discovery for DawgPound.
+
+Recommends groups whose tags match the viewer's majors, interests and year,
+boosted by how many of the viewer's friends are members. Scores are read from
+the ``GroupTag`` inverted index and the sparse ``FriendGroupOverlap`` counts,
+both of which are maintained incrementally by ``groups.tasks``.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Sum, Value, When
+
+from users.discovery import tag_match_q
+from users.models import FriendEdge
+from .models import Group, GroupMembership, GroupTag, FriendGroupOverlap
+
+
+MAJOR_WEIGHT = 10
+INTEREST_WEIGHT = 8
+YEAR_WEIGHT = 15
+FRIEND_WEIGHT = 7
+
+
+def group_tag_postings(group):
+    """Return the set of ``(kind, value)`` tags for a group."""
+    kind = GroupTag.CATEGORY_TAG_KINDS.get(group.category)
+    if kind is None:
+        return set()
+    return {(kind, tag) for tag in group.tags or [] if tag}
+
+
+@transaction.atomic
+def index_group(group):
+    """Bring a group's ``GroupTag`` postings in line with its tags."""
+    wanted = group_tag_postings(group)
+    existing = set(GroupTag.objects.filter(group=group).values_list('kind', 'value'))
+
+    stale = existing - wanted
+    if stale:
+        stale_q = Q()
+        for kind, value in stale:
+            stale_q |= Q(kind=kind, value=value)
+        GroupTag.objects.filter(stale_q, group=group).delete()
+
+    GroupTag.objects.bulk_create(
+        [GroupTag(group=group, kind=kind, value=value) for kind, value in wanted - existing],
+        ignore_conflicts=True
+    )
+
+
+@transaction.atomic
+def refresh_friend_overlap(user_ids, group_ids=None):
+    """
+    Recompute ``FriendGroupOverlap`` for ``user_ids`` in ``group_ids``.
+
+    Counts are recomputed from friendships and memberships rather than
+    incremented, so replaying or reordering refreshes cannot drift. With no
+    ``group_ids`` every group is refreshed for the given users.
+    """
+    user_ids = set(user_ids)
+    if not user_ids or group_ids is not None and not group_ids:
+        return
+
+    friends = defaultdict(set)
+    for uid, friend_id in FriendEdge.objects.filter(user_id__in=user_ids).values_list('user_id', 'friend_id'):
+        friends[uid].add(friend_id)
+
+    memberships = GroupMembership.objects.filter(user_id__in=set().union(*friends.values()))
+    stale = FriendGroupOverlap.objects.filter(user_id__in=user_ids)
+    if group_ids is not None:
+        memberships = memberships.filter(group_id__in=group_ids)
+        stale = stale.filter(group_id__in=group_ids)
+
+    groups_of = defaultdict(list)
+    for uid, gid in memberships.values_list('user_id', 'group_id'):
+        groups_of[uid].append(gid)
+
+    rows = []
+    for uid in user_ids:
+        counts = Counter(gid for friend in friends[uid] for gid in groups_of[friend])
+        rows.extend(
+            FriendGroupOverlap(user_id=uid, group_id=gid, friend_count=count)
+            for gid, count in counts.items()
+        )
+
+    stale.delete()
+    FriendGroupOverlap.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+def recommend_groups(user, limit=10):
+    """
+    Return up to ``limit`` recommended groups for ``user``, best first.
+
+    Each entry is a dict with the ``group`` instance and its ``score``. Groups the user already belongs to
+    are never recommended.
+    """
+    if not user.onboarding_completed:
+        return []
+
+    my_group_ids = set(GroupMembership.objects.filter(user=user).values_list('group_id', flat=True))
+
+    scores = Counter(dict(
+        GroupTag.objects
+        .filter(tag_match_q(user))
+        .exclude(group_id__in=my_group_ids)
+        .values('group_id')
+        .annotate(score=Sum(Case(
+            When(kind='major', then=Value(MAJOR_WEIGHT)),
+            When(kind='interest', then=Value(INTEREST_WEIGHT)),
+            When(kind='year', then=Value(YEAR_WEIGHT)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )))
+        .values_list('group_id', 'score')
+    ))
+    for gid, count in (
+        FriendGroupOverlap.objects
+        .filter(user=user)
+        .exclude(group_id__in=my_group_ids)
+        .values_list('group_id', 'friend_count')
+    ):
+        scores[gid] += count * FRIEND_WEIGHT
+
+    top = sorted(
+        ((gid, score) for gid, score in scores.items() if score > 0),
+        key=lambda item: (-item[1], item[0])
+    )[:limit]
+    groups = Group.objects.in_bulk([gid for gid, _ in top])
+    return [
+        {'group': groups[gid], 'score': score}
+        for gid, score in top if gid in groups
+    ]
@@ -0,0 +1,49 @@
+"""
+Cached discovery feed.
+
+The feed (recommended groups and users) is built from the precomputed
+discovery indexes, but still takes a dozen queries. It is cached per user in
+``core.cache`` for ``DISCOVERY_FEED_CACHE_TTL`` seconds, already
+serialized, so the async feed endpoint usually answers from the local tier
+without touching the database. A user's feed is dropped when they join or
+leave a group; other changes show up when the entry expires.
+"""
+
+from django.conf import settings
+
+from core.cache import TwoTierCache
+from users.cache import get_users
+from users.discovery import recommend_users
+from users.serializers import RecommendedUserSerializer
+from .discovery import recommend_groups
+from .serializers import RecommendedGroupSerializer
+
+
+def _load_feeds(user_ids):
+    return {
+        user_id: {
+            'groups': list(RecommendedGroupSerializer(recommend_groups(user), many=True).data),
+            'users': list(RecommendedUserSerializer(recommend_users(user), many=True).data),
+        }
+        for user_id, user in get_users(user_ids).items()
+    }
+
+
+feed_cache = TwoTierCache(
+    'discovery_feed',
+    _load_feeds,
+    local_ttl=getattr(settings, 'DISCOVERY_FEED_CACHE_LOCAL_TTL', 5),
+    shared_ttl=getattr(settings, 'DISCOVERY_FEED_CACHE_TTL', 60),
+)
+
+
+def get_feed(user):
+    return feed_cache.get(user.pk)
+
+
+async def aget_feed(user):
+    return await feed_cache.aget(user.pk)
+
+
+def invalidate_feed(*user_ids):
+    feed_cache.invalidate(*user_ids)
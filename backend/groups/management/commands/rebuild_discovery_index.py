@@ -0,0 +1,45 @@
+"""
+Rebuild the discovery indexes from scratch.
+"""
+
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from groups.discovery import index_group, refresh_friend_overlap
+from groups.models import Group
+from users.discovery import index_user
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Rebuild user/group tag postings and friend-in-group counts from the source tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of users refreshed per friend-overlap batch (default: 500).'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        users = 0
+        for user in User.objects.order_by('pk').iterator(chunk_size=batch_size):
+            index_user(user)
+            users += 1
+
+        groups = 0
+        for group in Group.objects.order_by('pk').iterator(chunk_size=batch_size):
+            index_group(group)
+            groups += 1
+
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=batch_size)
+        while batch := list(islice(user_ids, batch_size)):
+            refresh_friend_overlap(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Reindexed {users} users and {groups} groups.'
+        ))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FriendGroupOverlap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('friend_count', models.PositiveIntegerField(default=0)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friend_overlaps', to='groups.group')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friend_group_overlaps', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'friend_group_overlaps',
+                'indexes': [models.Index(fields=['user', '-friend_count'], name='friend_grou_user_id_c20a3b_idx')],
+                'unique_together': {('user', 'group')},
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=255)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_index', to='groups.group')),
+            ],
+            options={
+                'db_table': 'group_tags',
+                'indexes': [models.Index(fields=['kind', 'value'], name='group_tags_kind_0ac37c_idx')],
+                'unique_together': {('group', 'kind', 'value')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:04
+
+from django.db import migrations, models
+
+from core.counters import reconcile_counter
+
+
+def backfill_counters(apps, schema_editor):
+    Group = apps.get_model('groups', 'Group')
+    GroupMembership = apps.get_model('groups', 'GroupMembership')
+    reconcile_counter(Group, 'member_count', GroupMembership, 'group')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('groups', '0003_friendgroupoverlap_grouptag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='member_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
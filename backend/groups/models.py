@@ -43,6 +43,9 @@ class Group(models.Model):
         blank=True
     )
     
+    # Denormalized counters, maintained by signals (see core.counters)
+    member_count = models.PositiveIntegerField(default=0, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -85,3 +88,66 @@ class GroupMembership(models.Model):
     def __str__(self):
         return f"{self.user.username} in {self.group.name}"
 
+
+
+class GroupTag(models.Model):
+    """
+    Inverted index entry mapping a tag to a group.
+
+    The tag kind follows the group's category, so a ``major`` group's tags
+    are matched against user majors, ``interests_activities`` against
+    interests and ``class_year`` against year of study.
+    """
+    CATEGORY_TAG_KINDS = {
+        'major': 'major',
+        'interests_activities': 'interest',
+        'class_year': 'year',
+    }
+
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='tag_index'
+    )
+    kind = models.CharField(max_length=20)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        db_table = 'group_tags'
+        unique_together = [['group', 'kind', 'value']]
+        indexes = [
+            models.Index(fields=['kind', 'value']),
+        ]
+
+    def __str__(self):
+        return f"{self.group.name}: {self.kind}={self.value}"
+
+
+class FriendGroupOverlap(models.Model):
+    """
+    Sparse count of a user's friends who are members of a group.
+
+    Only non-zero counts are stored. Maintained when memberships or
+    friendships change so discovery never recomputes friend sets.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='friend_group_overlaps'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='friend_overlaps'
+    )
+    friend_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'friend_group_overlaps'
+        unique_together = [['user', 'group']]
+        indexes = [
+            models.Index(fields=['user', '-friend_count']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.friend_count} friends in {self.group.name}"
@@ -0,0 +1,29 @@
+"""
+Serializers for the groups app.
+"""
+
+from rest_framework import serializers
+
+from .models import Group
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    """Serializer for public groups."""
+    class Meta:
+        model = Group
+        fields = ['id', 'name', 'description', 'category', 'tags', 'creator', 'member_count', 'created_at']
+        read_only_fields = ['id', 'creator', 'member_count', 'created_at']
+
+    def validate_name(self, value):
+        value = value.strip()
+        if not value:
+            raise serializers.ValidationError('name is required')
+        if len(value) > 100:
+            raise serializers.ValidationError('name must be 100 characters or less')
+        return value
+
+
+class RecommendedGroupSerializer(serializers.Serializer):
+    """A group recommendation and its relevance score."""
+    group = GroupSerializer()
+    score = serializers.IntegerField()
@@ -0,0 +1,62 @@
+"""
+Signal handlers for the groups app.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.counters import adjust_counter
+from .feed import invalidate_feed
+from .models import Group, GroupMembership
+from . import tasks
+
+
+@receiver(post_save, sender=Group)
+def reindex_group_on_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'tags', 'category'} & set(update_fields):
+        return
+    group_id = instance.pk
+    transaction.on_commit(lambda: tasks.reindex_group.delay(group_id))
+
+
+def _membership_changed(user_id, group_id):
+    invalidate_feed(user_id)
+    transaction.on_commit(lambda: tasks.membership_changed.delay(user_id, group_id))
+
+
+@receiver(post_save, sender=GroupMembership)
+@receiver(post_delete, sender=GroupMembership)
+def refresh_overlap_on_membership_change(sender, instance, **kwargs):
+    if kwargs.get('created') is False:
+        return
+    _membership_changed(instance.user_id, instance.group_id)
+
+
+@receiver(post_save, sender=GroupMembership)
+def count_membership_on_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(Group, instance.group_id, 'member_count', 1)
+
+
+@receiver(post_delete, sender=GroupMembership)
+def count_membership_on_delete(sender, instance, **kwargs):
+    adjust_counter(Group, instance.group_id, 'member_count', -1)
+
+
+@receiver(m2m_changed, sender=GroupMembership)
+def refresh_overlap_on_members_add(sender, instance, action, reverse, pk_set, **kwargs):
+    # ``group.members.add()`` bulk-creates memberships without post_save;
+    # removals go through post_delete above.
+    if action != 'post_add':
+        return
+    if reverse:
+        for pk in pk_set:
+            adjust_counter(Group, pk, 'member_count', 1)
+    else:
+        adjust_counter(Group, instance.pk, 'member_count', len(pk_set))
+    for pk in pk_set:
+        if reverse:
+            _membership_changed(instance.pk, pk)
+        else:
+            _membership_changed(pk, instance.pk)
@@ -0,0 +1,23 @@
+"""
+Celery tasks for the groups app.
+"""
+
+from celery import shared_task
+
+from users.friends import friend_ids
+from .discovery import index_group, refresh_friend_overlap
+from .models import Group
+
+
+@shared_task(ignore_result=True)
+def reindex_group(group_id):
+    """Refresh a group's discovery tag postings after its tags change."""
+    group = Group.objects.filter(pk=group_id).first()
+    if group is not None:
+        index_group(group)
+
+
+@shared_task(ignore_result=True)
+def membership_changed(user_id, group_id):
+    """Refresh friend-in-group counts for a user's friends after a join or leave."""
+    refresh_friend_overlap(friend_ids(user_id), [group_id])
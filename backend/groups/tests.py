@@ -1,3 +1,136 @@
-from django.test import TestCase
+"""
+Tests for groups and discovery.
+"""
 
-# Create your tests here.
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+from groups.models import Group, GroupMembership, GroupTag, FriendGroupOverlap
+from users.models import Friendship, UserTag
+
+
+User = get_user_model()
+
+
+def make_user(username, **profile):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        university_email=f'{username}@university.edu',
+        password='pass123',
+        verified_at=timezone.now(),
+        onboarding_completed=True,
+        **profile
+    )
+
+
+@pytest.fixture
+def onboarded_user(authenticated_user):
+    authenticated_user.majors = ['Computer Science']
+    authenticated_user.interests_hobbies = ['Music', 'Gaming']
+    authenticated_user.year_of_study = 'Junior'
+    authenticated_user.onboarding_completed = True
+    authenticated_user.save()
+    return authenticated_user
+
+
+@pytest.mark.django_db
+class TestGroupEndpoints:
+    """Test group browsing and membership."""
+
+    def test_join_and_leave(self, authenticated_client, authenticated_user):
+        group = Group.objects.create(name='Chess', category='interests_activities')
+
+        response = authenticated_client.post(f'/api/groups/{group.id}/join/')
+        assert response.status_code == 200
+        assert GroupMembership.objects.filter(user=authenticated_user, group=group).exists()
+
+        response = authenticated_client.get(f'/api/groups/{group.id}/')
+        assert response.data['member_count'] == 1
+
+        response = authenticated_client.post(f'/api/groups/{group.id}/leave/')
+        assert response.status_code == 200
+        assert not GroupMembership.objects.filter(user=authenticated_user, group=group).exists()
+
+    def test_only_staff_create_groups(self, authenticated_client):
+        response = authenticated_client.post(
+            '/api/groups/', {'name': 'New', 'category': 'other'}, format='json'
+        )
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestDiscoveryFeed:
+    """Test the index-backed discovery feed."""
+
+    def test_indexes_follow_profile_and_group_changes(self, onboarded_user, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            group = Group.objects.create(name='CS', category='major', tags=['Computer Science'])
+            onboarded_user.majors = ['Mathematics']
+            onboarded_user.save()
+
+        assert set(GroupTag.objects.filter(group=group).values_list('kind', 'value')) == {
+            ('major', 'Computer Science')
+        }
+        assert ('major', 'Mathematics') in set(onboarded_user.tags.values_list('kind', 'value'))
+        assert ('major', 'Computer Science') not in set(onboarded_user.tags.values_list('kind', 'value'))
+
+    def test_friend_overlap_follows_membership(self, onboarded_user, django_capture_on_commit_callbacks):
+        friend = make_user('friend')
+        group = Group.objects.create(name='Band', category='interests_activities', tags=['Music'])
+        with django_capture_on_commit_callbacks(execute=True):
+            Friendship.objects.create(user1=onboarded_user, user2=friend)
+            group.members.add(friend)
+
+        overlap = FriendGroupOverlap.objects.get(user=onboarded_user, group=group)
+        assert overlap.friend_count == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            GroupMembership.objects.filter(user=friend, group=group).delete()
+        assert not FriendGroupOverlap.objects.filter(user=onboarded_user).exists()
+
+    def test_feed_ranks_groups_and_users(self, authenticated_client, onboarded_user,
+                                         django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            Group.objects.create(name='CS', category='major', tags=['Computer Science'])
+            band = Group.objects.create(name='Band', category='interests_activities', tags=['Music'])
+            Group.objects.create(name='Juniors', category='class_year', tags=['Junior'])
+            Group.objects.create(name='Art', category='interests_activities', tags=['Painting'])
+            joined = Group.objects.create(name='Gamers', category='interests_activities', tags=['Gaming'])
+            GroupMembership.objects.create(user=onboarded_user, group=joined)
+
+            classmate = make_user('classmate', majors=['Computer Science'], year_of_study='Junior')
+            gamer = make_user('gamer', interests_hobbies=['Gaming'])
+            blocked = make_user('blocked', majors=['Computer Science'], year_of_study='Junior')
+            make_user('unrelated', majors=['History'])
+            onboarded_user.blocked_users.add(blocked)
+            GroupMembership.objects.create(user=gamer, group=joined)
+            Friendship.objects.create(user1=onboarded_user, user2=gamer)
+            GroupMembership.objects.create(user=gamer, group=band)
+
+        response = authenticated_client.get('/api/discovery/feed/')
+        assert response.status_code == 200
+
+        groups = [(g['group']['name'], g['score']) for g in response.data['groups']]
+        # Band: Music (8) + one friend (7); ties fall back to group id.
+        assert groups == [('Band', 15), ('Juniors', 15), ('CS', 10)]
+
+        users = {u['user']['username']: u for u in response.data['users']}
+        assert set(users) == {'classmate', 'gamer'}
+        assert users['classmate']['score'] == 18
+        assert users['gamer']['score'] == 17
+        assert users['gamer']['is_friend'] is True
+        assert users['gamer']['shared_groups'] == 1
+
+    def test_rebuild_command_repairs_index(self, onboarded_user):
+        group = Group.objects.create(name='CS', category='major', tags=['Computer Science'])
+        UserTag.objects.all().delete()
+        GroupTag.objects.all().delete()
+
+        call_command('rebuild_discovery_index', stdout=StringIO())
+
+        assert UserTag.objects.filter(user=onboarded_user, kind='year', value='Junior').exists()
+        assert GroupTag.objects.filter(group=group, kind='major').exists()
@@ -5,9 +5,20 @@ URLs for the groups app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-# Router will be configured when views are created
+from core.asyncviews import split_methods
+from .views import GroupViewSet, group_list
+
 router = DefaultRouter()
+# Groups are served at the app root, so the browsable API root is dropped
+# to keep it from shadowing the list route.
+router.include_root_view = False
+router.register('', GroupViewSet, basename='group')
 
 urlpatterns = [
+    path(
+        '',
+        split_methods(group_list, GroupViewSet.as_view({'get': 'list', 'post': 'create'})),
+        name='group-list',
+    ),
     path('', include(router.urls)),
 ]
@@ -1,3 +1,75 @@
-from django.shortcuts import render
+"""
+Views for the groups app.
+"""
 
-# Create your views here.
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.asyncviews import api_view, paginate_page_number
+from moderation.bans import NotBanned
+from .feed import aget_feed, get_feed
+from .models import Group, GroupMembership
+from .serializers import GroupSerializer
+
+
+class GroupViewSet(mixins.ListModelMixin,
+                   mixins.RetrieveModelMixin,
+                   mixins.CreateModelMixin,
+                   viewsets.GenericViewSet):
+    """
+    Public groups. Any authenticated user may browse, join and leave;
+    only staff may create groups.
+    """
+    serializer_class = GroupSerializer
+
+    def get_queryset(self):
+        return Group.objects.all()
+
+    def get_permissions(self):
+        if self.action == 'create':
+            return [permissions.IsAdminUser()]
+        return super().get_permissions()
+
+    def perform_create(self, serializer):
+        serializer.save(creator=self.request.user)
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, NotBanned])
+    def join(self, request, pk=None):
+        group = self.get_object()
+        _, created = GroupMembership.objects.get_or_create(user=request.user, group=group)
+        if not created:
+            return Response({'error': 'already a member'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'joined group'})
+
+    @action(detail=True, methods=['post'])
+    def leave(self, request, pk=None):
+        group = self.get_object()
+        deleted, _ = GroupMembership.objects.filter(user=request.user, group=group).delete()
+        if not deleted:
+            return Response({'error': 'not a member'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'message': 'left group'})
+
+
+class DiscoveryFeedView(APIView):
+    """
+    Unified discovery feed: recommended groups and users for the requester,
+    served from the precomputed discovery indexes through ``groups.feed``.
+    GETs are normally served by the async ``discovery_feed``.
+    """
+
+    def get(self, request):
+        return Response(get_feed(request.user))
+
+
+@api_view
+async def group_list(request, user):
+    """Async ``GET /api/groups/``, paged like ``GroupViewSet.list``."""
+    return await paginate_page_number(request, Group.objects.all(), GroupSerializer)
+
+
+@api_view
+async def discovery_feed(request, user):
+    """Async ``GET /api/discovery/feed/``, usually a local cache hit."""
+    return await aget_feed(user)
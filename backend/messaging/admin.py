@@ -3,6 +3,8 @@ Admin configuration for messaging app.
 """
 
 from django.contrib import admin
+
+from core.search import FullTextSearchAdminMixin
 from .models import PrivateChat, ChatParticipant, Message
 
 
@@ -11,17 +13,8 @@ class PrivateChatAdmin(admin.ModelAdmin):
     """Admin for PrivateChat model."""
     list_display = ['name', 'participant_count', 'message_count', 'created_at']
     search_fields = ['name']
+    readonly_fields = ['participant_count', 'message_count']
     ordering = ['-created_at']
-    
-    def participant_count(self, obj):
-        """Display participant count."""
-        return obj.participants.count()
-    participant_count.short_description = 'Participants'
-    
-    def message_count(self, obj):
-        """Display message count."""
-        return obj.messages.count()
-    message_count.short_description = 'Messages'
 
 
 @admin.register(ChatParticipant)
@@ -34,7 +27,7 @@ class ChatParticipantAdmin(admin.ModelAdmin):
 
 
 @admin.register(Message)
-class MessageAdmin(admin.ModelAdmin):
+class MessageAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     """Admin for Message model."""
     list_display = ['chat', 'author', 'content_preview', 'created_at']
     list_filter = ['created_at']
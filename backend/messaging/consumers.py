@@ -0,0 +1,263 @@
+"""
+WebSocket consumers for the messaging app.
+
+Clients connect to ``ws/chat/<chat_id>/`` and send
+``{"type": "message", "content": "...", "client_id": "..."}``. Messages are
+not written one by one: each process coalesces them per chat for up to
+``CHAT_FLUSH_INTERVAL`` seconds (or ``CHAT_FLUSH_MAX_BATCH`` messages),
+stores the batch with a single ``bulk_create`` and fans it out to the chat's
+channel-layer group as one ``{"type": "messages", "messages": [...]}`` event.
+``client_id`` is echoed back so senders can match their own messages. If
+the batch cannot be stored, each sender gets ``{"type": "error", "error":
+..., "client_id": ...}`` for every message of theirs that was lost.
+
+Sockets also report ``{"type": "typing", "typing": true|false}`` and
+``{"type": "read", "message_id": ...}``. These are kept in the cache by
+``messaging.ephemeral`` rather than the database and broadcast as
+``{"type": "typing", "user": ..., "typing": ...}`` and ``{"type": "read",
+"user": ..., "message_id": ...}``. ``{"type": "state"}`` asks for who is
+typing and every participant's read position.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import defaultdict
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.querycount import QueryBudgetConsumerMixin, record_queries
+from moderation.bans import BanGuardConsumerMixin
+from . import ephemeral
+from .models import ChatParticipant, Message, PrivateChat
+from .serializers import MessageSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def chat_group_name(chat_id):
+    return f'chat_{chat_id}'
+
+
+def save_messages(chat_id, batch):
+    """
+    Store a batch of ``(author, content, client_id)`` entries for one chat.
+
+    ``bulk_create`` skips the signals, so ``message_count``,
+    ``last_message`` and ``updated_at`` are set here in the same
+    transaction. Returns the serialized messages, each with its
+    ``client_id``.
+    """
+    with transaction.atomic():
+        messages = Message.objects.bulk_create([
+            Message(chat_id=chat_id, author=author, content=content)
+            for author, content, _ in batch
+        ])
+        PrivateChat.objects.filter(pk=chat_id).update(
+            message_count=F('message_count') + len(messages),
+            last_message=messages[-1],
+            updated_at=timezone.now()
+        )
+    data = MessageSerializer(messages, many=True).data
+    for item, (_, _, client_id) in zip(data, batch):
+        item['client_id'] = client_id
+    return data
+
+
+class MessageBuffer:
+    """
+    Per-process write buffer that coalesces chat messages into batches.
+
+    The first message for a chat starts a flush timer; later messages join
+    the pending batch until the timer fires or the batch is full. Each entry
+    remembers the sender's channel so a failed flush can be reported back.
+    """
+
+    def __init__(self):
+        self.pending = defaultdict(list)
+        self.timers = {}
+
+    def add(self, chat_id, author, content, client_id=None, reply_channel=None):
+        self.pending[chat_id].append((author, content, client_id, reply_channel))
+        max_batch = getattr(settings, 'CHAT_FLUSH_MAX_BATCH', 100)
+        if len(self.pending[chat_id]) >= max_batch:
+            return asyncio.ensure_future(self.flush(chat_id))
+        if chat_id not in self.timers:
+            self.timers[chat_id] = asyncio.ensure_future(self._flush_later(chat_id))
+
+    async def _flush_later(self, chat_id):
+        await asyncio.sleep(getattr(settings, 'CHAT_FLUSH_INTERVAL', 0.05))
+        self.timers.pop(chat_id, None)
+        await self.flush(chat_id)
+
+    async def flush(self, chat_id):
+        """Write and broadcast everything pending for ``chat_id``."""
+        timer = self.timers.pop(chat_id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        batch = self.pending.pop(chat_id, None)
+        if not batch:
+            return
+
+        try:
+            with record_queries('ws', 'ChatConsumer flush'):
+                messages = await database_sync_to_async(save_messages)(
+                    chat_id, [entry[:3] for entry in batch]
+                )
+        except Exception:
+            # The batch has left the buffer and flushes run in unawaited
+            # tasks, so nobody else will hear of this.
+            logger.exception('Failed to store %d chat messages for chat %s', len(batch), chat_id)
+            await self.report_failure(batch)
+            return
+        # Encoded once here; every subscriber forwards the same string.
+        text = json.dumps({'type': 'messages', 'messages': messages}, cls=DjangoJSONEncoder)
+        await get_channel_layer().group_send(chat_group_name(chat_id), {
+            'type': 'chat.messages',
+            'text': text,
+        })
+
+    async def report_failure(self, batch):
+        """Tell each sender in ``batch`` which of their messages were not stored."""
+        layer = get_channel_layer()
+        for _, _, client_id, reply_channel in batch:
+            if reply_channel is not None:
+                await layer.send(reply_channel, {
+                    'type': 'chat.error',
+                    'text': json.dumps({
+                        'type': 'error', 'error': 'message could not be sent', 'client_id': client_id,
+                    }),
+                })
+
+
+message_buffer = MessageBuffer()
+
+
+class ChatConsumer(QueryBudgetConsumerMixin, BanGuardConsumerMixin, AsyncJsonWebsocketConsumer):
+    """
+    Live chat for one private chat. Only participants may connect, and
+    globally banned users may not send messages.
+    """
+
+    async def connect(self):
+        self.chat_id = int(self.scope['url_route']['kwargs']['chat_id'])
+        self.group_name = chat_group_name(self.chat_id)
+        user = self.scope.get('user')
+
+        if user is None or not user.is_authenticated or not await self.is_participant(user):
+            await self.close(code=4403)
+            return
+
+        # Per-socket state so repeated reports cost nothing.
+        self.read_cursor = 0
+        self.typing_until = 0
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if getattr(self, 'typing_until', 0):
+            await self.report_typing(False)
+        # Don't leave this socket's messages waiting on a timer.
+        await message_buffer.flush(getattr(self, 'chat_id', None))
+
+    async def receive_json(self, content, **kwargs):
+        handler = {
+            'message': self.receive_message,
+            'typing': self.receive_typing,
+            'read': self.receive_read,
+            'state': self.receive_state,
+        }.get(content.get('type'))
+        if handler is None:
+            await self.send_json({'type': 'error', 'error': 'unsupported message type'})
+            return
+        await handler(content)
+
+    async def receive_message(self, content):
+        if await self.reject_banned():
+            return
+        serializer = MessageSerializer(data={'content': content.get('content', '')})
+        if not serializer.is_valid():
+            await self.send_json({'type': 'error', 'error': serializer.errors['content'][0]})
+            return
+
+        message_buffer.add(
+            self.chat_id,
+            self.scope['user'],
+            serializer.validated_data['content'],
+            content.get('client_id'),
+            self.channel_name,
+        )
+        if self.typing_until:
+            await self.report_typing(False)
+
+    async def receive_typing(self, content):
+        typing = bool(content.get('typing', True))
+        # While typing, refresh the indicator once per half TTL at most.
+        if typing and time.monotonic() < self.typing_until:
+            return
+        await self.report_typing(typing)
+
+    async def report_typing(self, typing):
+        ttl = getattr(settings, 'CHAT_TYPING_TTL', 6)
+        self.typing_until = time.monotonic() + ttl / 2 if typing else 0
+        await ephemeral.set_typing(self.chat_id, self.scope['user'].pk, typing)
+        await self.broadcast({'type': 'typing', 'user': self.scope['user'].pk, 'typing': typing})
+
+    async def receive_read(self, content):
+        message_id = content.get('message_id')
+        if not isinstance(message_id, int) or isinstance(message_id, bool) or message_id <= 0:
+            await self.send_json({'type': 'error', 'error': 'message_id must be a message id'})
+            return
+        if message_id <= self.read_cursor:
+            return
+        self.read_cursor = message_id
+        await ephemeral.set_read_cursor(self.chat_id, self.scope['user'].pk, message_id)
+        await self.broadcast({'type': 'read', 'user': self.scope['user'].pk, 'message_id': message_id})
+
+    async def receive_state(self, content):
+        stored = await self.read_positions()
+        cached = await ephemeral.read_cursors(self.chat_id, stored)
+        await self.send_json({
+            'type': 'state',
+            'typing': await ephemeral.typing_users(self.chat_id, stored),
+            'read': {
+                str(user_id): max(filter(None, [message_id, cached.get(user_id)]), default=None)
+                for user_id, message_id in stored.items()
+            },
+        })
+
+    async def broadcast(self, payload):
+        await self.channel_layer.group_send(self.group_name, {
+            'type': 'chat.state',
+            'text': json.dumps(payload),
+        })
+
+    async def chat_messages(self, event):
+        await self.send(text_data=event['text'])
+
+    async def chat_state(self, event):
+        await self.send(text_data=event['text'])
+
+    async def chat_error(self, event):
+        await self.send(text_data=event['text'])
+
+    @database_sync_to_async
+    def is_participant(self, user):
+        return ChatParticipant.objects.filter(chat_id=self.chat_id, user=user).exists()
+
+    @database_sync_to_async
+    def read_positions(self):
+        """``{user id: last read message id}`` as stored for each participant."""
+        return dict(
+            ChatParticipant.objects.filter(chat_id=self.chat_id).values_list('user_id', 'last_read_message_id')
+        )
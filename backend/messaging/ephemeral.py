@@ -0,0 +1,97 @@
+"""
+Ephemeral chat state: typing indicators and read cursors.
+
+Both live only in the shared cache (Redis in production) under keys with a
+TTL. A chat socket that reports typing or reading costs one cache write
+plus the channel-layer broadcast; neither touches the database.
+
+- Typing: ``chat:<chat>:typing:<user>`` exists for ``CHAT_TYPING_TTL``
+  seconds after the last report, so an indicator clears by itself when a
+  client goes away without saying so.
+- Read cursors: ``chat:<chat>:read:<user>`` holds the id of the newest
+  message the user has seen, for ``CHAT_READ_CURSOR_TTL`` seconds.
+
+``flush_read_cursors`` runs every ``CHAT_READ_CURSOR_FLUSH_SECONDS`` from
+Celery beat. It writes the latest cursor of every participant who still
+has unread messages to ``ChatParticipant`` in one bulk update per batch.
+Participants with nothing unread cannot have a newer cursor, so only they
+are skipped. Cursors are checked against the chat there rather than when
+they are reported, and a read position never moves backwards.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from .models import ChatParticipant, Message
+
+
+def typing_key(chat_id, user_id):
+    return f'chat:{chat_id}:typing:{user_id}'
+
+
+def read_key(chat_id, user_id):
+    return f'chat:{chat_id}:read:{user_id}'
+
+
+async def set_typing(chat_id, user_id, typing=True):
+    if typing:
+        await cache.aset(typing_key(chat_id, user_id), 1, getattr(settings, 'CHAT_TYPING_TTL', 6))
+    else:
+        await cache.adelete(typing_key(chat_id, user_id))
+
+
+async def typing_users(chat_id, user_ids):
+    """The subset of ``user_ids`` currently typing in the chat."""
+    keys = {typing_key(chat_id, user_id): user_id for user_id in user_ids}
+    found = await cache.aget_many(keys)
+    return sorted(keys[key] for key in found)
+
+
+async def set_read_cursor(chat_id, user_id, message_id):
+    await cache.aset(read_key(chat_id, user_id), message_id, getattr(settings, 'CHAT_READ_CURSOR_TTL', 86400))
+
+
+async def read_cursors(chat_id, user_ids):
+    """``{user id: message id}`` for the users with a cursor in the cache."""
+    keys = {read_key(chat_id, user_id): user_id for user_id in user_ids}
+    return {keys[key]: message_id for key, message_id in (await cache.aget_many(keys)).items()}
+
+
+def flush_read_cursors(batch_size=1000):
+    """
+    Write cached read cursors to ``ChatParticipant.last_read_message`` and
+    ``last_read_at``. Returns the number of participants updated.
+    """
+    candidates = (
+        ChatParticipant.objects
+        .annotate(read_since=Coalesce('last_read_at', 'joined_at'))
+        .filter(chat__last_message__created_at__gt=F('read_since'))
+        .only('pk', 'chat_id', 'user_id', 'last_read_at', 'joined_at')
+        .order_by('pk')
+    )
+    updated = 0
+    last_pk = 0
+    while batch := list(candidates.filter(pk__gt=last_pk)[:batch_size]):
+        last_pk = batch[-1].pk
+        keys = {read_key(participant.chat_id, participant.user_id): participant for participant in batch}
+        cursors = {keys[key]: message_id for key, message_id in cache.get_many(keys).items()}
+        if not cursors:
+            continue
+        messages = {
+            pk: (chat_id, created_at)
+            for pk, chat_id, created_at in Message.objects.filter(pk__in=set(cursors.values()))
+            .values_list('pk', 'chat_id', 'created_at')
+        }
+        changed = []
+        for participant, message_id in cursors.items():
+            chat_id, created_at = messages.get(message_id, (None, None))
+            if chat_id != participant.chat_id or created_at <= participant.read_since:
+                continue
+            participant.last_read_at = created_at
+            participant.last_read_message_id = message_id
+            changed.append(participant)
+        ChatParticipant.objects.bulk_update(changed, ['last_read_at', 'last_read_message'])
+        updated += len(changed)
+    return updated
@@ -0,0 +1,48 @@
+"""
+Create upcoming message partitions and move old ones to the archive tablespace.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from messaging.partitions import maintain_partitions
+
+
+class Command(BaseCommand):
+    help = 'Create future monthly partitions of the messages table and archive old ones (PostgreSQL only).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead',
+            type=int,
+            help='Months of future partitions to keep (default: MESSAGE_PARTITIONS_AHEAD).'
+        )
+        parser.add_argument(
+            '--archive-after',
+            type=int,
+            help='Archive partitions older than this many months (default: MESSAGE_ARCHIVE_AFTER_MONTHS).'
+        )
+        parser.add_argument(
+            '--tablespace',
+            help='Archive tablespace (default: MESSAGE_ARCHIVE_TABLESPACE; archiving is off when empty).'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Print the statements without running them.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING('Message partitioning requires PostgreSQL; nothing to do.'))
+            return
+        statements = maintain_partitions(
+            ahead=options['ahead'],
+            archive_after=options['archive_after'],
+            tablespace=options['tablespace'],
+            dry_run=options['dry_run'],
+        )
+        for statement in statements:
+            self.stdout.write(statement)
+        verb = 'Would run' if options['dry_run'] else 'Ran'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {len(statements)} partition statements.'))
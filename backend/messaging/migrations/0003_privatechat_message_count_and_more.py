@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:04
+
+from django.db import migrations, models
+
+from core.counters import reconcile_counter
+
+
+def backfill_counters(apps, schema_editor):
+    PrivateChat = apps.get_model('messaging', 'PrivateChat')
+    ChatParticipant = apps.get_model('messaging', 'ChatParticipant')
+    Message = apps.get_model('messaging', 'Message')
+    reconcile_counter(PrivateChat, 'participant_count', ChatParticipant, 'chat')
+    reconcile_counter(PrivateChat, 'message_count', Message, 'chat')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='privatechat',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='privatechat',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
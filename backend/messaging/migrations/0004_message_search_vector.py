@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:13
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from core.search import install_search_trigger, remove_search_trigger
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0003_privatechat_message_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search_trigger('messages'), remove_search_trigger('messages')),
+    ]
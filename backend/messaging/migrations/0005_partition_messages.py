@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:30
+
+from django.db import migrations
+
+from messaging.partitions import partition_messages
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0004_message_search_vector'),
+    ]
+
+    operations = [
+        # Not reversible in place; the partitioned table works with the
+        # same model, so rolling back leaves it partitioned.
+        migrations.RunPython(partition_messages, migrations.RunPython.noop),
+    ]
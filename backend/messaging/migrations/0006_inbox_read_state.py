@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+def backfill_read_state(apps, schema_editor):
+    PrivateChat = apps.get_model('messaging', 'PrivateChat')
+    ChatParticipant = apps.get_model('messaging', 'ChatParticipant')
+    Message = apps.get_model('messaging', 'Message')
+    latest = Message.objects.filter(chat=OuterRef('pk')).order_by('-created_at', '-pk').values('pk')[:1]
+    PrivateChat.objects.update(last_message=Subquery(latest))
+    # Existing conversations start out read rather than fully unread.
+    ChatParticipant.objects.update(last_read_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('messaging', '0005_partition_messages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatparticipant',
+            name='last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatparticipant',
+            name='last_read_message',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging.message'),
+        ),
+        migrations.AddField(
+            model_name='privatechat',
+            name='last_message',
+            field=models.ForeignKey(blank=True, db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='messaging.message'),
+        ),
+        migrations.RunPython(backfill_read_state, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@
 Messaging models for DawgPound.
 """
 
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 
@@ -20,6 +21,23 @@ class PrivateChat(models.Model):
         related_name='private_chats'
     )
     
+    # Denormalized counters, maintained by signals (see core.counters)
+    participant_count = models.PositiveIntegerField(default=0, editable=False)
+    message_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Newest message, kept current by messaging.signals and the chat
+    # consumer. No database constraint: ``messages`` is partitioned on
+    # PostgreSQL, so ``id`` alone cannot be referenced by a foreign key.
+    last_message = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        db_constraint=False,
+        related_name='+'
+    )
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -46,6 +64,17 @@ class ChatParticipant(models.Model):
     )
     muted = models.BooleanField(default=False)
     joined_at = models.DateTimeField(auto_now_add=True)
+
+    # Read position; messages from others after it count as unread.
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    last_read_message = models.ForeignKey(
+        'Message',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        related_name='+'
+    )
     
     class Meta:
         db_table = 'chat_participants'
@@ -76,6 +105,9 @@ class Message(models.Model):
     )
     content = models.TextField()
     
+    # Full-text index, maintained by a database trigger (see core.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     
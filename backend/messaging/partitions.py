@@ -0,0 +1,188 @@
+"""
+Monthly range partitioning of the ``messages`` table (PostgreSQL only).
+
+Migration 0005 turns ``messages`` into a table partitioned by month on
+``created_at``, with one partition per month named ``messages_pYYYY_MM``
+and a ``messages_default`` catch-all. The primary key becomes
+``(id, created_at)`` because PostgreSQL requires unique keys to include the
+partition key; ids still come from the one identity sequence. Every other
+index, foreign key and the search trigger are carried over.
+
+``maintain_partitions`` keeps ``MESSAGE_PARTITIONS_AHEAD`` months of future
+partitions in place, so new messages never land in the default partition.
+It also moves partitions older than ``MESSAGE_ARCHIVE_AFTER_MONTHS`` months,
+with their indexes, to the ``MESSAGE_ARCHIVE_TABLESPACE`` tablespace. That
+tablespace should live on cheaper, compressed storage. Archived partitions stay
+attached, so the chat history API reads them transparently. Recent history
+is paged with a ``created_at`` lower bound (see ``MessagePagination``), so
+partition pruning keeps those queries on the hot partitions.
+
+It runs daily from Celery beat and on demand through the
+``message_partitions`` command. On other databases (SQLite in the test
+suite) ``messages`` stays a plain table and these functions do nothing.
+"""
+
+from datetime import date, datetime, timezone
+
+from django.conf import settings
+from django.db import connection
+
+TABLE = 'messages'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month:%Y_%m}'
+
+
+def partition_month(name):
+    """The month a ``messages_pYYYY_MM`` partition holds, or ``None``."""
+    try:
+        return datetime.strptime(name, f'{TABLE}_p%Y_%m').date()
+    except ValueError:
+        return None
+
+
+def _bound(month):
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def create_partition_sql(month):
+    return (
+        f'CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE} '
+        f'FOR VALUES FROM ({_bound(month)}) TO ({_bound(add_months(month, 1))})'
+    )
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def partitions(cursor):
+    """``{partition name: tablespace or ''}`` for the monthly partitions."""
+    cursor.execute("""
+        SELECT c.relname, coalesce(t.spcname, '')
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        LEFT JOIN pg_tablespace t ON t.oid = c.reltablespace
+        WHERE i.inhparent = to_regclass(%s)
+    """, [TABLE])
+    return {name: tablespace for name, tablespace in cursor.fetchall() if partition_month(name)}
+
+
+def partition_messages(apps, schema_editor):
+    """Migration step converting ``messages`` into a partitioned table."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return
+        cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = to_regclass(%s) AND contype = 'f'
+        """, [TABLE])
+        foreign_keys = cursor.fetchall()
+        cursor.execute("""
+            SELECT i.indexname, i.indexdef FROM pg_indexes i
+            WHERE i.tablename = %s AND i.indexname NOT IN (
+                SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u')
+            )
+        """, [TABLE, TABLE])
+        indexes = cursor.fetchall()
+        cursor.execute(f'SELECT min(created_at) FROM {TABLE}')
+        oldest = cursor.fetchone()[0]
+
+    old = f'{TABLE}_unpartitioned'
+    schema_editor.execute(f'DROP TRIGGER IF EXISTS {TABLE}_search_vector_trigger ON {TABLE}')
+    for name, _ in foreign_keys:
+        schema_editor.execute(f'ALTER TABLE {TABLE} DROP CONSTRAINT {name}')
+    for name, _ in indexes:
+        schema_editor.execute(f'DROP INDEX {name}')
+    schema_editor.execute(f'ALTER TABLE {TABLE} RENAME TO {old}')
+    schema_editor.execute(f'ALTER TABLE {old} DROP CONSTRAINT {TABLE}_pkey')
+    schema_editor.execute(f"""
+        CREATE TABLE {TABLE} (
+            LIKE {old} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING STORAGE INCLUDING COMPRESSION,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+
+    now = month_start(datetime.now(timezone.utc))
+    month = month_start(oldest) if oldest else now
+    while month <= add_months(now, getattr(settings, 'MESSAGE_PARTITIONS_AHEAD', 3)):
+        schema_editor.execute(create_partition_sql(month))
+        month = add_months(month, 1)
+    schema_editor.execute(f'CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT')
+
+    schema_editor.execute(f'INSERT INTO {TABLE} SELECT * FROM {old}')
+    schema_editor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), coalesce(max(id), 0) + 1, false) FROM {TABLE}"
+    )
+    schema_editor.execute(f'DROP TABLE {old}')
+
+    for name, definition in foreign_keys:
+        schema_editor.execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+    for _, definition in indexes:
+        schema_editor.execute(definition)
+    schema_editor.execute(f"""
+        CREATE TRIGGER {TABLE}_search_vector_trigger
+        BEFORE INSERT OR UPDATE ON {TABLE}
+        FOR EACH ROW EXECUTE FUNCTION {TABLE}_search_vector_update()
+    """)
+
+
+def maintain_partitions(ahead=None, archive_after=None, tablespace=None, dry_run=False):
+    """
+    Create the next ``ahead`` months of partitions and move partitions
+    older than ``archive_after`` months to ``tablespace``. Arguments default
+    to the ``MESSAGE_*`` settings; archiving is skipped without a
+    tablespace. Returns the SQL statements run (or, with ``dry_run``, that
+    would be run).
+    """
+    if connection.vendor != 'postgresql':
+        return []
+    if ahead is None:
+        ahead = getattr(settings, 'MESSAGE_PARTITIONS_AHEAD', 3)
+    if archive_after is None:
+        archive_after = getattr(settings, 'MESSAGE_ARCHIVE_AFTER_MONTHS', 12)
+    if tablespace is None:
+        tablespace = getattr(settings, 'MESSAGE_ARCHIVE_TABLESPACE', '')
+
+    statements = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return []
+        existing = partitions(cursor)
+        now = month_start(datetime.now(timezone.utc))
+
+        for months in range(ahead + 1):
+            month = add_months(now, months)
+            if partition_name(month) not in existing:
+                statements.append(create_partition_sql(month))
+
+        if tablespace:
+            cutoff = add_months(now, -archive_after)
+            for name, current in sorted(existing.items()):
+                if partition_month(name) >= cutoff or current == tablespace:
+                    continue
+                statements.append(f'ALTER TABLE {name} SET TABLESPACE {tablespace}')
+                cursor.execute('SELECT indexname FROM pg_indexes WHERE tablename = %s', [name])
+                statements.extend(
+                    f'ALTER INDEX {index} SET TABLESPACE {tablespace}' for index, in cursor.fetchall()
+                )
+
+        if not dry_run:
+            for statement in statements:
+                cursor.execute(statement)
+    return statements
@@ -0,0 +1,97 @@
+"""
+Serializers for the messaging app.
+"""
+
+from rest_framework import serializers
+
+from users.blocks import filter_visible
+from users.models import FriendEdge, User
+from users.serializers import UserSummarySerializer
+from .models import PrivateChat, Message
+
+
+class MessageSerializer(serializers.ModelSerializer):
+    """Serializer for chat messages."""
+    author = UserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = Message
+        fields = ['id', 'chat', 'author', 'content', 'created_at']
+        read_only_fields = ['id', 'chat', 'author', 'created_at']
+
+    def validate_content(self, value):
+        value = value.strip()
+        if not value:
+            raise serializers.ValidationError('content is required')
+        if len(value) > 10000:
+            raise serializers.ValidationError('content must be 10000 characters or less')
+        return value
+
+
+class PrivateChatSerializer(serializers.ModelSerializer):
+    """Serializer for private chats."""
+    participants = UserSummarySerializer(many=True, read_only=True)
+    participant_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        write_only=True
+    )
+
+    class Meta:
+        model = PrivateChat
+        fields = [
+            'id', 'name', 'avatar', 'participants', 'participant_ids',
+            'participant_count', 'message_count', 'created_at', 'updated_at',
+        ]
+        read_only_fields = [
+            'id', 'participants', 'participant_count', 'message_count', 'created_at', 'updated_at',
+        ]
+
+    def validate_participant_ids(self, value):
+        user = self.context['request'].user
+        others = set(value) - {user.id}
+        if not others:
+            raise serializers.ValidationError('minimum 2 participants required')
+
+        if User.objects.filter(id__in=others).count() != len(others):
+            raise serializers.ValidationError('one or more participants do not exist')
+
+        if len(filter_visible(user, others)) != len(others):
+            raise serializers.ValidationError('cannot create chat with blocked users')
+
+        friends = FriendEdge.objects.filter(user=user, friend_id__in=others).count()
+        if friends != len(others):
+            raise serializers.ValidationError('can only create chat with friends')
+
+        return sorted(others | {user.id})
+
+    def create(self, validated_data):
+        participant_ids = validated_data.pop('participant_ids')
+        chat = PrivateChat.objects.create(**validated_data)
+        chat.participants.add(*participant_ids)
+        chat.refresh_from_db(fields=['participant_count'])
+        return chat
+
+
+class InboxChatSerializer(serializers.ModelSerializer):
+    """
+    A chat as listed in the requester's inbox. Expects the annotations made
+    by ``PrivateChatViewSet.inbox``.
+    """
+    participants = UserSummarySerializer(many=True, read_only=True)
+    last_message = MessageSerializer(read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
+    last_read_at = serializers.DateTimeField(read_only=True)
+    muted = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = PrivateChat
+        fields = [
+            'id', 'name', 'avatar', 'participants', 'participant_count', 'message_count',
+            'last_message', 'unread_count', 'last_read_at', 'muted', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class ReadPositionSerializer(serializers.Serializer):
+    """Mark a chat read up to ``message_id`` (default: its last message)."""
+    message_id = serializers.IntegerField(required=False)
@@ -0,0 +1,62 @@
+"""
+Signal handlers for the messaging app.
+"""
+
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.counters import adjust_counter
+from .models import ChatParticipant, Message, PrivateChat
+
+
+@receiver(post_save, sender=Message)
+def count_message_on_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(PrivateChat, instance.chat_id, 'message_count', 1)
+
+
+@receiver(post_delete, sender=Message)
+def count_message_on_delete(sender, instance, **kwargs):
+    adjust_counter(PrivateChat, instance.chat_id, 'message_count', -1)
+
+
+@receiver(post_save, sender=Message)
+def track_last_message_on_save(sender, instance, created, **kwargs):
+    if created:
+        PrivateChat.objects.filter(
+            Q(last_message__isnull=True) | Q(last_message_id__lt=instance.pk), pk=instance.chat_id
+        ).update(last_message=instance)
+
+
+@receiver(post_delete, sender=Message)
+def track_last_message_on_delete(sender, instance, **kwargs):
+    # SET_NULL has already cleared the pointer if it was this message.
+    latest = Message.objects.filter(chat=OuterRef('pk')).order_by('-created_at', '-pk').values('pk')[:1]
+    PrivateChat.objects.filter(pk=instance.chat_id, last_message__isnull=True).update(
+        last_message=Subquery(latest)
+    )
+
+
+@receiver(post_save, sender=ChatParticipant)
+def count_participant_on_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(PrivateChat, instance.chat_id, 'participant_count', 1)
+
+
+@receiver(post_delete, sender=ChatParticipant)
+def count_participant_on_delete(sender, instance, **kwargs):
+    adjust_counter(PrivateChat, instance.chat_id, 'participant_count', -1)
+
+
+@receiver(m2m_changed, sender=ChatParticipant)
+def count_participants_on_add(sender, instance, action, reverse, pk_set, **kwargs):
+    # ``chat.participants.add()`` bulk-creates rows without post_save;
+    # removals go through post_delete above.
+    if action != 'post_add':
+        return
+    if reverse:
+        for pk in pk_set:
+            adjust_counter(PrivateChat, pk, 'participant_count', 1)
+    else:
+        adjust_counter(PrivateChat, instance.pk, 'participant_count', len(pk_set))
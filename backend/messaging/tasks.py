@@ -0,0 +1,20 @@
+"""
+Celery tasks for the messaging app.
+"""
+
+from celery import shared_task
+
+from .ephemeral import flush_read_cursors
+from .partitions import maintain_partitions
+
+
+@shared_task(ignore_result=True)
+def maintain_message_partitions():
+    """Create upcoming message partitions and archive old ones."""
+    maintain_partitions()
+
+
+@shared_task(ignore_result=True)
+def flush_chat_read_cursors():
+    """Persist the read cursors reported over chat sockets."""
+    flush_read_cursors()
@@ -1,3 +1,325 @@
-from django.test import TestCase
+"""
+Tests for messaging models and endpoints.
+"""
+
+from datetime import date, timedelta
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from dawgpound.routing import websocket_urlpatterns
+from messaging.ephemeral import flush_read_cursors, read_key
+from messaging.models import ChatParticipant, PrivateChat, Message
+from messaging.partitions import add_months, create_partition_sql, partition_month, partition_name
+from users.models import Friendship
+
+
+User = get_user_model()
+
+
+@pytest.fixture
+def friend(authenticated_user):
+    user = User.objects.create_user(
+        username='friend',
+        email='friend@example.com',
+        university_email='friend@university.edu',
+        password='pass123'
+    )
+    Friendship.objects.create(user1=authenticated_user, user2=user)
+    return user
+
+
+@pytest.fixture
+def chat(authenticated_user, friend):
+    chat = PrivateChat.objects.create(name='Study group')
+    chat.participants.add(authenticated_user, friend)
+    return chat
+
+
+@pytest.mark.django_db
+class TestChatEndpoints:
+    """Test chat creation and message history."""
+
+    def test_create_chat_with_friend(self, authenticated_client, friend):
+        response = authenticated_client.post(
+            '/api/messages/chats/', {'name': 'Us', 'participant_ids': [friend.id]}, format='json'
+        )
+        assert response.status_code == 201
+        assert {p['id'] for p in response.data['participants']} == {friend.id, response.wsgi_request.user.id}
+        assert response.data['participant_count'] == 2
+
+    def test_create_chat_requires_friendship(self, authenticated_client):
+        stranger = User.objects.create_user(
+            username='stranger',
+            email='stranger@example.com',
+            university_email='stranger@university.edu',
+            password='pass123'
+        )
+        response = authenticated_client.post(
+            '/api/messages/chats/', {'participant_ids': [stranger.id]}, format='json'
+        )
+        assert response.status_code == 400
+
+    def test_send_and_page_messages(self, authenticated_client, chat):
+        for i in range(5):
+            response = authenticated_client.post(
+                f'/api/messages/chats/{chat.id}/messages/', {'content': f'hello {i}'}, format='json'
+            )
+            assert response.status_code == 201
+
+        response = authenticated_client.get(f'/api/messages/chats/{chat.id}/messages/?page_size=2')
+        assert response.status_code == 200
+        assert [m['content'] for m in response.data['results']] == ['hello 3', 'hello 4']
+        assert response.data['next'] is None
+
+        response = authenticated_client.get(response.data['previous'])
+        assert [m['content'] for m in response.data['results']] == ['hello 1', 'hello 2']
+
+    def test_history_reads_past_the_recent_window(self, authenticated_client, authenticated_user, chat):
+        now = timezone.now()
+        for days, content in [(400, 'last year'), (40, 'last month'), (1, 'yesterday')]:
+            message = Message.objects.create(chat=chat, author=authenticated_user, content=content)
+            Message.objects.filter(pk=message.pk).update(created_at=now - timedelta(days=days))
+
+        response = authenticated_client.get(f'/api/messages/chats/{chat.id}/messages/?page_size=2')
+        assert [m['content'] for m in response.data['results']] == ['last month', 'yesterday']
+        response = authenticated_client.get(response.data['previous'])
+        assert [m['content'] for m in response.data['results']] == ['last year']
+        assert response.data['previous'] is None
+
+    def test_non_participant_cannot_read(self, api_client, chat):
+        outsider = User.objects.create_user(
+            username='outsider',
+            email='outsider@example.com',
+            university_email='outsider@university.edu',
+            password='pass123'
+        )
+        Message.objects.create(chat=chat, author=chat.participants.first(), content='secret')
+        api_client.force_authenticate(user=outsider)
+        response = api_client.get(f'/api/messages/chats/{chat.id}/messages/')
+        assert response.status_code == 404
+
+
+
+@pytest.mark.django_db
+class TestInbox:
+    """Test the inbox listing and read positions."""
+
+    def test_inbox_in_two_queries(self, authenticated_client, authenticated_user, friend, chat,
+                                  django_assert_num_queries):
+        other = PrivateChat.objects.create(name='Other')
+        other.participants.add(authenticated_user, friend)
+        Message.objects.create(chat=chat, author=friend, content='one')
+        Message.objects.create(chat=chat, author=friend, content='two')
+        Message.objects.create(chat=chat, author=authenticated_user, content='mine')
+        Message.objects.create(chat=other, author=friend, content='hi')
+        PrivateChat.objects.filter(pk=other.pk).update(updated_at=timezone.now() + timedelta(minutes=1))
+
+        with django_assert_num_queries(2):
+            response = authenticated_client.get('/api/messages/chats/inbox/')
+        assert response.status_code == 200
+        rows = [(c['name'], c['last_message']['content'], c['unread_count']) for c in response.data['results']]
+        assert rows == [('Other', 'hi', 1), ('Study group', 'mine', 2)]
+        assert {p['username'] for p in response.data['results'][1]['participants']} == {'testuser', 'friend'}
+
+    def test_read_position(self, authenticated_client, friend, chat):
+        first = Message.objects.create(chat=chat, author=friend, content='one')
+        second = Message.objects.create(chat=chat, author=friend, content='two')
+
+        response = authenticated_client.post(f'/api/messages/chats/{chat.id}/read/', {'message_id': first.id})
+        assert response.data['last_read_message'] == first.id
+        assert authenticated_client.get('/api/messages/chats/inbox/').data['results'][0]['unread_count'] == 1
+
+        authenticated_client.post(f'/api/messages/chats/{chat.id}/read/')
+        # Reading an older message later does not move the position back.
+        response = authenticated_client.post(f'/api/messages/chats/{chat.id}/read/', {'message_id': first.id})
+        assert response.data['last_read_message'] == second.id
+        assert authenticated_client.get('/api/messages/chats/inbox/').data['results'][0]['unread_count'] == 0
+
+        second.delete()
+        chat.refresh_from_db()
+        assert chat.last_message_id == first.id
+
+
+def chat_socket(chat, user):
+    communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/chat/{chat.id}/')
+    communicator.scope['user'] = user
+    return communicator
+
+
+@pytest.mark.django_db
+class TestChatConsumer:
+    """Test live chat over the channel layer."""
+
+    @override_settings(CHAT_FLUSH_INTERVAL=0.2)
+    def test_burst_is_stored_and_broadcast_as_one_batch(self, chat, authenticated_user, friend):
+        @async_to_sync
+        async def run():
+            sender = chat_socket(chat, authenticated_user)
+            receiver = chat_socket(chat, friend)
+            assert (await sender.connect())[0]
+            assert (await receiver.connect())[0]
+
+            for i in range(3):
+                await sender.send_json_to({'type': 'message', 'content': f'hi {i}', 'client_id': str(i)})
+            await sender.send_json_to({'type': 'message', 'content': '   '})
+            assert (await sender.receive_json_from())['type'] == 'error'
+
+            events = [await receiver.receive_json_from(timeout=2), await sender.receive_json_from(timeout=2)]
+            assert await receiver.receive_nothing()
+            await sender.disconnect()
+            await receiver.disconnect()
+            return events
+
+        for event in run():
+            assert event['type'] == 'messages'
+            assert [m['content'] for m in event['messages']] == ['hi 0', 'hi 1', 'hi 2']
+            assert [m['client_id'] for m in event['messages']] == ['0', '1', '2']
+
+        chat.refresh_from_db()
+        assert chat.message_count == 3
+        assert list(Message.objects.filter(chat=chat).values_list('content', flat=True)) == ['hi 0', 'hi 1', 'hi 2']
+
+    @override_settings(CHAT_FLUSH_INTERVAL=0.05)
+    def test_failed_flush_is_reported_to_senders(self, chat, authenticated_user, friend, monkeypatch, caplog):
+        def fail(chat_id, batch):
+            raise RuntimeError('database is down')
+
+        monkeypatch.setattr('messaging.consumers.save_messages', fail)
+
+        @async_to_sync
+        async def run():
+            sender = chat_socket(chat, authenticated_user)
+            receiver = chat_socket(chat, friend)
+            assert (await sender.connect())[0]
+            assert (await receiver.connect())[0]
+            for i in range(2):
+                await sender.send_json_to({'type': 'message', 'content': f'hi {i}', 'client_id': str(i)})
+            errors = [await sender.receive_json_from(timeout=2) for _ in range(2)]
+            assert await receiver.receive_nothing()
+            await sender.disconnect()
+            await receiver.disconnect()
+            return errors
+
+        assert run() == [
+            {'type': 'error', 'error': 'message could not be sent', 'client_id': str(i)} for i in range(2)
+        ]
+        assert 'Failed to store 2 chat messages' in caplog.text
+        assert not Message.objects.filter(chat=chat).exists()
+
+    def test_non_participant_is_rejected(self, chat):
+        outsider = User.objects.create_user(
+            username='outsider',
+            email='outsider@example.com',
+            university_email='outsider@university.edu',
+            password='pass123'
+        )
+
+        @async_to_sync
+        async def connect():
+            connected, _ = await chat_socket(chat, outsider).connect()
+            return connected
+
+        assert not connect()
+
+
+@pytest.mark.django_db
+class TestEphemeralState:
+    """Typing and read receipts go through the cache, not the database."""
+
+    def test_typing_and_read_receipts_are_broadcast(self, chat, authenticated_user, friend):
+        first = Message.objects.create(chat=chat, author=friend, content='one')
+        second = Message.objects.create(chat=chat, author=friend, content='two')
+
+        @async_to_sync
+        async def run():
+            reader = chat_socket(chat, authenticated_user)
+            other = chat_socket(chat, friend)
+            assert (await reader.connect())[0]
+            assert (await other.connect())[0]
+
+            await reader.send_json_to({'type': 'typing'})
+            # Repeats within the TTL are not re-broadcast.
+            await reader.send_json_to({'type': 'typing'})
+            await reader.send_json_to({'type': 'read', 'message_id': second.id})
+            await reader.send_json_to({'type': 'read', 'message_id': first.id})
+            events = [await other.receive_json_from(timeout=2) for _ in range(2)]
+            assert await other.receive_nothing()
+
+            await other.send_json_to({'type': 'state'})
+            state = await other.receive_json_from(timeout=2)
+            # The reader gets its own typing and read events too.
+            assert [(await reader.receive_json_from(timeout=2))['type'] for _ in range(2)] == ['typing', 'read']
+            await reader.send_json_to({'type': 'read', 'message_id': 'latest'})
+            error = await reader.receive_json_from(timeout=2)
+            await reader.disconnect()
+            await other.disconnect()
+            return events, state, error
+
+        events, state, error = run()
+        assert events == [
+            {'type': 'typing', 'user': authenticated_user.id, 'typing': True},
+            {'type': 'read', 'user': authenticated_user.id, 'message_id': second.id},
+        ]
+        assert state == {
+            'type': 'state',
+            'typing': [authenticated_user.id],
+            'read': {str(authenticated_user.id): second.id, str(friend.id): None},
+        }
+        assert error['type'] == 'error'
+        assert ChatParticipant.objects.get(chat=chat, user=authenticated_user).last_read_message_id is None
+
+    def test_flush_writes_final_cursors_in_one_update(self, chat, authenticated_user, friend,
+                                                      django_assert_num_queries):
+        from django.core.cache import cache
+        first = Message.objects.create(chat=chat, author=friend, content='one')
+        second = Message.objects.create(chat=chat, author=friend, content='two')
+        other_chat = PrivateChat.objects.create(name='Elsewhere')
+        other_chat.participants.add(friend)
+        stray = Message.objects.create(chat=other_chat, author=friend, content='not yours')
+        ChatParticipant.objects.filter(chat=chat).update(last_read_at=None, last_read_message=None)
+
+        cache.set(read_key(chat.id, authenticated_user.id), second.id)
+        cache.set(read_key(chat.id, friend.id), stray.id)
+        # A batch of candidates, their cursors' messages, one bulk update,
+        # and the empty next batch.
+        with django_assert_num_queries(4):
+            assert flush_read_cursors() == 1
+
+        participant = ChatParticipant.objects.get(chat=chat, user=authenticated_user)
+        assert participant.last_read_message_id == second.id
+        assert participant.last_read_at == second.created_at
+        assert ChatParticipant.objects.get(chat=chat, user=friend).last_read_message_id is None
+
+        # An older cursor never moves the position back, and read chats are skipped.
+        cache.set(read_key(chat.id, authenticated_user.id), first.id)
+        assert flush_read_cursors() == 0
+        assert ChatParticipant.objects.get(chat=chat, user=authenticated_user).last_read_message_id == second.id
+
+
+class TestMessagePartitions:
+    """Test the monthly partition helpers."""
+
+    def test_month_arithmetic_and_names(self):
+        assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+        assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+        assert partition_name(date(2026, 3, 1)) == 'messages_p2026_03'
+        assert partition_month('messages_p2026_03') == date(2026, 3, 1)
+        assert partition_month('messages_default') is None
+        assert create_partition_sql(date(2026, 12, 1)) == (
+            'CREATE TABLE IF NOT EXISTS messages_p2026_12 PARTITION OF messages '
+            "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+        )
+
+    @pytest.mark.django_db
+    def test_command_is_a_no_op_off_postgresql(self):
+        out = StringIO()
+        call_command('message_partitions', '--dry-run', stdout=out)
+        assert 'requires PostgreSQL' in out.getvalue()
 
-# Create your tests here.
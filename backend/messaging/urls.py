@@ -5,9 +5,19 @@ URLs for the messaging app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-# Router will be configured when views are created
+from core.asyncviews import split_methods
+from .views import PrivateChatViewSet, chat_history
+
 router = DefaultRouter()
+router.register('chats', PrivateChatViewSet, basename='chat')
 
 urlpatterns = [
+    path(
+        'chats/<int:pk>/messages/',
+        split_methods(chat_history, PrivateChatViewSet.as_view(
+            {'get': 'messages', 'post': 'messages'}, **PrivateChatViewSet.messages.kwargs
+        )),
+        name='chat-messages',
+    ),
     path('', include(router.urls)),
 ]
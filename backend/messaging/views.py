@@ -1,3 +1,134 @@
-from django.shortcuts import render
+"""
+Views for the messaging app.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from core.asyncviews import api_view
+from core.pagination import KeysetPagination
+from moderation.bans import NotBanned
+from users.cache import aattach_users, attach_users
+from .models import ChatParticipant, PrivateChat, Message
+from .serializers import InboxChatSerializer, MessageSerializer, PrivateChatSerializer, ReadPositionSerializer
+
+
+class MessagePagination(KeysetPagination):
+    """
+    Chat history opens on the newest messages and pages backwards. Each page
+    looks back a month first so, with monthly partitions, it only touches
+    the newest one or two (see ``messaging.partitions``).
+    """
+    start_from = 'latest'
+    seek_window = timedelta(days=31)
+
+
+class PrivateChatViewSet(mixins.ListModelMixin,
+                         mixins.RetrieveModelMixin,
+                         mixins.CreateModelMixin,
+                         viewsets.GenericViewSet):
+    """
+    Private chats the requesting user participates in.
+
+    ``messages`` exposes the chat history with keyset pagination (GETs are
+    normally served by the async ``chat_history``) and accepts new messages
+    over REST (WebSocket is the primary transport). ``inbox``
+    lists every chat with its last message and unread count in two queries,
+    and ``read`` moves the requester's read position forward.
+    """
+    serializer_class = PrivateChatSerializer
+
+    def get_queryset(self):
+        return (
+            PrivateChat.objects
+            .filter(participants=self.request.user)
+            .prefetch_related('participants')
+        )
+
+    @action(detail=True, methods=['get', 'post'], pagination_class=MessagePagination,
+            permission_classes=[permissions.IsAuthenticated, NotBanned])
+    def messages(self, request, pk=None):
+        chat = self.get_object()
+
+        if request.method == 'POST':
+            serializer = MessageSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(chat=chat, author=request.user)
+            PrivateChat.objects.filter(pk=chat.pk).update(updated_at=timezone.now())
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        queryset = Message.objects.filter(chat=chat)
+        page = attach_users(self.paginate_queryset(queryset))
+        serializer = MessageSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def inbox(self, request):
+        user = request.user
+        # Filtering and annotating through the same relation reuses one join
+        # to the requester's ChatParticipant row.
+        unread = (
+            Message.objects
+            .filter(chat=OuterRef('pk'), created_at__gt=OuterRef('read_since'))
+            .exclude(author=user)
+            .order_by()
+            .values('chat')
+            .annotate(n=Count('pk'))
+            .values('n')
+        )
+        chats = (
+            PrivateChat.objects
+            .filter(chatparticipant__user=user)
+            .annotate(
+                last_read_at=F('chatparticipant__last_read_at'),
+                read_since=Coalesce('chatparticipant__last_read_at', 'chatparticipant__joined_at'),
+                muted=F('chatparticipant__muted'),
+            )
+            .annotate(unread_count=Coalesce(Subquery(unread, output_field=IntegerField()), Value(0)))
+            .select_related('last_message__author')
+            .prefetch_related('participants')
+            .order_by('-updated_at')
+        )
+        return Response({'results': InboxChatSerializer(chats, many=True).data})
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        chat = self.get_object()
+        serializer = ReadPositionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        message_id = serializer.validated_data.get('message_id', chat.last_message_id)
+
+        message = None
+        if message_id is not None:
+            message = Message.objects.filter(chat=chat, pk=message_id).first()
+            if message is None:
+                return Response({'error': 'message not found in this chat'}, status=status.HTTP_400_BAD_REQUEST)
+        read_at = message.created_at if message else timezone.now()
+
+        # Never move the read position backwards.
+        ChatParticipant.objects.filter(
+            Q(last_read_at__isnull=True) | Q(last_read_at__lt=read_at), chat=chat, user=request.user
+        ).update(last_read_at=read_at, last_read_message=message)
+        participant = ChatParticipant.objects.get(chat=chat, user=request.user)
+        return Response({
+            'last_read_at': participant.last_read_at,
+            'last_read_message': participant.last_read_message_id,
+        })
+
+
+@api_view
+async def chat_history(request, user, pk):
+    """Async ``GET /api/messages/chats/<pk>/messages/`` for participants."""
+    if not await ChatParticipant.objects.filter(chat_id=pk, user=user).aexists():
+        raise NotFound()
+    paginator = MessagePagination()
+    page = await aattach_users(await paginator.apaginate_queryset(Message.objects.filter(chat_id=pk), request))
+    return paginator.get_paginated_data(MessageSerializer(page, many=True).data)
 
-# Create your views here.
@@ -0,0 +1,128 @@
+"""
+Moderation actions over many rows at once.
+
+Each function applies one action to a queryset of targets in a single
+transaction and records one ``ModerationLog`` row per target through
+``moderation.audit``, so the log rows are inserted in batches. Deleted
+rows are described in the log's ``metadata`` (ids and a content snapshot)
+because the log's foreign keys to them are nulled on delete.
+
+Deletes run inside ``forums.signals.bulk_changes()``: reply counts and
+last-activity columns are recomputed once per affected thread instead of
+once per reply, and live subscribers get one event per group listing every
+affected row (``replies_deleted``, ``threads_deleted`` or
+``threads_updated``) instead of one event per row. Callers spanning several
+calls (``moderation.bulk``) pass ``events`` to collect the affected ids and
+broadcast once at the end.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.counters import reconcile_counter
+from forums.activity import refresh_last_activity
+from forums.consumers import broadcast_to_group
+from forums.models import Reply, Thread
+from forums.signals import bulk_changes
+from .audit import log_action
+
+
+def _broadcast(group_id, payload):
+    transaction.on_commit(lambda: broadcast_to_group(group_id, payload))
+
+
+class GroupEvents:
+    """Affected ids per group, to be broadcast as one event per group."""
+
+    def __init__(self, data=None):
+        # JSON-serializable: {group id (str): {key: [ids]}}
+        self.data = data if data is not None else {}
+
+    def add(self, group_id, key, ids):
+        self.data.setdefault(str(group_id), {}).setdefault(key, []).extend(ids)
+
+    def broadcast(self, event_type, **extra):
+        for group_id, ids in self.data.items():
+            _broadcast(int(group_id), {'type': event_type, **ids, **extra})
+
+
+def _by_group(rows):
+    """``{group id: [row, ...]}`` for rows whose second item is the group id."""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row[1]].append(row)
+    return groups
+
+
+def delete_replies(moderator, replies, reason='', events=None):
+    """Delete ``replies``. Returns how many were deleted."""
+    rows = list(replies.values_list('pk', 'thread__group_id', 'thread_id', 'author_id', 'content'))
+    if not rows:
+        return 0
+    thread_ids = {row[2] for row in rows}
+    with transaction.atomic(), bulk_changes():
+        Reply.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        reconcile_counter(Thread, 'reply_count', Reply, 'thread', pks=thread_ids)
+        refresh_last_activity(Thread.objects.filter(pk__in=thread_ids))
+        for pk, group_id, thread_id, author_id, content in rows:
+            log_action(
+                'delete_reply', moderator, group=group_id, thread=thread_id, target_user=author_id,
+                reason=reason, metadata={'reply_id': pk, 'content': content},
+            )
+        for group_id, group_rows in _by_group(rows).items():
+            if events is not None:
+                events.add(group_id, 'reply_ids', [row[0] for row in group_rows])
+                continue
+            by_thread = defaultdict(list)
+            for pk, _, thread_id, *_ in group_rows:
+                by_thread[thread_id].append(pk)
+            _broadcast(group_id, {
+                'type': 'replies_deleted',
+                'threads': [{'thread_id': t, 'reply_ids': ids} for t, ids in by_thread.items()],
+            })
+    return len(rows)
+
+
+def delete_threads(moderator, threads, reason='', events=None):
+    """Delete ``threads`` and their replies. Returns how many threads were deleted."""
+    rows = list(threads.values_list('pk', 'group_id', 'author_id', 'title', 'reply_count'))
+    if not rows:
+        return 0
+    with transaction.atomic(), bulk_changes():
+        Thread.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        for pk, group_id, author_id, title, reply_count in rows:
+            log_action(
+                'delete_thread', moderator, group=group_id, target_user=author_id, reason=reason,
+                metadata={'thread_id': pk, 'title': title, 'reply_count': reply_count},
+            )
+        for group_id, group_rows in _by_group(rows).items():
+            if events is not None:
+                events.add(group_id, 'thread_ids', [row[0] for row in group_rows])
+                continue
+            _broadcast(group_id, {'type': 'threads_deleted', 'thread_ids': [row[0] for row in group_rows]})
+    return len(rows)
+
+
+def lock_threads(moderator, threads, locked=True, reason='', events=None):
+    """Lock (or unlock) ``threads``. Returns how many changed."""
+    rows = list(threads.exclude(locked=locked).values_list('pk', 'group_id'))
+    if not rows:
+        return 0
+    action = 'lock_thread' if locked else 'unlock_thread'
+    with transaction.atomic():
+        Thread.objects.filter(pk__in=[pk for pk, _ in rows]).update(locked=locked, updated_at=timezone.now())
+        for pk, group_id in rows:
+            log_action(action, moderator, group=group_id, thread=pk, reason=reason)
+        # ``update`` skips the post_save handler that pushes thread_updated per thread.
+        for group_id, group_rows in _by_group(rows).items():
+            if events is not None:
+                events.add(group_id, 'thread_ids', [pk for pk, _ in group_rows])
+                continue
+            _broadcast(group_id, {
+                'type': 'threads_updated',
+                'thread_ids': [pk for pk, _ in group_rows],
+                'updates': {'locked': locked},
+            })
+    return len(rows)
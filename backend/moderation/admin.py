@@ -3,7 +3,7 @@ Admin configuration for moderation app.
 """
 
 from django.contrib import admin
-from .models import ModerationLog, UserBan
+from .models import BulkModerationJob, ModerationLog, UserBan
 
 
 @admin.register(ModerationLog)
@@ -24,3 +24,13 @@ class UserBanAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'reason', 'banned_by__username']
     ordering = ['-created_at']
 
+
+
+@admin.register(BulkModerationJob)
+class BulkModerationJobAdmin(admin.ModelAdmin):
+    """Admin for BulkModerationJob model."""
+    list_display = ['action', 'status', 'moderator', 'processed', 'total', 'created_at', 'finished_at']
+    list_filter = ['action', 'status', 'created_at']
+    search_fields = ['moderator__username', 'reason']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at', 'updated_at', 'finished_at']
@@ -0,0 +1,218 @@
+"""
+Buffered moderation audit log.
+
+Moderation actions call ``log_action`` instead of creating ``ModerationLog``
+rows themselves. Inside ``audit_batch()`` (every HTTP request, through
+``AuditLogMiddleware``, and any task that wraps its work in one) entries are
+held in memory and written with ``bulk_create`` when the block ends, or
+every ``MODERATION_LOG_BATCH_SIZE`` entries in long jobs. Outside a batch
+each entry is written on its own. So a bulk action over 2,000 replies costs
+a handful of INSERTs, not 2,000.
+
+An entry joins the buffer only once the transaction it was recorded in
+commits, so an action that rolls back leaves no log row. ``bulk_create``
+skips ``post_save``, so the writer notifies target users itself when the
+batch ends: one notification task per action, group and thread, however
+many rows and flushes.
+
+The log is append-only apart from ``compact_logs``, which Celery beat runs
+daily to shrink the ``metadata`` of rows older than
+``MODERATION_LOG_COMPACT_AFTER_DAYS``: content snapshots and other large
+values are dropped, ids and short values kept.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import groupby
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.notifications import notify
+from .models import ModerationLog
+
+_current = contextvars.ContextVar('audit_buffer', default=None)
+
+# Longest string kept in compacted metadata.
+COMPACT_STRING_LENGTH = 64
+
+
+def _pk(value):
+    return getattr(value, 'pk', value)
+
+
+def batch_size():
+    return getattr(settings, 'MODERATION_LOG_BATCH_SIZE', 500)
+
+
+def write(entries, notify=True):
+    """Insert ``entries`` and, unless ``notify`` is false, notify their target users."""
+    if entries:
+        ModerationLog.objects.bulk_create(entries, batch_size=batch_size())
+        if notify:
+            notify_targets(entries)
+
+
+def notify_targets(entries):
+    """Queue one moderation notification per action, group and thread for the targeted users."""
+    def key(entry):
+        return entry.action, entry.group_id or 0, entry.thread_id or 0, entry.moderator_id or 0
+
+    targeted = sorted((entry for entry in entries if entry.target_user_id), key=key)
+    for _, same in groupby(targeted, key=key):
+        same = list(same)
+        first = same[0]
+        notify(
+            'moderation', sorted({entry.target_user_id for entry in same}), f'group:{first.group_id}',
+            first.moderator_id,
+            {'action': first.action, 'group_id': first.group_id, 'thread_id': first.thread_id},
+        )
+
+
+class AuditBuffer:
+    """
+    Log entries waiting to be written together. Target users are notified
+    once the batch ends, so an action spanning several flushes still
+    produces one notification.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.targeted = []
+        self.closing = False
+        self.closed = False
+
+    def add(self, entry):
+        if self.closed:
+            # Recorded in a transaction that committed after the batch ended.
+            write([entry])
+            return
+        self.entries.append(entry)
+        if len(self.entries) >= batch_size():
+            self.flush()
+
+    def flush(self):
+        entries, self.entries = self.entries, []
+        write(entries, notify=False)
+        self.targeted.extend(entry for entry in entries if entry.target_user_id)
+
+    def close(self):
+        if self.closing:
+            return
+        self.closing = True
+        self.flush()
+        # Entries recorded in a still-open transaction arrive when it commits,
+        # and their callbacks run before this one.
+        transaction.on_commit(self.finish)
+
+    def finish(self):
+        self.closed = True
+        self.flush()
+        targeted, self.targeted = self.targeted, []
+        notify_targets(targeted)
+
+
+@contextmanager
+def audit_batch():
+    """Buffer the entries logged inside the block and write them at the end."""
+    if _current.get() is not None:
+        yield _current.get()
+        return
+    buffer = AuditBuffer()
+    token = _current.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _current.reset(token)
+        buffer.close()
+
+
+def log_action(action, moderator=None, group=None, thread=None, reply=None, target_user=None,
+               reason='', metadata=None):
+    """
+    Record a moderation action. Targets may be instances or ids. Rows that
+    are being deleted should be described in ``metadata``, not referenced.
+    """
+    entry = ModerationLog(
+        action=action,
+        moderator_id=_pk(moderator),
+        group_id=_pk(group),
+        thread_id=_pk(thread),
+        reply_id=_pk(reply),
+        target_user_id=_pk(target_user),
+        reason=reason,
+        metadata=metadata or {},
+    )
+    buffer = _current.get()
+    transaction.on_commit(lambda: buffer.add(entry) if buffer is not None else write([entry]))
+
+
+class AuditLogMiddleware:
+    """Buffer each HTTP request's audit log entries. Sync- and async-capable."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with audit_batch():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        buffer = AuditBuffer()
+        token = _current.set(buffer)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current.reset(token)
+            if buffer.entries or buffer.targeted:
+                await sync_to_async(buffer.close)()
+            else:
+                buffer.closing = buffer.closed = True
+
+
+def compact(metadata):
+    """``metadata`` without nested structures and long strings, marked as compacted."""
+    kept = {
+        key: value for key, value in metadata.items()
+        if value is None or isinstance(value, (bool, int, float))
+        or (isinstance(value, str) and len(value) <= COMPACT_STRING_LENGTH)
+    }
+    kept['compacted'] = True
+    return kept
+
+
+def compact_logs(before=None, batch_size=1000):
+    """
+    Compact the metadata of log rows created before ``before`` (by default
+    ``MODERATION_LOG_COMPACT_AFTER_DAYS`` ago). Returns the number of rows
+    rewritten.
+    """
+    if before is None:
+        before = timezone.now() - timedelta(days=getattr(settings, 'MODERATION_LOG_COMPACT_AFTER_DAYS', 90))
+    rows = (
+        ModerationLog.objects
+        .filter(created_at__lt=before)
+        .exclude(metadata={})
+        .exclude(metadata__has_key='compacted')
+        .only('pk', 'metadata')
+        .order_by('pk')
+    )
+    compacted, last = 0, 0
+    while True:
+        batch = list(rows.filter(pk__gt=last)[:batch_size])
+        if not batch:
+            return compacted
+        for row in batch:
+            row.metadata = compact(row.metadata)
+        ModerationLog.objects.bulk_update(batch, ['metadata'])
+        compacted += len(batch)
+        last = batch[-1].pk
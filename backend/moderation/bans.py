@@ -0,0 +1,117 @@
+"""
+Ban registry.
+
+Every write (threads, replies, messages, group joins) must turn away banned
+users. Rather than query ``UserBan`` on each one, a user's active bans are
+compiled into ``{scope: until}``, where ``scope`` is a group id (``None``
+for a global ban) and ``until`` is when the ban lapses as a Unix time
+(``inf`` for permanent bans). Entries are loaded for many users with one
+query and served from ``core.cache``; users without bans get an empty
+entry, so the common case is a local-tier hit and a dict lookup.
+
+``until`` is compared with the clock on every check, so a ban lapses at
+its ``expires_at`` however long the entry stays cached. New, changed and
+deleted bans invalidate the user's entry from ``moderation.signals``; like
+every ``TwoTierCache`` entry, other processes pick up the change once their
+local copy expires.
+
+``NotBanned`` is the DRF permission for write views and
+``BanGuardConsumerMixin`` the equivalent for Channels consumers.
+"""
+
+import math
+import time
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import permissions
+
+from core.cache import TwoTierCache
+from groups.models import Group
+from .models import UserBan
+
+BANNED_MESSAGE = 'you are banned'
+
+
+def _load_bans(ids):
+    bans = {user_id: {} for user_id in ids}
+    rows = UserBan.objects.filter(user_id__in=bans).filter(
+        Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
+    ).values_list('user_id', 'group_id', 'is_global', 'expires_at')
+    for user_id, group_id, is_global, expires_at in rows:
+        # A ban without a group has no narrower scope than the whole site.
+        scope = None if is_global or group_id is None else group_id
+        until = expires_at.timestamp() if expires_at else math.inf
+        scopes = bans[user_id]
+        scopes[scope] = max(scopes.get(scope, 0), until)
+    return bans
+
+
+ban_cache = TwoTierCache(
+    'bans',
+    _load_bans,
+    local_ttl=getattr(settings, 'USER_CACHE_LOCAL_TTL', 5),
+    shared_ttl=getattr(settings, 'USER_CACHE_TTL', 300),
+)
+
+
+def _user_id(user):
+    return getattr(user, 'pk', user)
+
+
+def _banned(scopes, group_id):
+    if not scopes:
+        return False
+    now = time.time()
+    return scopes.get(None, 0) > now or (group_id is not None and scopes.get(group_id, 0) > now)
+
+
+def is_banned(user, group_id=None):
+    """
+    Whether ``user`` (a user or an id) is banned site-wide or, if
+    ``group_id`` is given, from that group.
+    """
+    return _banned(ban_cache.get(_user_id(user)), group_id)
+
+
+async def ais_banned(user, group_id=None):
+    """``is_banned`` for async code."""
+    return _banned(await ban_cache.aget(_user_id(user)), group_id)
+
+
+def invalidate_bans(*user_ids):
+    ban_cache.invalidate(*user_ids)
+
+
+class NotBanned(permissions.BasePermission):
+    """
+    Reject unsafe requests from banned users. Global bans are checked for
+    every such request; group bans when the URL has a ``group_id`` or the
+    view's object is a group or belongs to one.
+    """
+    message = BANNED_MESSAGE
+
+    def has_permission(self, request, view):
+        if request.method in permissions.SAFE_METHODS or not request.user.is_authenticated:
+            return True
+        return not is_banned(request.user, view.kwargs.get('group_id'))
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS or not request.user.is_authenticated:
+            return True
+        group_id = obj.pk if isinstance(obj, Group) else getattr(obj, 'group_id', None)
+        return group_id is None or not is_banned(request.user, group_id)
+
+
+class BanGuardConsumerMixin:
+    """
+    For JSON WebSocket consumers: ``if await self.reject_banned(): return``
+    at the top of a write handler answers banned users with an error.
+    """
+
+    async def reject_banned(self, group_id=None):
+        if not await ais_banned(self.scope['user'], group_id):
+            return False
+        await self.send_json({'type': 'error', 'error': BANNED_MESSAGE})
+        return True
@@ -0,0 +1,175 @@
+"""
+Bulk moderation jobs for spam waves.
+
+A ``BulkModerationJob`` purges a user's threads and replies (in one group
+or site-wide), locks every thread in a group, or bans a list of users. The
+API creates the job and queues ``moderation.tasks.run_bulk_moderation``,
+which runs one batch of at most ``MODERATION_BULK_BATCH_SIZE`` targets per
+invocation and queues itself again until nothing is left. Each batch is one
+short transaction of set-based statements (``moderation.actions``), so
+a large purge never holds locks for long, and ``processed``/``total`` on
+the job report progress in between.
+
+The ids affected by every batch accumulate on the job, and live forum
+subscribers get one event per affected group once the job is done:
+``content_removed`` for purges and ``threads_updated`` for locks.
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from forums.models import Reply, Thread
+from .actions import GroupEvents, delete_replies, delete_threads, lock_threads
+from .audit import audit_batch, log_action
+from .bans import invalidate_bans
+from .models import BulkModerationJob, UserBan
+
+logger = logging.getLogger(__name__)
+
+
+def batch_size():
+    return getattr(settings, 'MODERATION_BULK_BATCH_SIZE', 500)
+
+
+def start(moderator, action, params, reason=''):
+    """Create a job and queue its first batch once the transaction commits."""
+    from . import tasks
+
+    job = BulkModerationJob.objects.create(moderator=moderator, action=action, params=params, reason=reason)
+    transaction.on_commit(lambda: tasks.run_bulk_moderation.delay(job.pk))
+    return job
+
+
+def _purge_targets(job):
+    user_id, group_id = job.params['user_id'], job.params.get('group_id')
+    threads = Thread.objects.filter(author_id=user_id)
+    # Replies in the user's own threads go with the thread.
+    replies = Reply.objects.filter(author_id=user_id).exclude(thread__author_id=user_id)
+    if group_id is not None:
+        threads = threads.filter(group_id=group_id)
+        replies = replies.filter(thread__group_id=group_id)
+    return threads, replies
+
+
+def _next_ids(queryset, size):
+    return list(queryset.order_by('pk').values_list('pk', flat=True)[:size])
+
+
+class PurgeUser:
+    """Delete everything ``params['user_id']`` posted, threads first."""
+
+    def count(self, job):
+        threads, replies = _purge_targets(job)
+        return threads.count() + replies.count()
+
+    def run(self, job, events, size):
+        threads, replies = _purge_targets(job)
+        ids = _next_ids(threads, size)
+        if ids:
+            return delete_threads(job.moderator_id, Thread.objects.filter(pk__in=ids), job.reason, events)
+        ids = _next_ids(replies, size)
+        if ids:
+            return delete_replies(job.moderator_id, Reply.objects.filter(pk__in=ids), job.reason, events)
+        return 0
+
+    def finish(self, job, events):
+        events.broadcast('content_removed', user_id=job.params['user_id'])
+
+
+class LockGroup:
+    """Lock every unlocked thread in ``params['group_id']``."""
+
+    def targets(self, job):
+        return Thread.objects.filter(group_id=job.params['group_id'], locked=False)
+
+    def count(self, job):
+        return self.targets(job).count()
+
+    def run(self, job, events, size):
+        ids = _next_ids(self.targets(job), size)
+        if not ids:
+            return 0
+        return lock_threads(job.moderator_id, Thread.objects.filter(pk__in=ids), True, job.reason, events)
+
+    def finish(self, job, events):
+        events.broadcast('threads_updated', updates={'locked': True})
+
+
+class BanUsers:
+    """
+    Ban ``params['user_ids']`` from ``params['group_id']``, or site-wide
+    when it is null, until ``params['expires_at']`` if given.
+    """
+
+    def count(self, job):
+        return len(job.params['user_ids'])
+
+    def run(self, job, events, size):
+        user_ids = job.params['user_ids'][job.processed:job.processed + size]
+        if not user_ids:
+            return 0
+        group_id = job.params.get('group_id')
+        expires_at = job.params.get('expires_at')
+        with transaction.atomic():
+            # bulk_create skips the post_save handler that invalidates cached bans.
+            UserBan.objects.bulk_create([
+                UserBan(
+                    user_id=user_id, group_id=group_id, is_global=group_id is None,
+                    banned_by_id=job.moderator_id, reason=job.reason,
+                    expires_at=parse_datetime(expires_at) if expires_at else None,
+                )
+                for user_id in user_ids
+            ])
+            for user_id in user_ids:
+                log_action('ban_user', job.moderator_id, group=group_id, target_user=user_id, reason=job.reason)
+            transaction.on_commit(lambda: invalidate_bans(*user_ids))
+        return len(user_ids)
+
+    def finish(self, job, events):
+        pass
+
+
+RUNNERS = {
+    'purge_user': PurgeUser(),
+    'lock_group': LockGroup(),
+    'ban_users': BanUsers(),
+}
+
+
+def run_batch(job_id):
+    """
+    Run the next batch of job ``job_id``. Returns whether another batch
+    should be queued.
+    """
+    job = BulkModerationJob.objects.get(pk=job_id)
+    if job.status in ('done', 'failed'):
+        return False
+    runner = RUNNERS[job.action]
+    if job.status == 'pending':
+        job.status = 'running'
+        job.total = runner.count(job)
+
+    events = GroupEvents(job.affected)
+    try:
+        # The batch and the job's progress commit together.
+        with audit_batch(), transaction.atomic():
+            processed = runner.run(job, events, batch_size())
+            job.processed += processed
+            job.affected = events.data
+            if not processed:
+                runner.finish(job, events)
+                job.status = 'done'
+                job.finished_at = timezone.now()
+            job.save()
+    except Exception as exc:
+        logger.exception('Bulk moderation job %s failed', job.pk)
+        # Not save(): the batch's progress was rolled back.
+        BulkModerationJob.objects.filter(pk=job.pk).update(
+            status='failed', error=str(exc), finished_at=timezone.now(), updated_at=timezone.now()
+        )
+        return False
+    return job.status == 'running'
@@ -121,3 +121,54 @@ class UserBan(models.Model):
         scope = "Global" if self.is_global else f"in {self.group.name}"
         return f"{self.user.username} banned {scope}"
 
+
+
+class BulkModerationJob(models.Model):
+    """
+    A bulk moderation action run in batches by Celery (see moderation.bulk).
+    ``processed`` out of ``total`` targets is the job's progress.
+    """
+    ACTION_CHOICES = [
+        ('purge_user', 'Purge User Content'),
+        ('lock_group', 'Lock Group Threads'),
+        ('ban_users', 'Ban Users'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    moderator = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='bulk_moderation_jobs'
+    )
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # user_id / user_ids, group_id (null for site-wide), expires_at
+    params = models.JSONField(default=dict)
+    reason = models.TextField(blank=True)
+
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    # {group id: {"thread_ids": [...], "reply_ids": [...]}}, broadcast once the job is done
+    affected = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'bulk_moderation_jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['moderator', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.action} ({self.status}, {self.processed}/{self.total})"
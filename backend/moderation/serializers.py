@@ -0,0 +1,52 @@
+"""
+Serializers for the moderation app.
+"""
+
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+from groups.models import Group
+from .models import BulkModerationJob
+
+User = get_user_model()
+
+
+class BulkModerationJobSerializer(serializers.ModelSerializer):
+    """A bulk moderation job and its progress (``processed`` of ``total`` targets)."""
+
+    class Meta:
+        model = BulkModerationJob
+        fields = [
+            'id', 'action', 'status', 'params', 'reason', 'total', 'processed',
+            'error', 'created_at', 'updated_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+
+class PurgeUserSerializer(serializers.Serializer):
+    """Delete a user's threads and replies in ``group``, or everywhere without one."""
+    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
+    group = serializers.PrimaryKeyRelatedField(queryset=Group.objects.all(), required=False, allow_null=True)
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class LockGroupSerializer(serializers.Serializer):
+    """Lock every thread in ``group``."""
+    group = serializers.PrimaryKeyRelatedField(queryset=Group.objects.all())
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class BanUsersSerializer(serializers.Serializer):
+    """Ban ``users`` from ``group``, or site-wide without one, until ``expires_at`` if given."""
+    users = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=10000)
+    group = serializers.PrimaryKeyRelatedField(queryset=Group.objects.all(), required=False, allow_null=True)
+    expires_at = serializers.DateTimeField(required=False, allow_null=True)
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate_users(self, value):
+        users = sorted(set(value))
+        found = set(User.objects.filter(pk__in=users).values_list('pk', flat=True))
+        missing = [user_id for user_id in users if user_id not in found]
+        if missing:
+            raise serializers.ValidationError(f'unknown users: {missing[:10]}')
+        return users
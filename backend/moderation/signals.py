@@ -0,0 +1,26 @@
+"""
+Signal handlers for the moderation app.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .audit import notify_targets
+from .bans import invalidate_bans
+from .models import ModerationLog, UserBan
+
+
+@receiver(post_save, sender=ModerationLog)
+def notify_target_user(sender, instance, created, **kwargs):
+    # Rows written through moderation.audit are bulk-inserted and notified there.
+    if created:
+        notify_targets([instance])
+
+
+@receiver(post_save, sender=UserBan)
+@receiver(post_delete, sender=UserBan)
+def invalidate_cached_bans(sender, instance, **kwargs):
+    # Again after commit, in case a concurrent read re-cached the old bans.
+    invalidate_bans(instance.user_id)
+    transaction.on_commit(lambda: invalidate_bans(instance.user_id))
@@ -0,0 +1,21 @@
+"""
+Celery tasks for the moderation app.
+"""
+
+from celery import shared_task
+
+from .audit import compact_logs
+from .bulk import run_batch
+
+
+@shared_task(ignore_result=True)
+def compact_moderation_logs():
+    """Shrink the metadata of old moderation log rows."""
+    compact_logs()
+
+
+@shared_task(ignore_result=True)
+def run_bulk_moderation(job_id):
+    """Run one batch of a bulk moderation job and queue the next."""
+    if run_batch(job_id):
+        run_bulk_moderation.delay(job_id)
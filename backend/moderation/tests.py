@@ -1,3 +1,291 @@
-from django.test import TestCase
+"""
+Tests for moderation.
+"""
 
-# Create your tests here.
+import time
+from datetime import timedelta
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Notification
+from dawgpound.routing import websocket_urlpatterns
+from forums.models import Reply, Thread
+from groups.models import Group, GroupMembership
+from messaging.models import PrivateChat
+from moderation.actions import delete_replies, lock_threads
+from moderation.audit import audit_batch, compact_logs, log_action
+from moderation.bans import is_banned
+from moderation.models import BulkModerationJob, ModerationLog, UserBan
+
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestBanRegistry:
+    """Test the cached ban registry and the write paths that consult it."""
+
+    @pytest.fixture
+    def groups(self, authenticated_user):
+        chess, music = Group.objects.create(name='Chess'), Group.objects.create(name='Music')
+        GroupMembership.objects.create(user=authenticated_user, group=chess)
+        return chess, music
+
+    def test_scopes_expiry_and_invalidation(self, authenticated_user, groups, django_assert_num_queries):
+        chess, music = groups
+        with django_assert_num_queries(1):
+            assert not is_banned(authenticated_user, chess.pk)
+            assert not is_banned(authenticated_user.pk)
+
+        ban = UserBan.objects.create(user=authenticated_user, group=chess)
+        assert is_banned(authenticated_user, chess.pk)
+        assert not is_banned(authenticated_user, music.pk)
+        assert not is_banned(authenticated_user)
+
+        UserBan.objects.create(user=authenticated_user, group=music, expires_at=timezone.now() - timedelta(minutes=1))
+        assert not is_banned(authenticated_user, music.pk)
+
+        ban.expires_at = timezone.now() + timedelta(milliseconds=200)
+        ban.save()
+        assert is_banned(authenticated_user, chess.pk)
+        time.sleep(0.25)
+        # Lapses on time, from the cached entry.
+        with django_assert_num_queries(0):
+            assert not is_banned(authenticated_user, chess.pk)
+
+        global_ban = UserBan.objects.create(user=authenticated_user, is_global=True)
+        assert is_banned(authenticated_user) and is_banned(authenticated_user, music.pk)
+        global_ban.delete()
+        assert not is_banned(authenticated_user)
+
+    def test_writes_are_rejected(self, authenticated_client, authenticated_user, groups):
+        chess, music = groups
+        thread = authenticated_client.post(f'/api/forums/groups/{chess.pk}/threads/', {
+            'title': 'Openings', 'content': 'e4 or d4?',
+        }).data
+        UserBan.objects.create(user=authenticated_user, group=chess)
+
+        response = authenticated_client.post(f'/api/forums/groups/{chess.pk}/threads/', {
+            'title': 'Endgames', 'content': 'Rook endings',
+        })
+        assert response.status_code == 403
+        assert response.data['detail'] == 'you are banned'
+        response = authenticated_client.post(f'/api/forums/threads/{thread["id"]}/replies/', {'content': 'bump'})
+        assert response.status_code == 403
+        assert authenticated_client.get(f'/api/forums/threads/{thread["id"]}/replies/').status_code == 200
+        assert authenticated_client.post(f'/api/groups/{music.pk}/join/').status_code == 200
+
+        UserBan.objects.create(user=authenticated_user, is_global=True)
+        other = Group.objects.create(name='Books')
+        assert authenticated_client.post(f'/api/groups/{other.pk}/join/').status_code == 403
+        chat = PrivateChat.objects.create()
+        chat.participants.add(authenticated_user)
+        response = authenticated_client.post(f'/api/messages/chats/{chat.pk}/messages/', {'content': 'hi'})
+        assert response.status_code == 403
+
+    def test_chat_socket_rejects_banned_sender(self, authenticated_user):
+        chat = PrivateChat.objects.create()
+        chat.participants.add(authenticated_user)
+        UserBan.objects.create(user=authenticated_user, is_global=True)
+
+        @async_to_sync
+        async def run():
+            communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f'/ws/chat/{chat.pk}/')
+            communicator.scope['user'] = authenticated_user
+            assert (await communicator.connect())[0]
+            await communicator.send_json_to({'type': 'message', 'content': 'hi'})
+            assert await communicator.receive_json_from() == {'type': 'error', 'error': 'you are banned'}
+            await communicator.disconnect()
+
+        run()
+
+
+@pytest.mark.django_db
+class TestAuditLog:
+    """Test the buffered audit log writer and bulk actions."""
+
+    @pytest.fixture
+    def spam(self, authenticated_user):
+        spammer = User.objects.create_user(
+            username='spammer', email='spam@example.com', university_email='spam@university.edu', password='x'
+        )
+        group = Group.objects.create(name='Chess')
+        thread = Thread.objects.create(group=group, author=authenticated_user, title='Openings', content='e4')
+        Reply.objects.bulk_create([Reply(thread=thread, author=spammer, content=f'buy {i}') for i in range(1000)])
+        Thread.objects.filter(pk=thread.pk).update(reply_count=1000)
+        return spammer, group, thread
+
+    def test_bulk_delete_logs_one_row_per_target_in_batches(
+            self, authenticated_user, spam, django_capture_on_commit_callbacks):
+        spammer, group, thread = spam
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            with django_capture_on_commit_callbacks(execute=True), audit_batch():
+                assert delete_replies(authenticated_user, Reply.objects.filter(author=spammer), 'spam') == 1000
+        elapsed = time.perf_counter() - started
+
+        logs = ModerationLog.objects.filter(action='delete_reply')
+        assert logs.count() == 1000
+        assert set(logs.values_list('group_id', 'thread_id', 'target_user_id')) == {(group.pk, thread.pk, spammer.pk)}
+        assert logs.filter(metadata__content='buy 7').count() == 1
+        inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "moderation_logs"')]
+        # Two flushes of MODERATION_LOG_BATCH_SIZE = 500; SQLite splits each
+        # INSERT further at its bound-parameter limit.
+        assert len(inserts) <= 10
+        # No per-row counter updates or thread lookups: what remains is the
+        # DELETE and INSERT chunks (100 and ~110 rows at a time on SQLite).
+        assert len(queries) < 40
+        assert elapsed < 1
+        thread.refresh_from_db()
+        assert thread.reply_count == 0
+        # One notification for the spammer across both flushes, not one per reply.
+        assert Notification.objects.get(recipient=spammer, kind='moderation').count == 1
+
+    def test_entries_wait_for_commit(self, authenticated_user, spam, django_capture_on_commit_callbacks):
+        _, group, thread = spam
+        with django_capture_on_commit_callbacks(execute=True), audit_batch():
+            try:
+                with transaction.atomic():
+                    lock_threads(authenticated_user, Thread.objects.filter(pk=thread.pk))
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            assert lock_threads(authenticated_user, Thread.objects.filter(pk=thread.pk)) == 1
+            assert not ModerationLog.objects.exists()
+        assert list(ModerationLog.objects.values_list('action', 'thread_id')) == [('lock_thread', thread.pk)]
+
+        # Outside a batch, entries are written as soon as they commit.
+        with django_capture_on_commit_callbacks(execute=True):
+            log_action('pin_thread', authenticated_user, group=group, thread=thread)
+        assert ModerationLog.objects.filter(action='pin_thread').exists()
+
+    def test_compact_old_metadata(self, authenticated_user, spam):
+        _, group, _ = spam
+        old, recent = ModerationLog.objects.bulk_create([
+            ModerationLog(action='delete_reply', group=group, metadata={
+                'reply_id': 1, 'content': 'x' * 500, 'attachments': [{'url': 'a'}],
+            }),
+            ModerationLog(action='delete_reply', group=group, metadata={'reply_id': 2, 'content': 'x' * 500}),
+        ])
+        ModerationLog.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=91))
+
+        assert compact_logs() == 1
+        assert compact_logs() == 0
+        old.refresh_from_db()
+        recent.refresh_from_db()
+        assert old.metadata == {'reply_id': 1, 'compacted': True}
+        assert recent.metadata['content'] == 'x' * 500
+
+
+@pytest.mark.django_db
+class TestBulkModeration:
+    """Test bulk moderation jobs and their endpoints."""
+
+    @pytest.fixture
+    def events(self, monkeypatch):
+        sent = []
+        monkeypatch.setattr('moderation.actions.broadcast_to_group', lambda group_id, payload: sent.append(
+            (group_id, payload)
+        ))
+        return sent
+
+    @pytest.fixture
+    def wave(self, authenticated_user, settings):
+        settings.MODERATION_BULK_BATCH_SIZE = 50
+        spammer = User.objects.create_user(
+            username='spammer', email='spam@example.com', university_email='spam@university.edu', password='x'
+        )
+        chess, music = Group.objects.create(name='Chess'), Group.objects.create(name='Music')
+        chess.moderators.add(authenticated_user)
+        legit = Thread.objects.create(group=chess, author=authenticated_user, title='Openings', content='e4')
+        spam_threads = Thread.objects.bulk_create([
+            Thread(group=group, author=spammer, title=f'buy {i}', content='cheap')
+            for group in (chess, music) for i in range(30)
+        ])
+        Reply.objects.bulk_create(
+            [Reply(thread=legit, author=spammer, content=f'buy {i}') for i in range(120)]
+            + [Reply(thread=legit, author=authenticated_user, content='ok')]
+            + [Reply(thread=spam_threads[0], author=authenticated_user, content='reported')]
+        )
+        Thread.objects.filter(pk=legit.pk).update(reply_count=121)
+        return spammer, chess, music, legit
+
+    def test_purge_in_group(self, authenticated_client, wave, events, django_capture_on_commit_callbacks):
+        spammer, chess, music, legit = wave
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post('/api/moderation/bulk/purge/', {
+                'user': spammer.pk, 'group': chess.pk, 'reason': 'spam',
+            }, format='json')
+        assert response.status_code == 202
+
+        job = BulkModerationJob.objects.get(pk=response.data['id'])
+        assert (job.status, job.total, job.processed) == ('done', 150, 150)
+        assert not Thread.objects.filter(group=chess, author=spammer).exists()
+        assert not Reply.objects.filter(author=spammer, thread__group=chess).exists()
+        assert Thread.objects.filter(group=music, author=spammer).count() == 30
+        legit.refresh_from_db()
+        assert legit.reply_count == 1
+        assert ModerationLog.objects.filter(action__in=['delete_thread', 'delete_reply']).count() == 150
+        # One event for the whole job, not one per batch or row.
+        assert len(events) == 1
+        group_id, payload = events[0]
+        assert group_id == chess.pk and payload['type'] == 'content_removed'
+        assert len(payload['thread_ids']) == 30 and len(payload['reply_ids']) == 120
+
+        detail = authenticated_client.get(f'/api/moderation/bulk/{job.pk}/')
+        assert detail.data['status'] == 'done' and detail.data['processed'] == 150
+
+    def test_lock_group_one_event_per_group(
+            self, authenticated_client, wave, events, django_capture_on_commit_callbacks):
+        _, chess, music, _ = wave
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post('/api/moderation/bulk/lock/', {'group': chess.pk}, format='json')
+        assert response.status_code == 202
+        assert not Thread.objects.filter(group=chess, locked=False).exists()
+        assert not Thread.objects.filter(group=music, locked=True).exists()
+        assert [(group_id, payload['type'], len(payload['thread_ids'])) for group_id, payload in events] == [
+            (chess.pk, 'threads_updated', 31)
+        ]
+        assert events[0][1]['updates'] == {'locked': True}
+
+    def test_mass_ban(self, authenticated_client, authenticated_user, wave, django_capture_on_commit_callbacks):
+        spammer, chess, music, _ = wave
+        users = User.objects.bulk_create([
+            User(username=f'bot{i}', email=f'bot{i}@example.com', university_email=f'bot{i}@university.edu')
+            for i in range(120)
+        ])
+        ids = [user.pk for user in users] + [spammer.pk]
+        assert not is_banned(spammer, chess.pk)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post('/api/moderation/bulk/ban/', {
+                'users': ids + ids[:5], 'group': chess.pk,
+            }, format='json')
+        assert response.status_code == 202
+        job = BulkModerationJob.objects.get(pk=response.data['id'])
+        assert (job.status, job.processed) == ('done', 121)
+        assert UserBan.objects.filter(group=chess).count() == 121
+        # The cached "not banned" entry was invalidated.
+        assert is_banned(spammer, chess.pk)
+        assert not is_banned(spammer, music.pk)
+        assert ModerationLog.objects.filter(action='ban_user').count() == 121
+
+    def test_permissions(self, authenticated_client, authenticated_user, wave):
+        spammer, chess, music, _ = wave
+        assert authenticated_client.post('/api/moderation/bulk/lock/', {'group': music.pk}).status_code == 403
+        assert authenticated_client.post('/api/moderation/bulk/purge/', {'user': spammer.pk}).status_code == 403
+        assert authenticated_client.post('/api/moderation/bulk/ban/', {
+            'users': [spammer.pk, 10 ** 6], 'group': chess.pk,
+        }, format='json').status_code == 400
+        assert not BulkModerationJob.objects.exists()
+
+        authenticated_user.is_staff = True
+        authenticated_user.save()
+        assert authenticated_client.post('/api/moderation/bulk/purge/', {'user': spammer.pk}).status_code == 202
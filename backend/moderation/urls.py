@@ -5,9 +5,12 @@ URLs for the moderation app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-# Router will be configured when views are created
+from .views import BulkModerationJobViewSet, ModerationLogExportView
+
 router = DefaultRouter()
+router.register('bulk', BulkModerationJobViewSet, basename='bulk-moderation')
 
 urlpatterns = [
+    path('logs/export/', ModerationLogExportView.as_view(), name='moderation-log-export'),
     path('', include(router.urls)),
 ]
@@ -1,3 +1,105 @@
-from django.shortcuts import render
+"""
+Views for the moderation app.
+"""
 
-# Create your views here.
+from django.utils.dateparse import parse_datetime
+from rest_framework import mixins, permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.export import moderation_records, streaming_export
+from . import bulk
+from .models import BulkModerationJob
+from .serializers import (
+    BanUsersSerializer, BulkModerationJobSerializer, LockGroupSerializer, PurgeUserSerializer,
+)
+
+
+class ModerationLogExportView(APIView):
+    """
+    Staff-only NDJSON export of the moderation log for audits, streamed as it
+    is read. Filters: ``group`` id, ``since`` and ``until`` (ISO 8601
+    datetimes); ``?compress=gzip`` gzips the stream.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        params = {}
+        group = request.query_params.get('group')
+        if group is not None:
+            if not group.isdigit():
+                raise ValidationError({'group': 'must be a group id'})
+            params['group_id'] = int(group)
+        for name in ('since', 'until'):
+            value = request.query_params.get(name)
+            if value is not None:
+                params[name] = parse_datetime(value)
+                if params[name] is None:
+                    raise ValidationError({name: 'must be an ISO 8601 datetime'})
+        return streaming_export(
+            moderation_records(**params),
+            'moderation-log.ndjson',
+            compress=request.query_params.get('compress') == 'gzip',
+        )
+
+
+def _authorize(user, group):
+    """Staff may act anywhere; group moderators only within their group."""
+    if user.is_staff:
+        return
+    if group is None:
+        raise PermissionDenied('only staff may moderate site-wide')
+    if not group.moderators.filter(pk=user.pk).exists():
+        raise PermissionDenied('must be a moderator of this group')
+
+
+class BulkModerationJobViewSet(mixins.ListModelMixin,
+                               mixins.RetrieveModelMixin,
+                               viewsets.GenericViewSet):
+    """
+    Bulk moderation for spam waves, run as batched Celery jobs (see
+    ``moderation.bulk``). ``purge``, ``lock`` and ``ban`` start a job and
+    answer 202 with it; poll the job for progress. Moderators see their own
+    jobs, staff see every job.
+    """
+    serializer_class = BulkModerationJobSerializer
+
+    def get_queryset(self):
+        jobs = BulkModerationJob.objects.all()
+        if not self.request.user.is_staff:
+            jobs = jobs.filter(moderator=self.request.user)
+        return jobs
+
+    def start(self, request, serializer_class, job_action, params):
+        serializer = serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        _authorize(request.user, data.get('group'))
+        job = bulk.start(request.user, job_action, params(data), data['reason'])
+        return Response(BulkModerationJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['post'])
+    def purge(self, request):
+        """Delete every thread and reply by ``user`` in ``group``, or everywhere."""
+        return self.start(request, PurgeUserSerializer, 'purge_user', lambda data: {
+            'user_id': data['user'].pk,
+            'group_id': data['group'].pk if data.get('group') else None,
+        })
+
+    @action(detail=False, methods=['post'])
+    def lock(self, request):
+        """Lock every thread in ``group``."""
+        return self.start(request, LockGroupSerializer, 'lock_group', lambda data: {
+            'group_id': data['group'].pk,
+        })
+
+    @action(detail=False, methods=['post'])
+    def ban(self, request):
+        """Ban ``users`` from ``group``, or site-wide."""
+        return self.start(request, BanUsersSerializer, 'ban_users', lambda data: {
+            'user_ids': data['users'],
+            'group_id': data['group'].pk if data.get('group') else None,
+            'expires_at': data['expires_at'].isoformat() if data.get('expires_at') else None,
+        })
@@ -0,0 +1,65 @@
+"""
+Block-graph index.
+
+For each user the index holds two id sets: who they block and who blocks
+them. Both are loaded for many users with one query on the ``blocked_users``
+through table and served from ``core.cache``, so "has either user blocked
+the other" is a set lookup instead of a join. Entries are invalidated by the
+``m2m_changed`` handler in ``users.signals``.
+"""
+
+from django.conf import settings
+from django.db.models import Q
+
+from core.cache import TwoTierCache
+from .models import User
+
+
+def _load_blocks(ids):
+    ids = set(ids)
+    blocks = {user_id: (set(), set()) for user_id in ids}
+    pairs = User.blocked_users.through.objects.filter(
+        Q(from_user_id__in=ids) | Q(to_user_id__in=ids)
+    ).values_list('from_user_id', 'to_user_id')
+    for blocker, blocked in pairs:
+        if blocker in blocks:
+            blocks[blocker][0].add(blocked)
+        if blocked in blocks:
+            blocks[blocked][1].add(blocker)
+    return {user_id: (frozenset(out), frozenset(into)) for user_id, (out, into) in blocks.items()}
+
+
+block_cache = TwoTierCache(
+    'blocks',
+    _load_blocks,
+    local_ttl=getattr(settings, 'USER_CACHE_LOCAL_TTL', 5),
+    shared_ttl=getattr(settings, 'USER_CACHE_TTL', 300),
+)
+
+
+def _user_id(user):
+    return getattr(user, 'pk', user)
+
+
+def blocked_ids(user):
+    """Ids of users blocked by, or blocking, ``user`` (a user or an id)."""
+    blocking, blocked_by = block_cache.get(_user_id(user))
+    return blocking | blocked_by
+
+
+def is_blocked(user, other):
+    """Whether either of the two users has blocked the other."""
+    return _user_id(other) in blocked_ids(user)
+
+
+def filter_visible(viewer, candidate_ids):
+    """
+    Return ``candidate_ids`` minus the users blocking or blocked by
+    ``viewer``, preserving order. One cache lookup for the whole list.
+    """
+    hidden = blocked_ids(viewer)
+    return [candidate for candidate in candidate_ids if candidate not in hidden]
+
+
+def invalidate_blocks(*user_ids):
+    block_cache.invalidate(*user_ids)
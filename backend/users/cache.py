@@ -0,0 +1,73 @@
+"""
+Cached user profile lookups.
+
+``User`` rows (with their ``privacy_settings``, ``majors`` and
+``interests_hobbies`` JSON) are read on every authenticated request and for
+every author in a list, so they are served from ``core.cache``. The entries
+are invalidated by the signal handlers in ``users.signals``.
+"""
+
+from django.conf import settings
+
+from core.cache import TwoTierCache
+from .models import User
+
+
+def _load_users(ids):
+    return User.objects.in_bulk(ids)
+
+
+async def _aload_users(ids):
+    return await User.objects.ain_bulk(ids)
+
+
+user_cache = TwoTierCache(
+    'user',
+    _load_users,
+    local_ttl=getattr(settings, 'USER_CACHE_LOCAL_TTL', 5),
+    shared_ttl=getattr(settings, 'USER_CACHE_TTL', 300),
+    aloader=_aload_users,
+)
+
+
+def get_user(user_id):
+    """Return the ``User`` with ``user_id``, or ``None``."""
+    return user_cache.get(user_id)
+
+
+def get_users(user_ids):
+    """Return ``{id: User}`` for the given ids in one round trip per tier."""
+    return user_cache.get_many(set(user_ids))
+
+
+def attach_users(objects, field='author'):
+    """
+    Set ``obj.<field>`` from the cache for every object, instead of joining
+    the users table. Objects whose ``<field>_id`` is null are left alone.
+    """
+    users = get_users(getattr(obj, f'{field}_id') for obj in objects if getattr(obj, f'{field}_id'))
+    for obj in objects:
+        user = users.get(getattr(obj, f'{field}_id'))
+        if user is not None:
+            setattr(obj, field, user)
+    return objects
+
+
+async def aget_user(user_id):
+    return await user_cache.aget(user_id)
+
+
+async def aattach_users(objects, field='author'):
+    """``attach_users`` for async views."""
+    users = await user_cache.aget_many(
+        {getattr(obj, f'{field}_id') for obj in objects if getattr(obj, f'{field}_id')}
+    )
+    for obj in objects:
+        user = users.get(getattr(obj, f'{field}_id'))
+        if user is not None:
+            setattr(obj, field, user)
+    return objects
+
+
+def invalidate_users(*user_ids):
+    user_cache.invalidate(*user_ids)
@@ -0,0 +1,90 @@
+"""
+WebSocket consumer for online presence.
+
+Clients connect to ``ws/presence/`` and receive ``{"type": "presence",
+"online": [...], "heartbeat_interval": ...}`` with their friends who are
+online. They then send ``{"type": "heartbeat"}`` every
+``heartbeat_interval`` seconds and may ask ``{"type": "query", "users":
+[...]}``, answered with the online subset of those users who are friends.
+When a friend comes online or goes offline the socket receives
+``{"type": "online"|"offline", "user": ...}``. See ``users.presence``.
+The same socket carries the user's notifications as ``{"type":
+"notification", "notification": {...}}`` (see ``core.notifications``).
+
+The friend list is read once at connect; friendships made later show up
+after the client reconnects.
+"""
+
+import json
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+from core.querycount import QueryBudgetConsumerMixin
+from . import presence
+from .friends import friend_ids
+
+
+def presence_group_name(user_id):
+    return f'presence_{user_id}'
+
+
+class PresenceConsumer(QueryBudgetConsumerMixin, AsyncJsonWebsocketConsumer):
+    """Presence for the connected user and their friends."""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4403)
+            return
+
+        self.user_id = user.pk
+        self.friends = await database_sync_to_async(friend_ids)(user)
+        await self.channel_layer.group_add(presence_group_name(self.user_id), self.channel_name)
+        await self.accept()
+        if await presence.heartbeat(self.user_id, self.channel_name):
+            await self.notify_friends('online')
+        await self.send_json({
+            'type': 'presence',
+            'online': sorted(await presence.online(self.friends)),
+            'heartbeat_interval': getattr(settings, 'PRESENCE_HEARTBEAT_INTERVAL', 30),
+        })
+
+    async def disconnect(self, code):
+        if not hasattr(self, 'user_id'):
+            return
+        await self.channel_layer.group_discard(presence_group_name(self.user_id), self.channel_name)
+        if await presence.leave(self.user_id, self.channel_name):
+            await self.notify_friends('offline')
+
+    async def receive_json(self, content, **kwargs):
+        kind = content.get('type')
+        if kind == 'heartbeat':
+            if await presence.heartbeat(self.user_id, self.channel_name):
+                await self.notify_friends('online')
+        elif kind == 'query':
+            users = content.get('users')
+            if not isinstance(users, list):
+                await self.send_json({'type': 'error', 'error': 'users must be a list of ids'})
+                return
+            asked = {user_id for user_id in users if isinstance(user_id, int)} & self.friends
+            await self.send_json({'type': 'presence', 'online': sorted(await presence.online(asked))})
+        else:
+            await self.send_json({'type': 'error', 'error': 'unsupported message type'})
+
+    async def notify_friends(self, kind):
+        """Push ``kind`` to the friends with a presence socket open."""
+        text = json.dumps({'type': kind, 'user': self.user_id})
+        for friend_id in await presence.online(self.friends):
+            await self.channel_layer.group_send(presence_group_name(friend_id), {
+                'type': 'presence.event',
+                'text': text,
+            })
+
+    async def presence_event(self, event):
+        await self.send(text_data=event['text'])
+
+    async def notification_event(self, event):
+        await self.send(text_data=event['text'])
+
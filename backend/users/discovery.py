@@ -0,0 +1,182 @@
+"""
+User discovery for DawgPound.
+
+Recommends users who share majors, interests, year of study and groups with
+the viewer. Candidates come from the precomputed ``UserNeighbor`` table
+(see ``users.similarity``) when it has rows for the viewer, and otherwise from
+the ``UserTag`` inverted index and the viewer's groups, so a request touches
+only the postings for the viewer's own tags instead of scoring every user on
+campus.
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Sum, Value, When
+
+from groups.models import GroupMembership
+from .blocks import blocked_ids
+from .friends import friend_ids, friends_of_friends, mutual_counts
+from .models import User, UserNeighbor, UserTag
+
+
+MAJOR_WEIGHT = 10
+INTEREST_WEIGHT = 5
+YEAR_WEIGHT = 8
+SHARED_GROUP_WEIGHT = 12
+MUTUAL_FRIEND_WEIGHT = 6
+
+
+def is_discoverable(user):
+    """Only active, verified users who finished onboarding are recommended."""
+    return user.is_active and user.is_verified() and user.onboarding_completed
+
+
+def user_tag_postings(user):
+    """Return the set of ``(kind, value)`` tags for a user."""
+    tags = set()
+    tags.update(('major', m) for m in user.majors or [] if m)
+    tags.update(('interest', i) for i in user.interests_hobbies or [] if i)
+    if user.year_of_study:
+        tags.add(('year', user.year_of_study))
+    return tags
+
+
+@transaction.atomic
+def index_user(user):
+    """Bring a user's ``UserTag`` postings in line with their profile."""
+    wanted = user_tag_postings(user) if is_discoverable(user) else set()
+    existing = set(UserTag.objects.filter(user=user).values_list('kind', 'value'))
+
+    stale = existing - wanted
+    if stale:
+        stale_q = Q()
+        for kind, value in stale:
+            stale_q |= Q(kind=kind, value=value)
+        UserTag.objects.filter(stale_q, user=user).delete()
+
+    UserTag.objects.bulk_create(
+        [UserTag(user=user, kind=kind, value=value) for kind, value in wanted - existing],
+        ignore_conflicts=True
+    )
+
+
+def tag_match_q(user):
+    """Match tag postings sharing a major, interest or year with ``user``."""
+    match = Q(pk__in=[])
+    if user.majors:
+        match |= Q(kind='major', value__in=user.majors)
+    if user.interests_hobbies:
+        match |= Q(kind='interest', value__in=user.interests_hobbies)
+    if user.year_of_study:
+        match |= Q(kind='year', value=user.year_of_study)
+    return match
+
+
+_TAG_WEIGHT = Sum(Case(
+    When(kind='major', then=Value(MAJOR_WEIGHT)),
+    When(kind='interest', then=Value(INTEREST_WEIGHT)),
+    When(kind='year', then=Value(YEAR_WEIGHT)),
+    default=Value(0),
+    output_field=IntegerField(),
+))
+
+
+def _index_candidates(user, excluded, my_group_ids, pool_size):
+    """Candidate ids from the tag index and the viewer's groups."""
+    candidates = set(
+        UserTag.objects
+        .filter(tag_match_q(user))
+        .exclude(user_id__in=excluded)
+        .values('user_id')
+        .annotate(score=_TAG_WEIGHT)
+        .order_by('-score')
+        .values_list('user_id', flat=True)[:pool_size]
+    )
+    if my_group_ids:
+        candidates.update(
+            GroupMembership.objects
+            .filter(group_id__in=my_group_ids)
+            .exclude(user_id__in=excluded)
+            .values_list('user_id', flat=True)[:pool_size]
+        )
+    return candidates
+
+
+def recommend_users(user, limit=10):
+    """
+    Return up to ``limit`` recommended users for ``user``, best first.
+
+    Each entry is a dict with the ``user`` instance, its ``score`` and the
+    shared majors/interests/group count behind it. The candidate pool is the
+    viewer's precomputed nearest neighbours; users not yet covered by the
+    last batch run fall back to the top ``DISCOVERY_CANDIDATE_POOL`` users by
+    tag score plus the same number of recent co-members of the viewer's
+    groups. Friends of friends are always added to the pool. Every candidate
+    is then scored exactly, mutual friends included, so stale neighbour
+    scores never leak into the response.
+    """
+    if not user.onboarding_completed:
+        return []
+
+    pool_size = getattr(settings, 'DISCOVERY_CANDIDATE_POOL', 200)
+    excluded = blocked_ids(user) | {user.id}
+    my_group_ids = list(GroupMembership.objects.filter(user=user).values_list('group_id', flat=True))
+
+    candidates = set(
+        UserNeighbor.objects
+        .filter(user=user)
+        .exclude(neighbor_id__in=excluded)
+        .order_by('-score')
+        .values_list('neighbor_id', flat=True)[:pool_size]
+    )
+    if not candidates:
+        candidates = _index_candidates(user, excluded, my_group_ids, pool_size)
+    candidates.update(uid for uid, _ in friends_of_friends(user, limit=pool_size))
+    if not candidates:
+        return []
+
+    shared_groups = Counter()
+    if my_group_ids:
+        shared_groups.update(
+            GroupMembership.objects
+            .filter(group_id__in=my_group_ids, user_id__in=candidates)
+            .values_list('user_id', flat=True)
+        )
+
+    users = {
+        u.id: u for u in User.objects.filter(
+            id__in=candidates, is_active=True, onboarding_completed=True, verified_at__isnull=False
+        )
+    }
+    friends = friend_ids(user)
+    mutual_friends = mutual_counts(user, candidates)
+    my_majors = set(user.majors or [])
+    my_interests = set(user.interests_hobbies or [])
+
+    scored = []
+    for uid, candidate in users.items():
+        shared_majors = [m for m in candidate.majors or [] if m in my_majors]
+        shared_interests = [i for i in candidate.interests_hobbies or [] if i in my_interests]
+        same_year = bool(user.year_of_study) and candidate.year_of_study == user.year_of_study
+        score = (
+            len(shared_majors) * MAJOR_WEIGHT
+            + len(shared_interests) * INTEREST_WEIGHT
+            + (YEAR_WEIGHT if same_year else 0)
+            + shared_groups[uid] * SHARED_GROUP_WEIGHT
+            + mutual_friends.get(uid, 0) * MUTUAL_FRIEND_WEIGHT
+        )
+        if score > 0:
+            scored.append({
+                'user': candidate,
+                'score': score,
+                'is_friend': uid in friends,
+                'shared_majors': shared_majors,
+                'shared_interests': shared_interests,
+                'shared_groups': shared_groups[uid],
+                'mutual_friends': mutual_friends.get(uid, 0),
+            })
+
+    scored.sort(key=lambda entry: (-entry['score'], entry['user'].id))
+    return scored[:limit]
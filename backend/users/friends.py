@@ -0,0 +1,80 @@
+"""
+Friend graph queries.
+
+``Friendship`` stores each pair once as ``(user1, user2)``, so reading it
+means OR-ing two indexes and self-joining for anything beyond one hop. These
+helpers read ``FriendEdge`` instead, which holds both directions of every
+friendship under a unique ``(user, friend)`` index:
+
+- ``friends(u)`` is one index range scan,
+- ``mutual(u, v)`` and ``mutual_counts(u, ids)`` join two ranges,
+- ``friends_of_friends(u)`` groups the second hop in one statement.
+"""
+
+from django.db.models import Count
+
+from .blocks import blocked_ids
+from .models import FriendEdge
+
+
+def _user_id(user):
+    return getattr(user, 'pk', user)
+
+
+def _friends_subquery(user):
+    return FriendEdge.objects.filter(user_id=_user_id(user)).values('friend_id')
+
+
+def friends(user):
+    """Sorted ids of ``user``'s friends (a user or an id)."""
+    return list(
+        FriendEdge.objects.filter(user_id=_user_id(user))
+        .order_by('friend_id').values_list('friend_id', flat=True)
+    )
+
+
+def friend_ids(user):
+    """Set of ``user``'s friends' ids."""
+    return set(friends(user))
+
+
+def are_friends(user, other):
+    return FriendEdge.objects.filter(user_id=_user_id(user), friend_id=_user_id(other)).exists()
+
+
+def mutual(user, other):
+    """Sorted ids of the friends ``user`` and ``other`` have in common."""
+    return list(
+        FriendEdge.objects
+        .filter(user_id=_user_id(user), friend_id__in=_friends_subquery(other))
+        .order_by('friend_id').values_list('friend_id', flat=True)
+    )
+
+
+def mutual_counts(user, candidate_ids):
+    """``{candidate_id: mutual friend count}`` for candidates with any in common."""
+    return dict(
+        FriendEdge.objects
+        .filter(user_id__in=candidate_ids, friend_id__in=_friends_subquery(user))
+        .values('user_id').annotate(mutual=Count('id'))
+        .values_list('user_id', 'mutual')
+    )
+
+
+def friends_of_friends(user, limit=20):
+    """
+    Up to ``limit`` ``(user_id, mutual_count)`` pairs for people two hops
+    from ``user`` who are not already friends, most mutual friends first.
+    Users blocking or blocked by ``user`` are skipped.
+    """
+    user_id = _user_id(user)
+    hidden = blocked_ids(user_id) | {user_id}
+    rows = (
+        FriendEdge.objects
+        .filter(user_id__in=_friends_subquery(user_id))
+        .exclude(friend_id__in=_friends_subquery(user_id))
+        .values('friend_id').annotate(mutual=Count('id'))
+        .order_by('-mutual', 'friend_id')
+        .values_list('friend_id', 'mutual')[:limit + len(hidden)]
+    )
+    return [(uid, n) for uid, n in rows if uid not in hidden][:limit]
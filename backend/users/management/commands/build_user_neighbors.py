@@ -0,0 +1,34 @@
+"""
+Recompute the precomputed user-to-user similarity table.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.similarity import rebuild_user_neighbors
+
+
+class Command(BaseCommand):
+    help = 'Score every pair of discoverable users and store each user\'s top-K neighbours.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=50,
+            help='Number of neighbours kept per user (default: 50).'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of users scored per matrix product (default: 1000).'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        users = rebuild_user_neighbors(k=options['top_k'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {users} users in {time.perf_counter() - started:.1f}s.'
+        ))
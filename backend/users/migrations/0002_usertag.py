@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('major', 'Major'), ('interest', 'Interest'), ('year', 'Year')], max_length=20)),
+                ('value', models.CharField(max_length=255)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'user_tags',
+                'indexes': [models.Index(fields=['kind', 'value'], name='user_tags_kind_6ee4aa_idx')],
+                'unique_together': {('user', 'kind', 'value')},
+            },
+        ),
+    ]
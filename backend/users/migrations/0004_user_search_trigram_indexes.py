@@ -0,0 +1,16 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from users.search import install_trigram_indexes, remove_trigram_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_userneighbor'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(install_trigram_indexes, remove_trigram_indexes),
+    ]
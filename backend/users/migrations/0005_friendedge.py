@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_friend_edges(apps, schema_editor):
+    Friendship = apps.get_model('users', 'Friendship')
+    FriendEdge = apps.get_model('users', 'FriendEdge')
+    batch = []
+    for user1_id, user2_id in Friendship.objects.values_list('user1_id', 'user2_id').iterator(chunk_size=5000):
+        batch.append(FriendEdge(user_id=user1_id, friend_id=user2_id))
+        batch.append(FriendEdge(user_id=user2_id, friend_id=user1_id))
+        if len(batch) >= 10000:
+            FriendEdge.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    FriendEdge.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FriendEdge',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('friend', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='friend_edges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'friend_edges',
+                'unique_together': {('user', 'friend')},
+            },
+        ),
+        migrations.RunPython(backfill_friend_edges, migrations.RunPython.noop),
+    ]
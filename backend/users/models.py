@@ -121,3 +121,94 @@ class Friendship(models.Model):
     def __str__(self):
         return f"{self.user1.username} <-> {self.user2.username}"
 
+
+class FriendEdge(models.Model):
+    """
+    One direction of a friendship.
+
+    Every ``Friendship`` is mirrored as two edges, ``(user1, user2)`` and
+    ``(user2, user1)``, kept in sync by ``users.signals``. The unique
+    ``(user, friend)`` index makes a user's friend list a single index range
+    scan, and mutual friends and friends-of-friends plain joins on it.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='friend_edges'
+    )
+    friend = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+
+    class Meta:
+        db_table = 'friend_edges'
+        unique_together = [['user', 'friend']]
+
+    def __str__(self):
+        return f"{self.user.username} -> {self.friend.username}"
+
+
+class UserTag(models.Model):
+    """
+    Inverted index entry mapping an onboarding tag to a user.
+
+    Rebuilt from ``User.majors``, ``interests_hobbies`` and ``year_of_study``
+    whenever a user's onboarding data changes, and used by discovery to find
+    users sharing a tag without scanning the users table. Only verified,
+    onboarded users are indexed.
+    """
+    KIND_CHOICES = [
+        ('major', 'Major'),
+        ('interest', 'Interest'),
+        ('year', 'Year'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='tags'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        db_table = 'user_tags'
+        unique_together = [['user', 'kind', 'value']]
+        indexes = [
+            models.Index(fields=['kind', 'value']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.kind}={self.value}"
+
+
+class UserNeighbor(models.Model):
+    """
+    Precomputed top-K similar users for a user.
+
+    Written in bulk by ``users.similarity.rebuild_user_neighbors`` and read
+    directly by the user recommendation endpoints.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='neighbors'
+    )
+    neighbor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'user_neighbors'
+        unique_together = [['user', 'neighbor']]
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} ~ {self.neighbor.username} ({self.score})"
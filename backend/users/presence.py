@@ -0,0 +1,69 @@
+"""
+Online presence.
+
+Each user with an open presence socket (``ws/presence/``) has one entry in
+the shared cache (Redis in production): ``presence:<user>`` maps every live
+session (one per socket, so per tab or device) to the time it expires. A
+session heartbeats every ``PRESENCE_HEARTBEAT_INTERVAL`` seconds. That
+pushes its expiry ``PRESENCE_TTL`` seconds ahead and drops expired sessions
+of the same user. The key itself expires with its newest session, so a user
+whose clients all vanish goes offline without anyone cleaning up.
+
+A user is online while any session is live. ``online`` answers that for
+any number of users with a single ``get_many``. The consumer only pushes
+transitions: first session up, last session down. They go to the friends
+who have a presence socket of their own.
+
+Two sessions of the same user can race on the read-modify-write of the
+entry. The session that loses re-adds itself on its next heartbeat.
+Sessions that disappear without disconnecting expire silently. Friends
+see them offline on their next query, but no offline event is pushed.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def presence_key(user_id):
+    return f'presence:{user_id}'
+
+
+def _ttl():
+    return getattr(settings, 'PRESENCE_TTL', 90)
+
+
+def _live(sessions, now):
+    return {session: expires for session, expires in (sessions or {}).items() if expires > now}
+
+
+async def heartbeat(user_id, session):
+    """Mark ``session`` live. Returns whether the user just came online."""
+    now = time.time()
+    sessions = _live(await cache.aget(presence_key(user_id)), now)
+    came_online = not sessions
+    sessions[session] = now + _ttl()
+    await cache.aset(presence_key(user_id), sessions, _ttl())
+    return came_online
+
+
+async def leave(user_id, session):
+    """End ``session``. Returns whether the user just went offline."""
+    now = time.time()
+    sessions = _live(await cache.aget(presence_key(user_id)), now)
+    if sessions.pop(session, None) is None:
+        return False
+    if sessions:
+        await cache.aset(presence_key(user_id), sessions, max(sessions.values()) - now)
+        return False
+    await cache.adelete(presence_key(user_id))
+    return True
+
+
+async def online(user_ids):
+    """The subset of ``user_ids`` that are online, in one cache round trip."""
+    now = time.time()
+    keys = {presence_key(user_id): user_id for user_id in user_ids}
+    found = await cache.aget_many(keys)
+    return {keys[key] for key, sessions in found.items() if _live(sessions, now)}
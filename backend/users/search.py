@@ -0,0 +1,75 @@
+"""
+User search for DawgPound.
+
+Matches usernames, names and emails by substring and, on PostgreSQL, by
+trigram word similarity so typos still find people ("jonh" -> "john").
+Every searched column has a ``pg_trgm`` GIN index on ``UPPER(column)``,
+which serves both Django's ``icontains``/``istartswith`` (``UPPER(col::text)
+LIKE ...``) and the ``%>`` word-similarity operator used here, so a search is
+a few index scans instead of a sequential scan of the users table. Blocked
+users, in either direction, come from the ``users.blocks`` index. Other
+databases (SQLite in the test suite) only get substring matching.
+"""
+
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest, Upper
+
+from .blocks import blocked_ids
+from .models import User
+
+
+# Columns matched by substring; the first three are also matched fuzzily.
+SEARCH_FIELDS = ['username', 'first_name', 'last_name', 'email', 'university_email']
+FUZZY_FIELDS = ['username', 'first_name', 'last_name']
+
+
+def install_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS users_{field}_trgm ON users USING gin (UPPER({field}) gin_trgm_ops)'
+        )
+
+
+def remove_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for field in SEARCH_FIELDS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS users_{field}_trgm')
+
+
+def search_users(user, query, limit=20):
+    """
+    Return up to ``limit`` verified, active users matching ``query``.
+
+    Prefix matches on the username or names rank first, then trigram
+    similarity (PostgreSQL only), then username order. ``user`` and users
+    blocking or blocked by them are never returned.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    needle = query.upper()
+
+    match = Q()
+    for field in SEARCH_FIELDS:
+        match |= Q(**{f'{field}__icontains': query})
+    prefix = Q(username__istartswith=query) | Q(first_name__istartswith=query) | Q(last_name__istartswith=query)
+    score = Case(When(prefix, then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+
+    if connection.vendor == 'postgresql':
+        for field in FUZZY_FIELDS:
+            match |= TrigramWordSimilar(Upper(field), Value(needle))
+        score = score + Greatest(*[TrigramWordSimilarity(Value(needle), Upper(field)) for field in FUZZY_FIELDS])
+
+    return list(
+        User.objects
+        .filter(match, is_active=True, verified_at__isnull=False)
+        .exclude(pk__in=blocked_ids(user) | {user.pk})
+        .annotate(score=score)
+        .order_by(F('score').desc(), 'username')[:limit]
+    )
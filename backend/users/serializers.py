@@ -0,0 +1,35 @@
+"""
+Serializers for the users app.
+"""
+
+from rest_framework import serializers
+from .models import User
+
+
+class UserSummarySerializer(serializers.ModelSerializer):
+    """Compact user representation embedded in other resources."""
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
+        read_only_fields = fields
+
+
+class UserSearchResultSerializer(serializers.ModelSerializer):
+    """A user search hit with the profile fields shown in results."""
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name', 'majors', 'interests_hobbies', 'year_of_study']
+        read_only_fields = fields
+
+
+class RecommendedUserSerializer(serializers.Serializer):
+    """A user recommendation with the overlap that produced it."""
+    user = UserSummarySerializer()
+    score = serializers.IntegerField()
+    is_friend = serializers.BooleanField()
+    shared_majors = serializers.ListField(child=serializers.CharField())
+    shared_interests = serializers.ListField(child=serializers.CharField())
+    shared_groups = serializers.IntegerField()
+    mutual_friends = serializers.IntegerField()
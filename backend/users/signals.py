@@ -0,0 +1,97 @@
+"""
+Signal handlers for the users app.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .blocks import invalidate_blocks
+from .cache import invalidate_users
+from core.notifications import notify
+from .models import FriendEdge, FriendRequest, Friendship, User
+from . import tasks
+
+
+# Fields that feed the discovery tag index; saves touching none of them
+# (e.g. ``last_login`` on every token refresh) skip reindexing.
+INDEXED_FIELDS = {
+    'majors', 'interests_hobbies', 'year_of_study',
+    'onboarding_completed', 'verified_at', 'is_active',
+}
+
+
+@receiver(post_save, sender=User)
+def reindex_user_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if created and not instance.onboarding_completed:
+        return
+    if update_fields is not None and not INDEXED_FIELDS & set(update_fields):
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: tasks.reindex_user.delay(user_id))
+
+
+@receiver(post_save, sender=Friendship)
+@receiver(post_delete, sender=Friendship)
+def refresh_overlap_on_friendship_change(sender, instance, **kwargs):
+    if kwargs.get('created') is False:
+        return
+    user1_id, user2_id = instance.user1_id, instance.user2_id
+    transaction.on_commit(lambda: tasks.friendship_changed.delay(user1_id, user2_id))
+
+
+@receiver(post_save, sender=Friendship)
+def add_friend_edges(sender, instance, created, **kwargs):
+    if created:
+        FriendEdge.objects.bulk_create([
+            FriendEdge(user_id=instance.user1_id, friend_id=instance.user2_id),
+            FriendEdge(user_id=instance.user2_id, friend_id=instance.user1_id),
+        ], ignore_conflicts=True)
+
+
+@receiver(post_delete, sender=Friendship)
+def remove_friend_edges(sender, instance, **kwargs):
+    FriendEdge.objects.filter(
+        user_id__in=[instance.user1_id, instance.user2_id],
+        friend_id__in=[instance.user1_id, instance.user2_id],
+    ).delete()
+
+
+@receiver(post_save, sender=FriendRequest)
+def notify_on_friend_request(sender, instance, created, **kwargs):
+    if created:
+        notify(
+            'friend_request', [instance.to_user_id], f'user:{instance.from_user_id}', instance.from_user_id,
+            {'request_id': instance.pk, 'username': instance.from_user.username},
+        )
+
+
+def _invalidate(*user_ids):
+    # Again after commit, in case a concurrent read re-cached the old row.
+    invalidate_users(*user_ids)
+    transaction.on_commit(lambda: invalidate_users(*user_ids))
+
+
+def _invalidate_blocks(*user_ids):
+    invalidate_blocks(*user_ids)
+    transaction.on_commit(lambda: invalidate_blocks(*user_ids))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    _invalidate(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.blocked_users.through)
+def invalidate_cached_blocks(sender, instance, action, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # pk_set is not provided for clear(); collect both sides before they go.
+        through = User.blocked_users.through.objects
+        pk_set = set(through.filter(from_user=instance).values_list('to_user_id', flat=True))
+        pk_set.update(through.filter(to_user=instance).values_list('from_user_id', flat=True))
+    elif action not in ('post_add', 'post_remove'):
+        return
+    _invalidate(instance.pk, *pk_set)
+    _invalidate_blocks(instance.pk, *pk_set)
+
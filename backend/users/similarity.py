@@ -0,0 +1,262 @@
+"""
+Batch user-to-user similarity scoring for DawgPound.
+
+Scores every pair of discoverable users with the discovery weights (shared
+majors x10, shared interests x5, same year +8, shared groups x12) as sparse
+matrix products instead of per-pair dict comparisons. Users and their
+attributes are encoded as a binary user x feature incidence matrix ``A``
+whose columns are majors, interests, years and groups; with ``w`` the
+per-column weight, ``A @ diag(w) @ A.T`` is the full score matrix. It is
+computed one cohort of rows at a time and reduced to the top-K neighbours
+per user, which are stored in ``UserNeighbor``.
+
+Run ``python benchmarks/user_similarity.py`` for a comparison against the
+per-pair loop on synthetic campuses.
+"""
+
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+
+from groups.models import GroupMembership
+from .discovery import INTEREST_WEIGHT, MAJOR_WEIGHT, SHARED_GROUP_WEIGHT, YEAR_WEIGHT
+from .models import User, UserNeighbor
+
+
+FEATURE_WEIGHTS = {
+    'major': MAJOR_WEIGHT,
+    'interest': INTEREST_WEIGHT,
+    'year': YEAR_WEIGHT,
+    'group': SHARED_GROUP_WEIGHT,
+}
+
+
+def build_incidence(user_features):
+    """
+    Build the binary incidence matrix for ``user_features``.
+
+    ``user_features`` is a sequence of feature sets, one per user, where each
+    feature is a ``(kind, value)`` pair. Returns ``(matrix, weights)``: a CSR
+    matrix of shape ``(len(user_features), n_features)`` and the weight of
+    each column.
+    """
+    columns = {}
+    weights = []
+    indptr = [0]
+    indices = []
+    for features in user_features:
+        for feature in features:
+            col = columns.get(feature)
+            if col is None:
+                col = columns[feature] = len(weights)
+                weights.append(FEATURE_WEIGHTS[feature[0]])
+            indices.append(col)
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.int32), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+        shape=(len(user_features), len(weights)),
+    )
+    return matrix, np.array(weights, dtype=np.int32)
+
+
+# At most this many of the most popular features are scored through a
+# bitmask signature instead of the sparse product; 16 bits keep the weighted
+# popcount table at 65536 entries.
+DENSE_FEATURES = 16
+
+
+def _split_dense(incidence, weights, dense_min_df):
+    """
+    Split columns into sparse ones and up to ``DENSE_FEATURES`` popular ones.
+
+    Popular features (a year, a class-year group) match a large share of all
+    users, so leaving them in the matrix product would make its output nearly
+    dense. Instead each user gets a bitmask of their popular features and the
+    contribution of a pair is ``table[sig_i & sig_j]``.
+    """
+    df = np.diff(incidence.tocsc().indptr)
+    popular = np.flatnonzero(df >= dense_min_df)
+    dense_cols = popular[np.argsort(-df[popular], kind='stable')][:DENSE_FEATURES]
+    sparse_mask = np.ones(incidence.shape[1], dtype=bool)
+    sparse_mask[dense_cols] = False
+
+    signatures = np.zeros(incidence.shape[0], dtype=np.int64)
+    dense_part = incidence[:, dense_cols].tocoo()
+    np.bitwise_or.at(signatures, dense_part.row, np.int64(1) << dense_part.col.astype(np.int64))
+
+    bits = (np.arange(1 << len(dense_cols))[:, np.newaxis] >> np.arange(len(dense_cols))) & 1
+    table = (bits @ weights[dense_cols].astype(np.int64)).astype(np.int32)
+
+    sparse_cols = np.flatnonzero(sparse_mask)
+    return incidence[:, sparse_cols], weights[sparse_cols], signatures, table
+
+
+def top_k_neighbors(incidence, weights, k=50, exclude=None, chunk_size=1000, dense_min_df=None):
+    """
+    Yield ``(row, neighbor_rows, scores)`` for every row of ``incidence``.
+
+    Each cohort of ``chunk_size`` rows is scored against every user with one
+    sparse matrix product over the rare features, plus a table lookup for the
+    popular ones (see ``_split_dense``). Users who only share popular features
+    are found by walking signature buckets in score order, so the result is the
+    exact top ``k``. Self-pairs, pairs set in ``exclude`` (e.g. blocks) and
+    zero scores are dropped. Neighbours are returned best first.
+    """
+    n = incidence.shape[0]
+    if dense_min_df is None:
+        dense_min_df = max(2, n // 100)
+    a_sparse, w_sparse, signatures, table = _split_dense(incidence.tocsr(), weights, dense_min_df)
+    weighted_t = sparse.csr_matrix(a_sparse.multiply(w_sparse[np.newaxis, :])).T.tocsr()
+    exclude = exclude.tocsr() if exclude is not None else None
+
+    # Users bucketed by popular-feature signature, for dense-only candidates.
+    unique_sigs, bucket_of = np.unique(signatures, return_inverse=True)
+    bucket_members = np.split(np.argsort(bucket_of, kind='stable'), np.cumsum(np.bincount(bucket_of))[:-1])
+    bucket_order = {}
+    marked = np.zeros(n, dtype=bool)
+
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        scores = (a_sparse[start:stop] @ weighted_t).tocsr()
+        scores.sort_indices()
+        rows = np.repeat(np.arange(start, stop), np.diff(scores.indptr))
+        scores.data = scores.data + table[signatures[rows] & signatures[scores.indices]]
+
+        for offset in range(stop - start):
+            row = start + offset
+            lo, hi = scores.indptr[offset], scores.indptr[offset + 1]
+            cols = scores.indices[lo:hi]
+            data = scores.data[lo:hi]
+
+            banned = [row]
+            if exclude is not None:
+                banned.extend(exclude.indices[exclude.indptr[row]:exclude.indptr[row + 1]])
+            marked[cols] = True
+            marked[banned] = True
+
+            # Best candidates sharing only popular features with this row.
+            sig = signatures[row]
+            order = bucket_order.get(sig)
+            if order is None:
+                bucket_scores = table[sig & unique_sigs]
+                order = [b for b in np.argsort(-bucket_scores, kind='stable') if bucket_scores[b] > 0]
+                bucket_order[sig] = order
+            extra_cols, extra_data, needed = [], [], k
+            for bucket in order:
+                members = bucket_members[bucket]
+                members = members[~marked[members]][:needed]
+                if len(members):
+                    extra_cols.append(members)
+                    extra_data.append(np.full(len(members), table[sig & unique_sigs[bucket]], dtype=np.int32))
+                    needed -= len(members)
+                if not needed:
+                    break
+            marked[cols] = False
+            marked[banned] = False
+
+            if extra_cols:
+                cols = np.concatenate([cols] + extra_cols)
+                data = np.concatenate([data] + extra_data)
+            keep = ~np.isin(cols, banned) & (data > 0)
+            cols, data = cols[keep], data[keep]
+            if len(data) > k:
+                top = np.argpartition(-data, k - 1)[:k]
+                cols, data = cols[top], data[top]
+            order_idx = np.lexsort((cols, -data))
+            yield row, cols[order_idx], data[order_idx]
+
+
+def naive_top_k_neighbors(user_features, k=50, exclude=frozenset(), rows=None):
+    """
+    Reference per-pair implementation of ``top_k_neighbors``.
+
+    Compares every pair of feature sets directly; kept for tests and the
+    benchmark in ``benchmarks/user_similarity.py``. ``rows`` limits which
+    users are scored (against everyone); by default all of them are.
+    """
+    results = []
+    for row in range(len(user_features)) if rows is None else rows:
+        mine = user_features[row]
+        scored = []
+        for other, theirs in enumerate(user_features):
+            if other == row or (row, other) in exclude:
+                continue
+            score = sum(FEATURE_WEIGHTS[kind] for kind, _ in mine & theirs)
+            if score > 0:
+                scored.append((-score, other))
+        scored.sort()
+        results.append([(other, -neg) for neg, other in scored[:k]])
+    return results
+
+
+def load_user_features():
+    """Return ``(user_ids, feature_sets)`` for every discoverable user."""
+    users = (
+        User.objects
+        .filter(is_active=True, onboarding_completed=True, verified_at__isnull=False)
+        .order_by('pk')
+        .values_list('pk', 'majors', 'interests_hobbies', 'year_of_study')
+    )
+    user_ids = []
+    features = []
+    for pk, majors, interests, year in users.iterator(chunk_size=5000):
+        feature_set = {('major', m) for m in majors or [] if m}
+        feature_set.update(('interest', i) for i in interests or [] if i)
+        if year:
+            feature_set.add(('year', year))
+        user_ids.append(pk)
+        features.append(feature_set)
+
+    index = {pk: row for row, pk in enumerate(user_ids)}
+    memberships = GroupMembership.objects.filter(
+        user__is_active=True, user__onboarding_completed=True, user__verified_at__isnull=False
+    ).values_list('user_id', 'group_id')
+    for user_id, group_id in memberships.iterator(chunk_size=5000):
+        if user_id in index:
+            features[index[user_id]].add(('group', group_id))
+    return user_ids, features
+
+
+def load_block_matrix(user_ids):
+    """Symmetric user x user matrix of block relationships between ``user_ids``."""
+    index = {pk: row for row, pk in enumerate(user_ids)}
+    rows, cols = [], []
+    blocks = User.blocked_users.through.objects.values_list('from_user_id', 'to_user_id')
+    for a, b in blocks.iterator(chunk_size=5000):
+        if a in index and b in index:
+            rows += [index[a], index[b]]
+            cols += [index[b], index[a]]
+    n = len(user_ids)
+    return sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n, n))
+
+
+def rebuild_user_neighbors(k=50, chunk_size=1000, batch_size=5000):
+    """
+    Recompute the top-``k`` neighbours of every discoverable user.
+
+    Returns the number of users scored. The table is replaced in a single
+    transaction so readers never observe a half-built index.
+    """
+    user_ids, features = load_user_features()
+    if not user_ids:
+        UserNeighbor.objects.all().delete()
+        return 0
+
+    incidence, weights = build_incidence(features)
+    blocks = load_block_matrix(user_ids)
+
+    with transaction.atomic():
+        UserNeighbor.objects.all().delete()
+        batch = []
+        for row, neighbor_rows, scores in top_k_neighbors(incidence, weights, k, blocks, chunk_size):
+            user_id = user_ids[row]
+            batch.extend(
+                UserNeighbor(user_id=user_id, neighbor_id=user_ids[n], score=int(s))
+                for n, s in zip(neighbor_rows, scores)
+            )
+            if len(batch) >= batch_size:
+                UserNeighbor.objects.bulk_create(batch)
+                batch = []
+        UserNeighbor.objects.bulk_create(batch)
+    return len(user_ids)
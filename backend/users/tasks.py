@@ -0,0 +1,34 @@
+"""
+Celery tasks for the users app.
+"""
+
+from celery import shared_task
+
+from groups.discovery import refresh_friend_overlap
+from groups.models import GroupMembership
+from .discovery import index_user
+from .similarity import rebuild_user_neighbors as _rebuild_user_neighbors
+from .models import User
+
+
+@shared_task(ignore_result=True)
+def reindex_user(user_id):
+    """Refresh a user's discovery tag postings after their profile changes."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is not None:
+        index_user(user)
+
+
+@shared_task(ignore_result=True)
+def friendship_changed(user1_id, user2_id):
+    """Refresh friend-in-group counts after a friendship is made or removed."""
+    groups1 = list(GroupMembership.objects.filter(user_id=user1_id).values_list('group_id', flat=True))
+    groups2 = list(GroupMembership.objects.filter(user_id=user2_id).values_list('group_id', flat=True))
+    refresh_friend_overlap([user1_id], groups2)
+    refresh_friend_overlap([user2_id], groups1)
+
+
+@shared_task(ignore_result=True)
+def rebuild_user_neighbors(k=50):
+    """Recompute every user's top-``k`` similar users in one batch."""
+    _rebuild_user_neighbors(k=k)
@@ -2,9 +2,28 @@
 Tests for user models and authentication.
 """
 
+import random
+from io import StringIO
+
 import pytest
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
 from django.contrib.auth import get_user_model
-from users.models import FriendRequest, Friendship
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from scipy import sparse
+from core.querycount import record_queries
+from dawgpound.routing import websocket_urlpatterns
+from users.blocks import blocked_ids, filter_visible, is_blocked
+from users.cache import get_user
+from users.friends import friends, friends_of_friends, mutual
+from users.presence import online, presence_key
+from users.models import FriendEdge, FriendRequest, Friendship, UserNeighbor
+from users.similarity import build_incidence, naive_top_k_neighbors, top_k_neighbors
 
 
 User = get_user_model()
@@ -119,3 +138,302 @@ class TestFriendship:
         assert friend_request.status == 'accepted'
         assert Friendship.objects.filter(user1=user1, user2=user2).exists()
 
+
+class TestSimilarityScorer:
+    """Test the vectorized scorer against the per-pair reference."""
+
+    def random_campus(self, n_users, seed=0):
+        rng = random.Random(seed)
+        campus = []
+        for _ in range(n_users):
+            features = {('year', rng.choice('ABCD'))}
+            features.update(('major', rng.randrange(8)) for _ in range(rng.randint(0, 2)))
+            features.update(('interest', rng.randrange(30)) for _ in range(rng.randint(0, 5)))
+            features.update(('group', rng.randrange(20)) for _ in range(rng.randint(0, 3)))
+            campus.append(features)
+        return campus
+
+    @pytest.mark.parametrize('dense_min_df', [None, 2, 10 ** 9])
+    def test_matches_naive_scores(self, dense_min_df):
+        campus = self.random_campus(200)
+        blocked = {(0, 1), (1, 0), (5, 9), (9, 5)}
+        rows, cols = zip(*blocked)
+        exclude = sparse.csr_matrix(([1] * len(rows), (rows, cols)), shape=(200, 200))
+
+        incidence, weights = build_incidence(campus)
+        vectorized = top_k_neighbors(
+            incidence, weights, k=10, exclude=exclude, chunk_size=64, dense_min_df=dense_min_df
+        )
+        expected = naive_top_k_neighbors(campus, k=10, exclude=blocked)
+
+        for row, neighbor_rows, scores in vectorized:
+            # Ties at the cut-off may pick different users; the scores must agree.
+            assert list(scores) == [score for _, score in expected[row]]
+            for other in neighbor_rows:
+                assert (row, other) not in blocked and other != row
+
+
+@pytest.mark.django_db
+class TestUserNeighbors:
+    """Test the precomputed neighbour table and the recommendations endpoint."""
+
+    def make_user(self, username, **profile):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            university_email=f'{username}@university.edu',
+            password='pass123',
+            verified_at=timezone.now(),
+            onboarding_completed=True,
+            **profile
+        )
+
+    def test_build_command_and_recommendations(self, authenticated_client, authenticated_user):
+        authenticated_user.majors = ['Computer Science']
+        authenticated_user.year_of_study = 'Junior'
+        authenticated_user.onboarding_completed = True
+        authenticated_user.save()
+        alice = self.make_user('alice', majors=['Computer Science'], year_of_study='Junior')
+        bob = self.make_user('bob', year_of_study='Junior')
+        blocked = self.make_user('blocked', majors=['Computer Science'])
+        self.make_user('stranger', majors=['History'])
+        authenticated_user.blocked_users.add(blocked)
+
+        call_command('build_user_neighbors', '--top-k', '5', stdout=StringIO())
+
+        neighbors = list(
+            UserNeighbor.objects.filter(user=authenticated_user)
+            .order_by('-score').values_list('neighbor__username', 'score')
+        )
+        assert neighbors == [('alice', 18), ('bob', 8)]
+        assert UserNeighbor.objects.filter(user=alice, neighbor=authenticated_user, score=18).exists()
+
+        # Profile changes after the batch run are rescored exactly on read.
+        bob.majors = ['Computer Science']
+        bob.save()
+        response = authenticated_client.get('/api/auth/recommendations/')
+        assert response.status_code == 200
+        assert [(u['user']['username'], u['score']) for u in response.data['users']] == [
+            ('alice', 18), ('bob', 18)
+        ]
+
+
+@pytest.mark.django_db
+class TestUserSearch:
+    """Test the user search endpoint."""
+
+    def make_user(self, username, verified=True, **fields):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            university_email=f'{username}@university.edu',
+            password='pass123',
+            verified_at=timezone.now() if verified else None,
+            **fields
+        )
+
+    def test_prefix_matches_rank_first(self, authenticated_client):
+        self.make_user('bjohnson', first_name='Bea')
+        self.make_user('johnny')
+        self.make_user('john', last_name='Smith')
+        self.make_user('johnunverified', verified=False)
+
+        response = authenticated_client.get('/api/auth/search/?q=john')
+        assert response.status_code == 200
+        assert [u['username'] for u in response.data['users']] == ['john', 'johnny', 'bjohnson']
+
+    def test_blocked_users_excluded_both_ways(self, authenticated_client, authenticated_user):
+        blocked = self.make_user('sam_blocked')
+        blocker = self.make_user('sam_blocker')
+        self.make_user('sam_ok')
+        authenticated_user.blocked_users.add(blocked)
+        blocker.blocked_users.add(authenticated_user)
+
+        response = authenticated_client.get('/api/auth/search/?q=sam')
+        assert [u['username'] for u in response.data['users']] == ['sam_ok']
+
+    def test_query_required(self, authenticated_client):
+        assert authenticated_client.get('/api/auth/search/?q=').status_code == 400
+
+
+@pytest.mark.django_db
+class TestUserCache:
+    """Test cached profile reads and their invalidation."""
+
+    def test_profile_changes_invalidate_cache(self, authenticated_user):
+        other = User.objects.create_user(
+            username='other', email='other@example.com', university_email='other@university.edu', password='pass123'
+        )
+        assert get_user(authenticated_user.pk).majors == []
+        with record_queries('test') as recorder:
+            get_user(authenticated_user.pk)
+        assert recorder.count == 0
+
+        authenticated_user.majors = ['Biology']
+        authenticated_user.save()
+        assert get_user(authenticated_user.pk).majors == ['Biology']
+
+        assert get_user(other.pk) is not None
+        other.blocked_users.add(authenticated_user)
+        with record_queries('test') as recorder:
+            get_user(other.pk)
+            get_user(authenticated_user.pk)
+        assert recorder.count == 2
+
+    def test_jwt_requests_read_user_from_cache(self, authenticated_user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(authenticated_user)}')
+        assert client.get('/api/auth/recommendations/').status_code == 200
+
+        with record_queries('test') as recorder:
+            assert client.get('/api/auth/recommendations/').status_code == 200
+        assert not any('FROM "users" WHERE "users"."id" =' in sql for sql in recorder.signatures)
+
+        authenticated_user.is_active = False
+        authenticated_user.save()
+        assert client.get('/api/auth/recommendations/').status_code == 401
+
+
+@pytest.mark.django_db
+class TestBlockIndex:
+    """Test the cached block graph used for visibility filtering."""
+
+    def test_filter_visible_hides_both_directions(self, authenticated_user):
+        users = [
+            User.objects.create_user(
+                username=f'block{i}', email=f'block{i}@example.com',
+                university_email=f'block{i}@university.edu', password='pass123'
+            )
+            for i in range(4)
+        ]
+        authenticated_user.blocked_users.add(users[0])
+        users[1].blocked_users.add(authenticated_user)
+        candidates = [user.pk for user in reversed(users)]
+
+        assert filter_visible(authenticated_user, candidates) == [users[3].pk, users[2].pk]
+        with record_queries('test') as recorder:
+            assert filter_visible(authenticated_user.pk, candidates) == [users[3].pk, users[2].pk]
+            assert is_blocked(users[0], authenticated_user)
+        # users[0] was not cached yet; authenticated_user was.
+        assert recorder.count == 1
+
+    def test_block_changes_update_index(self, authenticated_user):
+        other = User.objects.create_user(
+            username='other', email='other@example.com', university_email='other@university.edu', password='pass123'
+        )
+        assert blocked_ids(other) == set()
+
+        authenticated_user.blocked_users.add(other)
+        assert blocked_ids(other) == {authenticated_user.pk}
+        assert is_blocked(authenticated_user, other)
+
+        authenticated_user.blocked_users.clear()
+        assert not is_blocked(other, authenticated_user)
+        assert blocked_ids(authenticated_user) == set()
+
+
+@pytest.mark.django_db
+class TestFriendGraph:
+    """Test the symmetric friend edge table and the queries over it."""
+
+    def make_users(self, *names):
+        return [
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', university_email=f'{name}@university.edu',
+                password='pass123', verified_at=timezone.now(), onboarding_completed=True,
+            )
+            for name in names
+        ]
+
+    def test_friend_queries(self, authenticated_user):
+        alice, bob, carol, dave, eve = self.make_users('alice', 'bob', 'carol', 'dave', 'eve')
+        me = authenticated_user
+        for a, b in [(me, alice), (bob, me), (alice, carol), (bob, carol), (alice, dave), (bob, eve)]:
+            Friendship.objects.create(user1=a, user2=b)
+        me.blocked_users.add(eve)
+
+        assert friends(me) == [alice.pk, bob.pk]
+        assert friends(carol.pk) == [alice.pk, bob.pk]
+        assert mutual(me, carol) == [alice.pk, bob.pk]
+        assert mutual(alice, bob) == [me.pk, carol.pk]
+        assert friends_of_friends(me) == [(carol.pk, 2), (dave.pk, 1)]
+        assert friends_of_friends(me, limit=1) == [(carol.pk, 2)]
+
+        Friendship.objects.get(user1=bob, user2=me).delete()
+        assert friends(me) == [alice.pk]
+        assert FriendEdge.objects.count() == 10
+
+    def test_recommendations_rank_mutual_friends(self, authenticated_client, authenticated_user):
+        alice, bob = self.make_users('alice', 'bob')
+        authenticated_user.onboarding_completed = True
+        authenticated_user.save()
+        Friendship.objects.create(user1=authenticated_user, user2=alice)
+        Friendship.objects.create(user1=alice, user2=bob)
+
+        response = authenticated_client.get('/api/auth/recommendations/')
+        assert response.status_code == 200
+        assert [(u['user']['username'], u['score'], u['mutual_friends']) for u in response.data['users']] == [
+            ('bob', 6, 1)
+        ]
+
+
+def presence_socket(user):
+    communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/presence/')
+    communicator.scope['user'] = user
+    return communicator
+
+
+@pytest.mark.django_db
+class TestPresence:
+    """Test presence sessions and friend notifications."""
+
+    def make_user(self, name):
+        return User.objects.create_user(
+            username=name, email=f'{name}@example.com', university_email=f'{name}@university.edu',
+            password='pass123',
+        )
+
+    def test_friends_are_told_about_first_and_last_session(self, authenticated_user):
+        alice, stranger = self.make_user('alice'), self.make_user('stranger')
+        Friendship.objects.create(user1=authenticated_user, user2=alice)
+
+        @async_to_sync
+        async def run():
+            phone, laptop = presence_socket(alice), presence_socket(alice)
+            assert (await phone.connect())[0]
+            assert (await phone.receive_json_from())['online'] == []
+            assert (await laptop.connect())[0]
+            assert (await laptop.receive_json_from())['online'] == []
+            other = presence_socket(stranger)
+            assert (await other.connect())[0]
+            await other.receive_json_from()
+
+            me = presence_socket(authenticated_user)
+            assert (await me.connect())[0]
+            snapshot = await me.receive_json_from()
+            pushed = [await phone.receive_json_from(), await laptop.receive_json_from()]
+            await me.send_json_to({'type': 'query', 'users': [alice.pk, stranger.pk]})
+            answer = await me.receive_json_from()
+
+            # A second tab closing is not a change; the last one is.
+            await laptop.send_json_to({'type': 'heartbeat'})
+            await laptop.disconnect()
+            assert await me.receive_nothing()
+            await phone.disconnect()
+            offline = await me.receive_json_from()
+            assert await other.receive_nothing()
+            await other.disconnect()
+            await me.disconnect()
+            return snapshot, pushed, answer, offline
+
+        snapshot, pushed, answer, offline = run()
+        assert snapshot == {'type': 'presence', 'online': [alice.pk], 'heartbeat_interval': 30}
+        assert pushed == [{'type': 'online', 'user': authenticated_user.pk}] * 2
+        assert answer == {'type': 'presence', 'online': [alice.pk]}
+        assert offline == {'type': 'offline', 'user': alice.pk}
+
+    def test_expired_sessions_are_offline(self):
+        cache.set(presence_key(1), {'gone': 0.0, 'live': 2 ** 40})
+        cache.set(presence_key(2), {'gone': 0.0})
+        assert async_to_sync(online)([1, 2, 3]) == {1}
+
@@ -5,9 +5,14 @@ URLs for the users app.
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from .views import DataExportView, UserRecommendationsView, UserSearchView
+
 # Router will be configured when views are created
 router = DefaultRouter()
 
 urlpatterns = [
+    path('recommendations/', UserRecommendationsView.as_view(), name='user-recommendations'),
+    path('search/', UserSearchView.as_view(), name='user-search'),
+    path('export/', DataExportView.as_view(), name='user-data-export'),
     path('', include(router.urls)),
 ]
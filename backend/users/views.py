@@ -1,3 +1,50 @@
-from django.shortcuts import render
+"""
+Views for the users app.
+"""
 
-# Create your views here.
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.export import streaming_export, user_records
+from .discovery import recommend_users
+from .search import search_users
+from .serializers import RecommendedUserSerializer, UserSearchResultSerializer
+
+
+class UserRecommendationsView(APIView):
+    """
+    People-you-may-know list for the requester, best match first.
+    """
+
+    def get(self, request):
+        users = recommend_users(request.user, limit=20)
+        return Response({'users': RecommendedUserSerializer(users, many=True).data})
+
+
+class UserSearchView(APIView):
+    """
+    Find people by username, name or email (``q``), best match first.
+    """
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'q parameter required for search'}, status=status.HTTP_400_BAD_REQUEST)
+        users = search_users(request.user, query)
+        return Response({'users': UserSearchResultSerializer(users, many=True).data})
+
+
+
+class DataExportView(APIView):
+    """
+    Download everything stored about the requester as NDJSON, streamed as
+    it is read. ``?compress=gzip`` gzips the stream.
+    """
+
+    def get(self, request):
+        return streaming_export(
+            user_records(request.user.pk),
+            f'dawgpound-{request.user.username}.ndjson',
+            compress=request.query_params.get('compress') == 'gzip',
+        )